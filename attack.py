@@ -1,5 +1,6 @@
 from file_id_interpreter import FileIdInterpreter
 from math import floor, ceil
+from metrics import METRICS
 
 class Attack:
     """Class representing an attack.
@@ -53,19 +54,21 @@ class Attack:
     def isInRange(self, 
                   origin_coords: tuple[int, int],
                   target_coords: tuple[int, int],
-                  obstructed_coords: list[tuple[int, int]]) -> bool:
+                  obstructed_coords: set[tuple[int, int]]) -> bool:
         """Determines if the target_coords are in range of self_coords.
 
         Checks whether target_coords are within taxicab distance of origin_coords,
         and there are no obstructed tiles between them.
         Returns True if in range, else returns False.
         """
+        METRICS.increment('is_in_range.calls')
         # Checks if the target is not within range.
         if (abs(origin_coords[0] - target_coords[0]) + 
             abs(origin_coords[1] - target_coords[1]) > self.getRange()):
             return False
         # Checks if any tiles between origin and target are obstructed.
         intersected_coords = self.getBetweenCoords(origin_coords, target_coords)
+        METRICS.increment('is_in_range.tiles_traversed', len(intersected_coords))
         for coords in intersected_coords:
             if coords in obstructed_coords:
                 return False
@@ -0,0 +1,90 @@
+import pygame
+
+class Camera:
+    """Class representing the camera through which the board is viewed.
+
+    The viewport is the area of the screen the board is drawn to. The camera
+    follows the character, so boards larger than the viewport scroll.
+    Positions on the board are in board pixels (board coords * 64), while
+    positions on the screen are in screen pixels.
+
+    Attributes:
+        viewport_rect (pygame.Rect): Area of the screen onto which the board is drawn.
+        offset (tuple[int, int]): Board pixel position shown at the topleft of the viewport.
+        board_pixel_size (tuple[int, int]): Size of the board in board pixels.
+    """
+
+    # Attributes
+    __viewport_rect = None
+    __offset = None
+    __board_pixel_size = None
+
+    # Constructor
+    def __init__(self,
+                 viewport_rect: pygame.Rect,
+                 board_size: tuple[int, int]):
+        self.setViewportRect(viewport_rect)
+        self.setOffset((0, 0))
+        self.setBoardPixelSize((board_size[0]*64, board_size[1]*64))
+
+    # Getters
+    def getViewportRect(self) -> pygame.Rect:
+        return self.__viewport_rect
+    def getOffset(self) -> tuple[int, int]:
+        return self.__offset
+    def getBoardPixelSize(self) -> tuple[int, int]:
+        return self.__board_pixel_size
+
+    # Setters
+    def setViewportRect(self, viewport_rect):
+        self.__viewport_rect = viewport_rect
+    def setOffset(self, offset):
+        self.__offset = offset
+    def setBoardPixelSize(self, board_pixel_size):
+        self.__board_pixel_size = board_pixel_size
+
+    # Methods
+    def follow(self, xcoord: int, ycoord: int) -> None:
+        """Centres the viewport on the tile at (xcoord, ycoord).
+
+        The offset is clamped so that the viewport does not scroll past the board's edges.
+        If the board is smaller than the viewport, it is drawn from the viewport's topleft.
+        """
+        viewport_rect = self.getViewportRect()
+        board_width, board_height = self.getBoardPixelSize()
+        offset_x = xcoord*64 + 32 - viewport_rect.width // 2
+        offset_y = ycoord*64 + 32 - viewport_rect.height // 2
+        offset_x = max(0, min(offset_x, board_width - viewport_rect.width))
+        offset_y = max(0, min(offset_y, board_height - viewport_rect.height))
+        self.setOffset((offset_x, offset_y))
+
+    def getVisibleBoardRect(self) -> pygame.Rect:
+        """Returns the rect (in board pixels) of the part of the board inside the viewport."""
+        viewport_rect = self.getViewportRect()
+        offset_x, offset_y = self.getOffset()
+        return pygame.Rect(offset_x, offset_y, viewport_rect.width, viewport_rect.height)
+
+    def getVisibleCoordsRange(self) -> tuple[int, int, int, int]:
+        """Returns (min_xcoord, min_ycoord, max_xcoord, max_ycoord) of the tiles
+        that are at least partly inside the viewport (max values are inclusive).
+        """
+        visible_rect = self.getVisibleBoardRect()
+        return (visible_rect.left // 64, visible_rect.top // 64,
+                (visible_rect.right - 1) // 64, (visible_rect.bottom - 1) // 64)
+
+    def isVisible(self, board_rect: pygame.Rect) -> bool:
+        """Returns whether board_rect (in board pixels) is at least partly inside the viewport."""
+        return self.getVisibleBoardRect().colliderect(board_rect)
+
+    def boardToScreenRect(self, board_rect: pygame.Rect) -> pygame.Rect:
+        """Converts a rect in board pixels to a rect in screen pixels."""
+        viewport_rect = self.getViewportRect()
+        offset_x, offset_y = self.getOffset()
+        return board_rect.move(viewport_rect.left - offset_x, viewport_rect.top - offset_y)
+
+    def screenToBoardPos(self, screen_pos: tuple[int, int]) -> tuple[int, int]:
+        """Converts a position in screen pixels to a position in board pixels."""
+        viewport_rect = self.getViewportRect()
+        offset_x, offset_y = self.getOffset()
+        return (screen_pos[0] - viewport_rect.left + offset_x,
+                screen_pos[1] - viewport_rect.top + offset_y)
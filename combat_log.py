@@ -0,0 +1,104 @@
+import os
+import json
+from array import array
+from typing import Optional
+from game_event import GameEvent
+
+class CombatLog:
+    """Class that logs the game events (see GameEvent) of a game session, with the turn each happened on.
+
+    The log is a ring buffer of fixed capacity: once it is full, each logged event overwrites
+    the oldest one, so memory does not grow with the length of the session.
+    Every logged event has a sequence number (0 for the first event of the session, increasing by 1),
+    by which it is read; only the latest capacity events are retained.
+
+    Attributes:
+        capacity (int): Maximum number of events retained.
+        events (list[Optional[GameEvent]]): Ring buffer of events. The event with sequence number s is at s % capacity.
+        turn_numbers (array): Turn number of each event in events.
+        num_logged (int): Number of events logged in the session (the sequence number of the next event).
+    """
+
+    DEFAULT_CAPACITY = 1024
+    EXPORT_PATH = 'gameinfostorage/combat_log.jsonl'
+
+    # Attributes
+    __capacity = None
+    __events = None
+    __turn_numbers = None
+    __num_logged = None
+
+    # Constructor
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.setCapacity(capacity)
+        self.setEvents([None] * capacity)
+        self.setTurnNumbers(array('i', bytes(capacity * array('i').itemsize)))
+        self.setNumLogged(0)
+
+    # Getters
+    def getCapacity(self) -> int:
+        return self.__capacity
+    def getEvents(self) -> list[Optional[GameEvent]]:
+        return self.__events
+    def getTurnNumbers(self) -> array:
+        return self.__turn_numbers
+    def getNumLogged(self) -> int:
+        return self.__num_logged
+
+    # Setters
+    def setCapacity(self, capacity):
+        self.__capacity = capacity
+    def setEvents(self, events):
+        self.__events = events
+    def setTurnNumbers(self, turn_numbers):
+        self.__turn_numbers = turn_numbers
+    def setNumLogged(self, num_logged):
+        self.__num_logged = num_logged
+
+    # Methods
+    def append(self, event: GameEvent, turn_number: int) -> None:
+        """Logs event as happening on turn turn_number, overwriting the oldest event if the log is full."""
+        num_logged = self.getNumLogged()
+        slot = num_logged % self.getCapacity()
+        self.getEvents()[slot] = event
+        self.getTurnNumbers()[slot] = turn_number
+        self.setNumLogged(num_logged + 1)
+
+    def extend(self, events: list[GameEvent], turn_number: int) -> None:
+        """Logs each of events as happening on turn turn_number."""
+        for event in events:
+            self.append(event, turn_number)
+
+    def getOldestSequence(self) -> int:
+        """Returns the sequence number of the oldest event retained."""
+        return max(self.getNumLogged() - self.getCapacity(), 0)
+
+    def getEntries(self, start: int, stop: int) -> list[tuple[int, GameEvent]]:
+        """Returns (turn number, event) of each retained event with a sequence number in [start, stop)."""
+        capacity = self.getCapacity()
+        events = self.getEvents()
+        turn_numbers = self.getTurnNumbers()
+        start = max(start, self.getOldestSequence())
+        stop = min(stop, self.getNumLogged())
+        return [(turn_numbers[sequence % capacity], events[sequence % capacity])
+                for sequence in range(start, stop)]
+
+    def export(self, path: str = EXPORT_PATH) -> int:
+        """Writes the retained events to path (oldest first), one JSON object per line with keys
+        'sequence', 'turn_number', 'kind', 'fields' and 'text'.
+
+        Returns the number of events written. Raises OSError if the file cannot be written.
+        """
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        start = self.getOldestSequence()
+        entries = self.getEntries(start, self.getNumLogged())
+        with open(path, 'w') as file:
+            for sequence, (turn_number, event) in enumerate(entries, start):
+                file.write(json.dumps({'sequence': sequence, 'turn_number': turn_number, 'kind': event.getKind(),
+                                       'fields': event.toDict(), 'text': event.format()}) + '\n')
+        return len(entries)
+
+    def __len__(self) -> int:
+        return min(self.getNumLogged(), self.getCapacity())
@@ -0,0 +1,127 @@
+from array import array
+from typing import Hashable, Iterator
+
+class ComponentStore:
+    """Class that stores the entities on a board by their components, so that systems
+    (e.g. obstruction, tile damage) iterate only the entities with the components they need,
+    instead of type checking every entity.
+
+    Each entity class declares its components (Entity.COMPONENTS), so all entities of a class
+    share an archetype (set of components), and are stored together: the cell index of each entity
+    (its position on the board, see Board) and the entities themselves are kept in dense arrays,
+    with the slot of each cell in its archetype's arrays. Entities are added and removed in O(1),
+    a removed entity's slot being filled by the archetype's last entity.
+
+    A query selects archetypes, and is either a component (archetypes with the component) or
+    entity types (archetypes that are subclasses of them). The archetypes matching each query
+    are cached, so a query costs no type checks once its archetypes are known.
+
+    Components:
+        POSITION: Is on the board. Every entity.
+        HEALTH: Has health, so takes damage (e.g. from tiles).
+        BLOCKER: Blocks the movement of every entity, including the character.
+        INTERACTABLE: The character interacts with it instead of moving onto its tile
+            (see interact() of the entity).
+
+    Attributes:
+        archetype_cells (dict[type, array]): Cell index of each entity of each archetype.
+        archetype_entities (dict[type, list[Entity]]): Entities of each archetype,
+            in the same order as archetype_cells.
+        cell_slots (dict[int, int]): Slot of the entity at each cell index, in its archetype's arrays.
+        query_archetypes (dict[Hashable, list[type]]): Archetypes matching each query made.
+    """
+
+    POSITION = 'position'
+    HEALTH = 'health'
+    BLOCKER = 'blocker'
+    INTERACTABLE = 'interactable'
+
+    # Attributes
+    __archetype_cells = None
+    __archetype_entities = None
+    __cell_slots = None
+    __query_archetypes = None
+
+    # Constructor
+    def __init__(self):
+        self.setArchetypeCells(dict())
+        self.setArchetypeEntities(dict())
+        self.setCellSlots(dict())
+        self.setQueryArchetypes(dict())
+
+    # Getters
+    def getArchetypeCells(self) -> dict[type, array]:
+        return self.__archetype_cells
+    def getArchetypeEntities(self) -> dict[type, list]:
+        return self.__archetype_entities
+    def getCellSlots(self) -> dict[int, int]:
+        return self.__cell_slots
+    def getQueryArchetypes(self) -> dict[Hashable, list[type]]:
+        return self.__query_archetypes
+
+    # Setters
+    def setArchetypeCells(self, archetype_cells):
+        self.__archetype_cells = archetype_cells
+    def setArchetypeEntities(self, archetype_entities):
+        self.__archetype_entities = archetype_entities
+    def setCellSlots(self, cell_slots):
+        self.__cell_slots = cell_slots
+    def setQueryArchetypes(self, query_archetypes):
+        self.__query_archetypes = query_archetypes
+
+    # Methods
+    def add(self, cell: int, entity) -> None:
+        """Adds entity at cell index cell. The cell must not already have an entity."""
+        archetype = type(entity)
+        archetype_cells = self.getArchetypeCells()
+        if archetype not in archetype_cells:
+            archetype_cells[archetype] = array('i')
+            self.getArchetypeEntities()[archetype] = []
+            self.getQueryArchetypes().clear() # Cached queries may match the new archetype.
+        cells = archetype_cells[archetype]
+        self.getCellSlots()[cell] = len(cells)
+        cells.append(cell)
+        self.getArchetypeEntities()[archetype].append(entity)
+
+    def remove(self, cell: int, entity) -> None:
+        """Removes entity, at cell index cell."""
+        archetype = type(entity)
+        cells = self.getArchetypeCells()[archetype]
+        entities = self.getArchetypeEntities()[archetype]
+        cell_slots = self.getCellSlots()
+        slot = cell_slots.pop(cell)
+        last_cell, last_entity = cells.pop(), entities.pop()
+        if slot != len(cells):
+            # Moves the last entity into the removed entity's slot.
+            cells[slot], entities[slot] = last_cell, last_entity
+            cell_slots[last_cell] = slot
+
+    def getArchetypes(self, query: str | type | tuple[type]) -> list[type]:
+        """Returns the archetypes matching query (a component, or entity types)."""
+        query_archetypes = self.getQueryArchetypes()
+        if query not in query_archetypes:
+            if isinstance(query, str):
+                query_archetypes[query] = [archetype for archetype in self.getArchetypeCells()
+                                           if query in archetype.COMPONENTS]
+            else:
+                query_archetypes[query] = [archetype for archetype in self.getArchetypeCells()
+                                           if issubclass(archetype, query)]
+        return query_archetypes[query]
+
+    def getCells(self, query: str | type | tuple[type]) -> Iterator[int]:
+        """Yields the cell index of each entity matching query."""
+        archetype_cells = self.getArchetypeCells()
+        for archetype in self.getArchetypes(query):
+            yield from archetype_cells[archetype]
+
+    def count(self, query: str | type | tuple[type]) -> int:
+        """Returns the number of entities matching query."""
+        archetype_cells = self.getArchetypeCells()
+        return sum(len(archetype_cells[archetype]) for archetype in self.getArchetypes(query))
+
+    def getOccupiedCells(self) -> Iterator[int]:
+        """Returns an iterator over the cell index of every entity."""
+        return iter(self.getCellSlots())
+
+    def __len__(self) -> int:
+        return len(self.getCellSlots())
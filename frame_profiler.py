@@ -0,0 +1,200 @@
+import pygame
+from array import array
+from time import perf_counter
+from typing import Optional
+from pygame.locals import SRCALPHA
+
+class FrameProfiler:
+    """Class that times each phase of the game loop's frames, and draws the rolling timings as an overlay.
+
+    Phases are timed with startPhase() and endPhase(), and a frame is ended by beginFrame() of the next frame.
+    Phases may be nested (e.g. 'update_display' is timed within 'run'), each phase's time being its total
+    within the frame. The timings of the last WINDOW frames are kept in ring buffers.
+    The overlay shows the FPS, frame time percentiles, the mean time of each phase, and the worst frames
+    (with their slowest phase). It is redrawn every REDRAW_INTERVAL frames.
+    While disabled, the profiler times nothing, so it costs a method call per phase.
+
+    Phases:
+        'events': Polling pygame events.
+        'run': Running the current game state.
+        'update_display': GameWorld.updateDisplay() (within 'run').
+        'sidebar': Composing the sidebar (within 'update_display').
+        'blit': Blitting the game state's surface onto the screen.
+        'flip': pygame.display.flip().
+
+    Attributes:
+        is_enabled (bool): Whether frames are timed and the overlay is shown.
+        frame_times (array): Ring buffer of the time between the starts of consecutive frames (seconds).
+        phase_times (dict[str, array]): Ring buffer of each phase's time in each frame (seconds).
+        phase_starts (dict[str, float]): perf_counter() time each started phase was started at.
+        frame_start (Optional[float]): perf_counter() time the current frame was started at.
+        num_frames (int): Number of frames timed since the profiler was enabled.
+        surf (pygame.Surface): Overlay surface. Size: 360 x 260
+        font (pygame.font.Font): Font of the overlay's text.
+    """
+
+    PHASES = ('events', 'run', 'update_display', 'sidebar', 'blit', 'flip')
+    WINDOW = 240
+    REDRAW_INTERVAL = 15
+    NUM_WORST_FRAMES = 3
+    TOGGLE_KEY = pygame.K_F3
+
+    # Attributes
+    __is_enabled = None
+    __frame_times = None
+    __phase_times = None
+    __phase_starts = None
+    __frame_start = None
+    __num_frames = None
+    __surf = None
+    __font = None
+
+    # Constructor
+    def __init__(self):
+        self.setSurf(pygame.Surface((360, 260), SRCALPHA))
+        self.setFont(pygame.font.Font(None, 20))
+        self.setPhaseStarts(dict())
+        self.reset()
+        self.setIsEnabled(False)
+
+    # Getters
+    def getIsEnabled(self) -> bool:
+        return self.__is_enabled
+    def getFrameTimes(self) -> array:
+        return self.__frame_times
+    def getPhaseTimes(self) -> dict[str, array]:
+        return self.__phase_times
+    def getPhaseStarts(self) -> dict[str, float]:
+        return self.__phase_starts
+    def getFrameStart(self) -> Optional[float]:
+        return self.__frame_start
+    def getNumFrames(self) -> int:
+        return self.__num_frames
+    def getSurf(self) -> pygame.Surface:
+        return self.__surf
+    def getFont(self) -> pygame.font.Font:
+        return self.__font
+
+    # Setters
+    def setIsEnabled(self, is_enabled):
+        self.__is_enabled = is_enabled
+    def setFrameTimes(self, frame_times):
+        self.__frame_times = frame_times
+    def setPhaseTimes(self, phase_times):
+        self.__phase_times = phase_times
+    def setPhaseStarts(self, phase_starts):
+        self.__phase_starts = phase_starts
+    def setFrameStart(self, frame_start):
+        self.__frame_start = frame_start
+    def setNumFrames(self, num_frames):
+        self.__num_frames = num_frames
+    def setSurf(self, surf):
+        self.__surf = surf
+    def setFont(self, font):
+        self.__font = font
+
+    # Methods
+    def reset(self) -> None:
+        """Discards all timings."""
+        self.setFrameTimes(array('d', bytes(self.WINDOW * 8)))
+        self.setPhaseTimes({phase: array('d', bytes(self.WINDOW * 8)) for phase in self.PHASES})
+        self.getPhaseStarts().clear()
+        self.setFrameStart(None)
+        self.setNumFrames(0)
+
+    def toggle(self) -> None:
+        """Enables the profiler (with no timings) if disabled, else disables it."""
+        if not self.getIsEnabled():
+            self.reset()
+        self.setIsEnabled(not self.getIsEnabled())
+
+    def beginFrame(self) -> None:
+        """Ends the current frame (if any), and starts the next. To be run at the start of each frame."""
+        if not self.__is_enabled:
+            return
+        now = perf_counter()
+        frame_start = self.getFrameStart()
+        if frame_start != None:
+            num_frames = self.getNumFrames()
+            self.getFrameTimes()[num_frames % self.WINDOW] = now - frame_start
+            self.setNumFrames(num_frames + 1)
+            if self.getNumFrames() % self.REDRAW_INTERVAL == 0:
+                self.updateSurf()
+        # Clears the next frame's slot of each phase, as phases add their time to it.
+        slot = self.getNumFrames() % self.WINDOW
+        for phase_times in self.getPhaseTimes().values():
+            phase_times[slot] = 0.0
+        self.setFrameStart(now)
+
+    def startPhase(self, phase: str) -> None:
+        """Starts timing phase (one of PHASES) in the current frame."""
+        if not self.__is_enabled:
+            return
+        self.__phase_starts[phase] = perf_counter()
+
+    def endPhase(self, phase: str) -> None:
+        """Stops timing phase, adding the time since startPhase() to its time in the current frame."""
+        if not self.__is_enabled or phase not in self.__phase_starts:
+            return
+        elapsed = perf_counter() - self.__phase_starts.pop(phase)
+        self.__phase_times[phase][self.__num_frames % self.WINDOW] += elapsed
+
+    def getWindowSlots(self) -> range:
+        """Returns the ring buffer slots of the frames in the window."""
+        return range(min(self.getNumFrames(), self.WINDOW))
+
+    def calcFps(self) -> float:
+        """Returns the mean frames per second over the window (0.0 if no frames have been timed)."""
+        total_time = sum(self.getFrameTimes()[slot] for slot in self.getWindowSlots())
+        if total_time == 0.0:
+            return 0.0
+        return len(self.getWindowSlots()) / total_time
+
+    def calcPercentiles(self, percentiles: tuple[int, ...] = (50, 95, 99)) -> list[float]:
+        """Returns the frame time (seconds) at each of percentiles, over the window."""
+        frame_times = sorted(self.getFrameTimes()[slot] for slot in self.getWindowSlots())
+        if not frame_times:
+            return [0.0 for _ in percentiles]
+        return [frame_times[min(len(frame_times) * percentile // 100, len(frame_times) - 1)]
+                for percentile in percentiles]
+
+    def calcPhaseMeans(self) -> dict[str, float]:
+        """Returns the mean time (seconds) of each phase per frame, over the window."""
+        slots = self.getWindowSlots()
+        return {phase: sum(phase_times[slot] for slot in slots) / max(len(slots), 1)
+                for phase, phase_times in self.getPhaseTimes().items()}
+
+    def getWorstFrames(self) -> list[tuple[float, str, float]]:
+        """Returns (frame time, slowest phase, slowest phase's time) of the NUM_WORST_FRAMES slowest frames
+        in the window, slowest first. Nested phases are preferred as the slowest phase, as they are more specific.
+        """
+        frame_times = self.getFrameTimes()
+        phase_times = self.getPhaseTimes()
+        worst_slots = sorted(self.getWindowSlots(), key=lambda slot: frame_times[slot],
+                             reverse=True)[:self.NUM_WORST_FRAMES]
+        worst_frames = []
+        for slot in worst_slots:
+            # Phases containing another phase are only counted for the time outside it.
+            leaf_times = {phase: phase_times[phase][slot] for phase in self.PHASES}
+            leaf_times['run'] -= leaf_times['update_display']
+            leaf_times['update_display'] -= leaf_times['sidebar']
+            slowest_phase = max(leaf_times, key=leaf_times.get)
+            worst_frames.append((frame_times[slot], slowest_phase, leaf_times[slowest_phase]))
+        return worst_frames
+
+    def updateSurf(self) -> None:
+        """Draws the current timings onto surf."""
+        font = self.getFont()
+        p50, p95, p99 = self.calcPercentiles()
+        lines = [f"FPS: {self.calcFps():.1f}   ({len(self.getWindowSlots())} frames)",
+                 f"Frame ms  p50 {p50*1000:.1f}  p95 {p95*1000:.1f}  p99 {p99*1000:.1f}",
+                 "Phase means (ms):"]
+        for phase, mean_time in self.calcPhaseMeans().items():
+            lines.append(f"  {phase}: {mean_time*1000:.2f}")
+        lines.append("Worst frames (ms):")
+        for frame_time, phase, phase_time in self.getWorstFrames():
+            lines.append(f"  {frame_time*1000:.1f}  ({phase} {phase_time*1000:.1f})")
+        surf = self.getSurf()
+        surf.fill((0, 0, 0, 180))
+        for pos, line in enumerate(lines):
+            surf.blit(font.render(line, True, (255, 255, 255)), (8, 6 + pos * 16))
@@ -10,6 +10,8 @@ from pygame.locals import *
 from sprites.character import Character
 from sprites.healthbar import Healthbar
 from typing import Optional
+from frame_profiler import FrameProfiler
+from metrics import METRICS
 
 load_assets()
 
@@ -25,6 +27,11 @@ class Game:
         clock (pygame.time.Clock): Clock to track framerate
         music1 (pygame.mixer.Sound): Happy music.
         music2 (pygame.mixer.Sound): Epic music.
+        frame_profiler (FrameProfiler): Times the phases of each frame. Its overlay is toggled
+            by FrameProfiler.TOGGLE_KEY (F3).
+
+        enemy_ai_budget_ms and animate_enemy_actions are passed to world_init and world_load,
+        to set up each GameWorld (see GameWorld).
 
         GameState instances:
         title_screen (TitleScreen): Title screen.
@@ -48,11 +55,14 @@ class Game:
     __game_over = None
     __music1 = None
     __music2 = None
+    __frame_profiler = None
 
     # Constructor
     def __init__(self, 
                  state: str, 
-                 is_running: bool):
+                 is_running: bool,
+                 enemy_ai_budget_ms: Optional[float] = GameWorld.DEFAULT_ENEMY_AI_BUDGET_MS,
+                 animate_enemy_actions: bool = False):
         self.setState(state)
         self.setIsRunning(is_running)
         self.setScreen(pygame.display.set_mode((1200, 768)))
@@ -60,9 +70,10 @@ class Game:
         self.setTitleScreen(TitleScreen())
         self.setGameMenu(GameMenu())
         self.setGameOver(GameOver())
-        self.setWorldInit(WorldInit())
-        self.setWorldLoad(WorldLoad())
+        self.setWorldInit(WorldInit(enemy_ai_budget_ms, animate_enemy_actions))
+        self.setWorldLoad(WorldLoad(enemy_ai_budget_ms, animate_enemy_actions))
         self.setGameWorld(None)
+        self.setFrameProfiler(FrameProfiler())
         self.setMusic1(pygame.mixer.Sound('music/epic song 1.wav'))
         self.setMusic2(pygame.mixer.Sound('music/more epic song.wav'))
         self.getMusic1().play(-1)
@@ -92,6 +103,8 @@ class Game:
         return self.__music1
     def getMusic2(self) -> pygame.mixer.Sound:
         return self.__music2
+    def getFrameProfiler(self) -> FrameProfiler:
+        return self.__frame_profiler
 
     # Setters
     def setScreen(self, screen):
@@ -118,21 +131,32 @@ class Game:
         self.__music1 = music1
     def setMusic2(self, music2):
         self.__music2 = music2
+    def setFrameProfiler(self, frame_profiler):
+        self.__frame_profiler = frame_profiler
 
     # Methods
     def runMainLoop(self) -> None:
         """
         Runs the main game loop
+
+        Each phase of a frame is timed by frame_profiler (while it is enabled).
         """
+        frame_profiler = self.getFrameProfiler()
         while self.getIsRunning() == True:
+            frame_profiler.beginFrame()
+            frame_profiler.startPhase('events')
             pygame_events = pygame.event.get()
             mouse_pos = pygame.mouse.get_pos()
-            # Event handler for if game is closed
+            frame_profiler.endPhase('events')
+            # Event handler for if game is closed, or the profiler overlay is toggled.
             for event in pygame_events: 
                 if event.type == QUIT:
                     self.setIsRunning(False)
+                elif event.type == KEYDOWN and event.key == FrameProfiler.TOGGLE_KEY:
+                    frame_profiler.toggle()
 
             # Runs corresponding function to state
+            frame_profiler.startPhase('run')
             state = self.getState()
             match state:
                 case 'title_screen':
@@ -151,13 +175,27 @@ class Game:
                     self.setIsRunning(False)
                 case _:
                     raise ValueError(f"State ({state}) is unknown")
+            frame_profiler.endPhase('run')
                 
             # Sends main_surf to display.
+            frame_profiler.startPhase('blit')
             screen = self.getScreen()
             screen.fill((255, 255, 255))
             screen.blit(main_surf, (0, 0))
+            if frame_profiler.getIsEnabled():
+                screen.blit(frame_profiler.getSurf(), (0, 0))
+            frame_profiler.endPhase('blit')
+            frame_profiler.startPhase('flip')
             pygame.display.flip()
+            frame_profiler.endPhase('flip')
             self.getClock().tick(60) # Keeps framerate constant at 60fps.
+        self.stopLevelTicker()
+        self.stopSaveWriter()
+        self.stopTelemetry()
+        try:
+            METRICS.dump() # Turn metrics of the session.
+        except OSError:
+            pass # The game still quits if metrics cannot be written.
         pygame.quit() # On loop end.
 
     def runTitleScreen(self, pygame_events: list[pygame.event.Event], mouse_pos: tuple[int, int]) -> pygame.Surface:
@@ -167,6 +205,11 @@ class Game:
         """
         title_screen = self.getTitleScreen()
         next_state = title_screen.run(pygame_events, mouse_pos)
+        # Passing the selected save slot to the game state that starts/loads the game.
+        if next_state == 'world_init':
+            self.getWorldInit().setSaveSlot(title_screen.getSelectedSlot())
+        elif next_state == 'world_load':
+            self.getWorldLoad().setSaveSlot(title_screen.getSelectedSlot())
         self.setState(next_state)
         return title_screen.getMainSurf()
     
@@ -183,7 +226,11 @@ class Game:
         next_state = world_init.run(pygame_events, mouse_pos)
         # Sets the instantiated GameWorld object if it exists.
         if next_state == 'game_world':
+            self.stopLevelTicker()
+            self.stopSaveWriter()
+            self.stopTelemetry()
             self.setGameWorld(world_init.getInitialisedGameWorld())
+            self.getWorldLoad().setSaveSlot(world_init.getSaveSlot()) # GameOver loads the new game's slot.
             pygame.mixer.stop()
             self.getMusic2().play(-1)
         self.setState(next_state)
@@ -193,9 +240,25 @@ class Game:
         """Loads GameWorld object from file. Immediately enters game_world state.
         
         Sets game_world attribute to be the loaded GameWorld object.
+        Stops the save writer of the previous GameWorld (if any) first, once its saves are written, 
+        so the last save is loaded.
+        If the save cannot be loaded, returns to the title screen, which shows the error.
         """
+        self.stopSaveWriter()
+        self.stopLevelTicker()
+        self.stopTelemetry()
         world_load = self.getWorldLoad()
         next_state = world_load.run()
+        # Returning to a re-initialised TitleScreen if the save could not be loaded.
+        if next_state == 'title_screen':
+            if self.getGameWorld() != None: # Loading after GameOver.
+                pygame.mixer.stop()
+                self.getMusic1().play(-1)
+            self.setGameWorld(None)
+            self.setTitleScreen(TitleScreen())
+            self.getTitleScreen().showLoadError(world_load.getSaveSlot())
+            self.setState(next_state)
+            return self.getTitleScreen().getMainSurf()
         # Sets the instantiated GameWorld object.
         self.setGameWorld(world_load.getInitialisedGameWorld())
         pygame.mixer.stop()
@@ -211,6 +274,7 @@ class Game:
         Returns surface to be blitted to screen.
         """
         game_world = self.getGameWorld()
+        game_world.setFrameProfiler(self.getFrameProfiler())
         next_state = game_world.run(pygame_events, mouse_pos)
         self.setState(next_state)
         return game_world.getMainSurf()
@@ -222,13 +286,38 @@ class Game:
         game_menu = self.getGameMenu()
         next_state = game_menu.run(pygame_events, mouse_pos)
         self.setState(next_state)
-        # Re-initialises TitleScreen if entered
+        # Re-initialises TitleScreen if entered (once the game's saves are written, so its slot headers are current).
         if next_state == 'title_screen':
+            if self.getGameWorld().getSaveWriter() != None:
+                self.getGameWorld().getSaveWriter().waitUntilWritten()
             self.setTitleScreen(TitleScreen())
             pygame.mixer.stop()
             self.getMusic1().play(-1)
         return game_menu.getMainSurf()
     
+    def stopLevelTicker(self) -> None:
+        """Stops the level ticker of game_world's level cache (if any), before it is replaced or the game quits,
+        so that the levels of previous worlds are not ticked.
+        """
+        game_world = self.getGameWorld()
+        if game_world != None and game_world.getLevelCache() != None:
+            level_ticker = game_world.getLevelCache().getLevelTicker()
+            if level_ticker != None:
+                level_ticker.stop()
+                level_ticker.reportTickMetrics()
+
+    def stopSaveWriter(self) -> None:
+        """Stops the save writer of game_world (if any) once its queued saves are written, 
+        before it is replaced or the game quits.
+        """
+        if self.getGameWorld() != None and self.getGameWorld().getSaveWriter() != None:
+            self.getGameWorld().getSaveWriter().stop()
+
+    def stopTelemetry(self) -> None:
+        """Flushes and stops the telemetry of game_world (if any), before it is replaced or the game quits."""
+        if self.getGameWorld() != None and self.getGameWorld().getTelemetry() != None:
+            self.getGameWorld().getTelemetry().stop()
+
     def runGameOver(self, 
                     pygame_events: list[pygame.event.Event]) -> pygame.Surface:
         """Run method for GameOver."""
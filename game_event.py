@@ -0,0 +1,116 @@
+from typing import Any
+
+class GameEvent:
+    """Class representing a game event (e.g. an attack, or tile damage) as a typed record.
+
+    An event is recorded as its kind and the values of the kind's fields. Values are names and numbers,
+    not the entities themselves, so that logged events (see CombatLog) do not keep entities alive.
+    The event's text is only formatted when it is displayed or exported (see format()).
+
+    Kinds (fields):
+        ATTACK (attacker, attack, target, by_character): An entity used an attack on another.
+            by_character is whether the attacker is the character.
+        DAMAGE (target, damage): An attack hit its target.
+        MISS (): An attack missed.
+        FAINT (target): An entity's health reached 0.
+        TILE_DAMAGE (target, damage, tile): An entity took damage from the tile it is on.
+        LEVEL_UP (health, strength, defence): The character levelled up, with the stat increases.
+        SPOTTED (enemy, weapon): An enemy of a newly entered level.
+        DIALOGUE (speaker, dialogue): An npc spoke to the character.
+        PORTAL_ENEMIES_REMAINING (): A portal was not entered, as enemies remain.
+        PORTAL_REQUIREMENT (requirement): A portal was not entered, as the character lacks its quest item.
+        PORTAL_ENTERED (): A portal was entered.
+        ITEM_ALREADY_OWNED (item): A quest item was not picked up, as the character has one.
+        ITEM_PICKED_UP (item): A quest item was picked up.
+        MESSAGE (text): Any other event (e.g. a save completing).
+
+    Attributes:
+        kind (str): Kind of the event.
+        values (tuple): Values of the kind's fields, in the order of FIELDS[kind].
+    """
+
+    ATTACK = 'attack'
+    DAMAGE = 'damage'
+    MISS = 'miss'
+    FAINT = 'faint'
+    TILE_DAMAGE = 'tile_damage'
+    LEVEL_UP = 'level_up'
+    SPOTTED = 'spotted'
+    DIALOGUE = 'dialogue'
+    PORTAL_ENEMIES_REMAINING = 'portal_enemies_remaining'
+    PORTAL_REQUIREMENT = 'portal_requirement'
+    PORTAL_ENTERED = 'portal_entered'
+    ITEM_ALREADY_OWNED = 'item_already_owned'
+    ITEM_PICKED_UP = 'item_picked_up'
+    MESSAGE = 'message'
+
+    FIELDS = {ATTACK: ('attacker', 'attack', 'target', 'by_character'),
+              DAMAGE: ('target', 'damage'),
+              MISS: (),
+              FAINT: ('target',),
+              TILE_DAMAGE: ('target', 'damage', 'tile'),
+              LEVEL_UP: ('health', 'strength', 'defence'),
+              SPOTTED: ('enemy', 'weapon'),
+              DIALOGUE: ('speaker', 'dialogue'),
+              PORTAL_ENEMIES_REMAINING: (),
+              PORTAL_REQUIREMENT: ('requirement',),
+              PORTAL_ENTERED: (),
+              ITEM_ALREADY_OWNED: ('item',),
+              ITEM_PICKED_UP: ('item',),
+              MESSAGE: ('text',)}
+    TEMPLATES = {ATTACK: "{attacker} used {attack} on {target}.",
+                 DAMAGE: "{target} took {damage} damage!",
+                 MISS: "The attack missed!",
+                 FAINT: "{target} fainted!",
+                 TILE_DAMAGE: "{target} took {damage} damage from a {tile} tile!",
+                 LEVEL_UP: "Level up! +{health} Health! +{strength} Strength! +{defence} Defence!",
+                 SPOTTED: "You spotted a {enemy} wielding a {weapon}",
+                 DIALOGUE: "{speaker} says: '{dialogue}'",
+                 PORTAL_ENEMIES_REMAINING: "You try to enter a portal, but there are still enemies remaining.",
+                 PORTAL_REQUIREMENT: "You need the {requirement} to enter this portal.",
+                 PORTAL_ENTERED: "You entered a portal! You are teleported.",
+                 ITEM_ALREADY_OWNED: "You already have a {item}. Leave some for other adventurers.",
+                 ITEM_PICKED_UP: "You picked up the {item}",
+                 MESSAGE: "{text}"}
+
+    # Attributes
+    __slots__ = ('__kind', '__values')
+
+    # Constructor
+    def __init__(self, kind: str, *values):
+        """Raises ValueError if kind is unknown, or values do not match the kind's fields."""
+        if kind not in self.FIELDS:
+            raise ValueError(f"Game event kind '{kind}' is unknown")
+        if len(values) != len(self.FIELDS[kind]):
+            raise ValueError(f"Game event kind '{kind}' has fields {self.FIELDS[kind]}, got {len(values)} values")
+        # Assigned directly, as an event is created for every action.
+        self.__kind = kind
+        self.__values = values
+
+    # Getters
+    def getKind(self) -> str:
+        return self.__kind
+    def getValues(self) -> tuple:
+        return self.__values
+
+    # Methods
+    def getField(self, field: str) -> Any:
+        """Returns the value of field. Raises ValueError if the event's kind has no such field."""
+        return self.__values[self.FIELDS[self.__kind].index(field)]
+
+    def toDict(self) -> dict[str, Any]:
+        """Returns {field: value} for each field of the event."""
+        return dict(zip(self.FIELDS[self.__kind], self.__values))
+
+    def format(self) -> str:
+        """Returns the text of the event."""
+        return self.TEMPLATES[self.__kind].format(**self.toDict())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameEvent) and (self.__kind, self.__values) == (other.getKind(), other.getValues())
+
+    def __hash__(self) -> int:
+        return hash((self.__kind, self.__values))
+
+    def __repr__(self) -> str:
+        return f"GameEvent({', '.join(repr(value) for value in (self.__kind, *self.__values))})"
@@ -1,19 +1,33 @@
 import pygame
+import random
 from game_states.game_state import GameState
 from assets import GAME_ASSETS
 from pygame.locals import *
 from sprites.enemy import Enemy
 from sprites.sidebar.sidebar import Sidebar
-from sprites.tile import Tile
+from sprites.tile import TileMap
 from sprites.board import Board
 from sprites.character import Character
 from level_initialiser import LevelInitialiser
-from typing import Optional, Any
-from sprites.active_entity import ActiveEntity
+from typing import Optional, Any, Generator
+from time import perf_counter
+from component_store import ComponentStore
 from sprites.portal import Portal
 from sprites.npc import Npc
 from sprites.entity import Entity
 from sprites.quest_item import QuestItem
+from camera import Camera
+from level_cache import LevelCache
+from turn_scheduler import TurnScheduler
+from save_slots import SaveSlots
+from save_writer import SaveWriter
+from turn_journal import TurnJournal
+from telemetry import Telemetry
+from frame_profiler import FrameProfiler
+from metrics import METRICS
+from game_event import GameEvent
+from combat_log import CombatLog
+from pathfinder import Pathfinder, CooperativePathfinder, IncrementalDistanceField
 
 class GameWorld(GameState):
     """Class representing the game world.
@@ -25,42 +39,117 @@ class GameWorld(GameState):
         level_name (str): Name of the current level
         internal_state (str): Current internal state: in ['main', 'attack_target_selection', 'game_over']
         character (Character): Character sprite controlled by player
-        board (Board): Board sprite - 12x12 grid of tiles.
+        board (Board): Board sprite - grid of tiles, of any size.
+        camera (Camera): Camera that follows the character, through which the board is viewed.
         npc_group (pygame.sprite.Group): Group containing all npc sprites 
         enemy_group (pygame.sprite.Group): Group containing all enemy sprites
         portal_group (pygame.sprite.Group): Group containing all portal sprites
         quest_item_group (pygame.sprite.Group): Group containing all quest item sprites
         num_enemies (int): The number of remaining enemies in enemy_group.
+        character_distance_field (IncrementalDistanceField): Distances from each tile to the 
+            character, used for enemy pathfinding. Repaired incrementally each turn.
+        pathfinder (Pathfinder): Pathfinder for the current level's board, which caches paths.
+        cooperative_enemy_movement (bool): Whether enemy movement is planned cooperatively 
+            each turn (with CooperativePathfinder), or each enemy searches independently (with pathfinder).
+        level_cache (Optional[LevelCache]): Keeps left levels resident, so that re-entering them keeps their state.
+            If None, levels are loaded from world_gen.txt every time they are entered.
+        turn_scheduler (TurnScheduler): Decides the order of the character's and enemies' actions.
+        turn_seed (Optional[int]): Seed of each level's turn_scheduler.
+        pending_turn (Optional[Generator[None, None, None]]): Resolution of the current turn after the 
+            character's action (enemy actions, then handleEndOfTurn()), resumed each frame. None if no turn is pending.
+        enemy_ai_budget_ms (Optional[float]): Milliseconds per frame spent resolving pending_turn.
+            If None, turns are resolved within the frame of the character's action.
+        animate_enemy_actions (bool): Whether pending_turn resolves one enemy action at a time,
+            ENEMY_ANIMATION_MS apart, so each enemy's action can be seen. Toggled by ANIMATION_TOGGLE_KEY (F4).
+        last_enemy_action_time (float): perf_counter() time of the last enemy action, when animating.
+        save_slot (int): Save slot the game is saved to (see SaveSlots).
+        save_writer (Optional[SaveWriter]): Writes saves on a background thread. 
+            If None, saves are written immediately.
+        turn_number (int): Number of turns the character has taken (saved with the game).
+        turn_journal (Optional[TurnJournal]): Journal of each turn since the last checkpoint, 
+            so that turns can be recovered after a crash. Each save is a checkpoint,
+            and one is taken every CHECKPOINT_INTERVAL turns.
+        telemetry (Optional[Telemetry]): Records each turn's events for balance analytics.
+            If None, no telemetry is recorded.
+        frame_profiler (Optional[FrameProfiler]): Times the phases of updateDisplay(). Set by Game.
 
         (Inherited)
         main_surf (pygame.Surface): Surface onto which all sprites in the game state are blitted. 
             Size: 1200 x 768
     """
 
+    ENEMY_ANIMATION_MS = 120
+    DEFAULT_ENEMY_AI_BUDGET_MS = 8.0
+    ANIMATION_TOGGLE_KEY = K_F4
+    CHECKPOINT_INTERVAL = 50
+
     # Attributes
     __sidebar = None
     __level_name = None
     __character = None
     __board = None
+    __camera = None
     __npc_group = None
     __enemy_group = None
     __portal_group = None
     __quest_item_group = None
     __internal_state = None
     __num_enemies = None
+    __character_distance_field = None
+    __pathfinder = None
+    __cooperative_enemy_movement = None
+    __level_cache = None
+    __turn_scheduler = None
+    __turn_seed = None
+    __pending_turn = None
+    __enemy_ai_budget_ms = None
+    __animate_enemy_actions = None
+    __last_enemy_action_time = None
+    __save_slot = None
+    __save_writer = None
+    __turn_number = None
+    __turn_journal = None
+    __telemetry = None
+    __frame_profiler = None
 
     # Constructor
     def __init__(self, 
                  level_name: str, 
-                 character: Character):
+                 character: Character,
+                 level_cache: Optional[LevelCache] = None,
+                 turn_seed: Optional[int] = None,
+                 enemy_ai_budget_ms: Optional[float] = DEFAULT_ENEMY_AI_BUDGET_MS,
+                 animate_enemy_actions: bool = False,
+                 save_slot: int = 0,
+                 save_writer: Optional[SaveWriter] = None,
+                 turn_number: int = 0,
+                 turn_journal: Optional[TurnJournal] = None,
+                 telemetry: Optional[Telemetry] = None,
+                 turn_state: Optional[dict[str, Any]] = None):
         super().__init__()
         self.setLevelName(level_name)
         self.setCharacter(character)
-        self.initialiseLevel()
+        self.setCooperativeEnemyMovement(True)
+        self.setLevelCache(level_cache)
+        self.setTurnSeed(turn_seed)
+        self.setPendingTurn(None)
+        self.setEnemyAiBudgetMs(enemy_ai_budget_ms)
+        self.setAnimateEnemyActions(animate_enemy_actions)
+        self.setLastEnemyActionTime(0.0)
+        self.setSaveSlot(save_slot)
+        self.setSaveWriter(save_writer)
+        self.setTurnNumber(turn_number)
+        self.setTurnJournal(None)
+        self.setTelemetry(telemetry)
+        self.setFrameProfiler(None)
+        self.initialiseLevel(turn_state)
         self.setInternalState('main')
         self.setSidebar(Sidebar(self.getCharacter().getWeapon().getAttackList()))
+        self.getSidebar().getDataDisplay().observeCharacter(self.getCharacter())
         self.updateSidebarInfo(list())
         self.updateDisplay()
+        if turn_journal != None:
+            self.startTurnJournal(turn_journal)
 
     # Getters
     def getSidebar(self) -> Sidebar:
@@ -71,6 +160,8 @@ class GameWorld(GameState):
         return self.__character
     def getBoard(self) -> Board:
         return self.__board
+    def getCamera(self) -> Camera:
+        return self.__camera
     def getNpcGroup(self) -> pygame.sprite.Group:
         return self.__npc_group
     def getEnemyGroup(self) -> pygame.sprite.Group:
@@ -83,6 +174,38 @@ class GameWorld(GameState):
         return self.__internal_state
     def getNumEnemies(self) -> int:
         return self.__num_enemies
+    def getCharacterDistanceField(self) -> IncrementalDistanceField:
+        return self.__character_distance_field
+    def getPathfinder(self) -> Pathfinder:
+        return self.__pathfinder
+    def getCooperativeEnemyMovement(self) -> bool:
+        return self.__cooperative_enemy_movement
+    def getLevelCache(self) -> Optional[LevelCache]:
+        return self.__level_cache
+    def getTurnScheduler(self) -> TurnScheduler:
+        return self.__turn_scheduler
+    def getTurnSeed(self) -> Optional[int]:
+        return self.__turn_seed
+    def getPendingTurn(self) -> Optional[Generator[None, None, None]]:
+        return self.__pending_turn
+    def getEnemyAiBudgetMs(self) -> Optional[float]:
+        return self.__enemy_ai_budget_ms
+    def getAnimateEnemyActions(self) -> bool:
+        return self.__animate_enemy_actions
+    def getLastEnemyActionTime(self) -> float:
+        return self.__last_enemy_action_time
+    def getSaveSlot(self) -> int:
+        return self.__save_slot
+    def getSaveWriter(self) -> Optional[SaveWriter]:
+        return self.__save_writer
+    def getTurnNumber(self) -> int:
+        return self.__turn_number
+    def getTurnJournal(self) -> Optional[TurnJournal]:
+        return self.__turn_journal
+    def getTelemetry(self) -> Optional[Telemetry]:
+        return self.__telemetry
+    def getFrameProfiler(self) -> Optional[FrameProfiler]:
+        return self.__frame_profiler
 
     # Setters
     def setSidebar(self, sidebar):
@@ -93,6 +216,8 @@ class GameWorld(GameState):
         self.__character = character
     def setBoard(self, board):
         self.__board = board
+    def setCamera(self, camera):
+        self.__camera = camera
     def setNpcGroup(self, npc_group):
         self.__npc_group = npc_group
     def setEnemyGroup(self, enemy_group):
@@ -105,6 +230,38 @@ class GameWorld(GameState):
         self.__internal_state = internal_state
     def setNumEnemies(self, num_enemies):
         self.__num_enemies = num_enemies
+    def setCharacterDistanceField(self, character_distance_field):
+        self.__character_distance_field = character_distance_field
+    def setPathfinder(self, pathfinder):
+        self.__pathfinder = pathfinder
+    def setCooperativeEnemyMovement(self, cooperative_enemy_movement):
+        self.__cooperative_enemy_movement = cooperative_enemy_movement
+    def setLevelCache(self, level_cache):
+        self.__level_cache = level_cache
+    def setTurnScheduler(self, turn_scheduler):
+        self.__turn_scheduler = turn_scheduler
+    def setTurnSeed(self, turn_seed):
+        self.__turn_seed = turn_seed
+    def setPendingTurn(self, pending_turn):
+        self.__pending_turn = pending_turn
+    def setEnemyAiBudgetMs(self, enemy_ai_budget_ms):
+        self.__enemy_ai_budget_ms = enemy_ai_budget_ms
+    def setAnimateEnemyActions(self, animate_enemy_actions):
+        self.__animate_enemy_actions = animate_enemy_actions
+    def setLastEnemyActionTime(self, last_enemy_action_time):
+        self.__last_enemy_action_time = last_enemy_action_time
+    def setSaveSlot(self, save_slot):
+        self.__save_slot = save_slot
+    def setSaveWriter(self, save_writer):
+        self.__save_writer = save_writer
+    def setTurnNumber(self, turn_number):
+        self.__turn_number = turn_number
+    def setTurnJournal(self, turn_journal):
+        self.__turn_journal = turn_journal
+    def setTelemetry(self, telemetry):
+        self.__telemetry = telemetry
+    def setFrameProfiler(self, frame_profiler):
+        self.__frame_profiler = frame_profiler
 
     # Methods
     def run(self, 
@@ -113,13 +270,15 @@ class GameWorld(GameState):
         """Main function for GameWorld game state.
 
         To be called each iteration of game loop, while state == "game_world".
-        Interprets user input and runs turns. Updates surfaces.
+        Interprets user input and starts turns. Continues resolving the pending turn. Updates surfaces.
         Returns the next state game is to enter.
         """
         # Interprets pygame events, and runs turns accordingly
         output = self.interpretUserInput(pygame_events, mouse_pos)
         if output == 'game_menu':
             return 'game_menu'
+        self.continuePendingTurn()
+        self.reportSaveEvents()
         self.updateDisplay()
         if self.getInternalState() == 'game_over':
             return 'game_over'
@@ -132,13 +291,19 @@ class GameWorld(GameState):
         """Interprets pygame_events, and runs methods accordingly.
 
         Returns 'game_menu' if ESC key pressed, else returns None.
+        Exports the combat log if the L key is pressed.
+        Toggles animate_enemy_actions if ANIMATION_TOGGLE_KEY is pressed.
         """
         key_presses = [event.key for event in pygame_events if event.type == KEYDOWN]
         mouse_presses = [event.button for event in pygame_events if event.type == MOUSEBUTTONDOWN]
         if K_ESCAPE in key_presses:
             return 'game_menu'
+        if self.ANIMATION_TOGGLE_KEY in key_presses:
+            self.setAnimateEnemyActions(not self.getAnimateEnemyActions())
         self.checkForActions(key_presses, mouse_presses, mouse_pos)
         self.checkSidebarInteraction(pygame_events, mouse_pos)
+        if K_l in key_presses:
+            self.exportCombatLog()
         return None
     
     def checkForActions(self, 
@@ -146,6 +311,7 @@ class GameWorld(GameState):
                         mouse_presses: list[int], 
                         mouse_pos: tuple[int, int]) -> None:
         """Checks if user has done an action, and runs a turn for each action.
+        No actions are taken while a turn is pending.
 
         If internal_state == 'main':
             Runs characterMoveAction() if the character has 
@@ -154,40 +320,46 @@ class GameWorld(GameState):
             Runs characterAttackAction() if the character has
             clicked an enemy on the board.
         """
+        if self.getPendingTurn() != None:
+            return
         if self.getInternalState() == 'main':
             key_to_direction = {K_UP: 'up',       K_DOWN: 'down', 
                                 K_RIGHT: 'right', K_LEFT: 'left'}
             # For each user keypress, checks if it triggers a movement.
             for key in key_presses:
-                if key in key_to_direction.keys():
+                if key in key_to_direction.keys() and self.getPendingTurn() == None:
                     self.characterMoveAction(key_to_direction[key])
         elif self.getInternalState() == 'attack_target_selection':
-            if 1 in mouse_presses: # Left mouse button.
-                # Locate the clicked enemy (if exists), and attacks it.
-                for enemy in self.getEnemyGroup():
-                    if enemy.getRect().collidepoint(mouse_pos): 
-                        self.characterAttackAction(enemy)
+            camera = self.getCamera()
+            # Left mouse button, within the board's viewport.
+            if 1 in mouse_presses and camera.getViewportRect().collidepoint(mouse_pos):
+                # Locate the clicked enemy (if exists) from the clicked tile, and attacks it.
+                clicked_entity = self.getBoard().getOccupantAtPos(camera.screenToBoardPos(mouse_pos))
+                if clicked_entity != None and self.getEnemyGroup().has(clicked_entity):
+                    self.characterAttackAction(clicked_entity)
         return
     
     def characterMoveAction(self, direction: str) -> None:
         """Handles a turn starting with a character movement.
 
-        Runs character moveOrInteract(). If the action was valid, then:
+        Runs character moveOrInteract(). If the action was valid, then
+        starts resolving the rest of the turn (see startTurnResolution()):
         - Run all enemy actions.
         - Run handleEndOfTurn().
         """
         character = self.getCharacter()
         coords_to_tile = self.getBoard().getCoordsToTile()
         num_enemies = self.getNumEnemies()
+        rng_seed = self.seedTurn()
         character_caused_event = character.moveOrInteract(direction, coords_to_tile, num_enemies)
         # If movement/interaction was valid, carries out rest of turn.
         if character_caused_event != False:
-            # all_events is all events caused by enemies.
-            # The character event is added to this list.
-            all_events = self.doEnemyActions()
+            self.recordTurn(rng_seed, ('move', direction))
+            # all_events is all events caused in the turn, starting with the character event.
+            all_events = []
             if character_caused_event != None:
-                all_events.insert(0, character_caused_event)
-            self.handleEndOfTurn(all_events)
+                all_events.append(character_caused_event)
+            self.startTurnResolution(all_events)
         return
 
     def characterAttackAction(self, target: Enemy) -> None:
@@ -195,13 +367,18 @@ class GameWorld(GameState):
 
         Runs character attack(). If the target was valid, then:
         - Carries out attack and subsequent processes.
+        - Starts resolving the rest of the turn (see startTurnResolution()):
         - Run all enemy actions.
         - Run handleEndOfTurn().
         """
         character = self.getCharacter()
+        attack_index = character.getWeapon().getAttackList().index(character.getSelectedAttack())
+        target_coords = (target.getXcoord(), target.getYcoord())
+        rng_seed = self.seedTurn()
         character_caused_events = character.attack(target)
         # If attack was valid, carries out rest of turn.
         if character_caused_events != False:
+            self.recordTurn(rng_seed, ('attack', attack_index, target_coords))
             all_events = []
             all_events.extend(character_caused_events)
             # Checks if character killed enemy. 
@@ -210,9 +387,7 @@ class GameWorld(GameState):
                 level_up_events = character.gainExp(target.getExpYield()) 
                 all_events.extend(level_up_events)
             self.handleAttackDeselection()
-            enemy_caused_events = self.doEnemyActions()
-            all_events.extend(enemy_caused_events)
-            self.handleEndOfTurn(all_events)
+            self.startTurnResolution(all_events)
         return
     
     def checkSidebarInteraction(self,
@@ -221,8 +396,8 @@ class GameWorld(GameState):
         """Checks if user has pressed any buttons in sidebar, 
         and runs subsequent functions.
         """
-        # Checking the attack button handlers for attack selection/deselection.
-        if self.getInternalState() == 'main':
+        # Checking the attack button handlers for attack selection/deselection (not while a turn is pending).
+        if self.getInternalState() == 'main' and self.getPendingTurn() == None:
             attack_buttons = self.getSidebar().getAttackButtons()
             # Getting the selected attack, if any.
             selected_attack_index = attack_buttons.getAttackSelected(pygame_events, mouse_pos)
@@ -237,21 +412,181 @@ class GameWorld(GameState):
         game_event_display.updatePage(pygame_events, mouse_pos)
         return
 
+    def seedTurn(self) -> Optional[int]:
+        """If turn_journal exists, seeds the random module with a new seed at the start of a turn, 
+        so that the turn can be replayed from its record. Returns the seed, or None.
+        """
+        if self.getTurnJournal() == None:
+            return None
+        rng_seed = random.getrandbits(32)
+        random.seed(rng_seed)
+        return rng_seed
+
+    def recordTurn(self, rng_seed: Optional[int], action: tuple) -> None:
+        """Counts a turn whose character action was valid, and appends it to turn_journal if it exists
+        (before the rest of the turn is resolved).
+        """
+        self.setTurnNumber(self.getTurnNumber() + 1)
+        if self.getTurnJournal() != None:
+            self.getTurnJournal().appendTurn(self.getTurnNumber(), rng_seed, action)
+
+    def replayTurns(self, turns: list[tuple[int, int, tuple]]) -> bool:
+        """Replays turns recorded by a TurnJournal, headlessly (each turn is resolved immediately, 
+        and nothing is drawn). Stops if the character dies.
+        Replayed turns are not recorded by telemetry, as they were recorded when first taken.
+
+        Returns False if a turn cannot be replayed, as its action is not valid in the replayed world 
+        (e.g. its attack target is not an enemy), which means the journal does not match the world.
+        Replaying stops at that turn, so the world is left partway through the journal.
+        """
+        telemetry = self.getTelemetry()
+        self.setTelemetry(None)
+        try:
+            for turn_number, rng_seed, action in turns:
+                if self.getInternalState() == 'game_over':
+                    return True
+                random.seed(rng_seed)
+                match action:
+                    case ('move', direction):
+                        self.characterMoveAction(direction)
+                    case ('attack', attack_index, target_coords):
+                        target_tile = self.getBoard().getCoordsToTile().get(target_coords)
+                        target = target_tile.getOccupiedBy() if target_tile != None else None
+                        if not isinstance(target, Enemy) or not self.getEnemyGroup().has(target):
+                            return False
+                        self.handleAttackSelection(attack_index)
+                        self.characterAttackAction(target)
+                self.finishPendingTurn()
+                # An invalid action does not count as a turn.
+                if self.getTurnNumber() != turn_number:
+                    return False
+            return True
+        finally:
+            self.setTelemetry(telemetry)
+
+    def recoverTurns(self, turn_journal: TurnJournal) -> bool:
+        """Recovers the turns journaled in turn_journal after the save this world was loaded from,
+        then takes a checkpoint and continues journaling to turn_journal.
+
+        Returns False (without journaling) if the journaled turns could not be replayed (see replayTurns()),
+        in which case this world is to be discarded for one loaded from the save again (see WorldLoad.run()).
+        """
+        if not self.replayTurns(turn_journal.readTurns(self.getTurnNumber())):
+            return False
+        self.startTurnJournal(turn_journal)
+        return True
+
+    def startTurnJournal(self, turn_journal: TurnJournal) -> None:
+        """Starts journaling turns to turn_journal, from a checkpoint taken now."""
+        self.setTurnJournal(turn_journal)
+        self.saveGame()
+
+    def startTurnResolution(self, events: list[GameEvent]) -> None:
+        """Starts resolving the rest of the turn after the character's action, as pending_turn.
+
+        events are the events caused so far in the turn.
+        If enemy_ai_budget_ms is None (and enemy actions are not animated), the turn is resolved immediately.
+        """
+        self.setPendingTurn(self.resolveTurn(events))
+        self.setLastEnemyActionTime(perf_counter())
+        if self.getEnemyAiBudgetMs() == None and not self.getAnimateEnemyActions():
+            self.finishPendingTurn()
+
+    def resolveTurn(self, events: list[GameEvent]) -> Generator[None, None, None]:
+        """Generator that resolves the rest of the turn, yielding after each enemy action.
+
+        Runs all enemy actions, adding their events to events, then handleEndOfTurn().
+        """
+        for enemy_caused_events in self.iterEnemyActions():
+            events.extend(enemy_caused_events)
+            yield
+        self.handleEndOfTurn(events)
+
+    def continuePendingTurn(self) -> None:
+        """Resumes pending_turn for at most enemy_ai_budget_ms (at least one step is always taken),
+        timing the frame's share of the turn as 'turn_resolution_frame' in METRICS.
+
+        If animate_enemy_actions, instead takes one step if ENEMY_ANIMATION_MS has passed since the last.
+        Sets pending_turn to None once the turn is resolved.
+        """
+        pending_turn = self.getPendingTurn()
+        if pending_turn == None:
+            return
+        start_time = perf_counter()
+        if self.getAnimateEnemyActions():
+            if (start_time - self.getLastEnemyActionTime()) * 1000 < self.ENEMY_ANIMATION_MS:
+                return
+            self.setLastEnemyActionTime(start_time)
+            if next(pending_turn, 'resolved') == 'resolved':
+                self.setPendingTurn(None)
+            return
+        budget_ms = self.getEnemyAiBudgetMs()
+        while True:
+            if next(pending_turn, 'resolved') == 'resolved':
+                self.setPendingTurn(None)
+                break
+            if budget_ms == None or (perf_counter() - start_time) * 1000 >= budget_ms:
+                break
+        METRICS.addTime('turn_resolution_frame', perf_counter() - start_time)
+
+    def finishPendingTurn(self) -> None:
+        """Resolves pending_turn completely, within the current frame."""
+        pending_turn = self.getPendingTurn()
+        if pending_turn != None:
+            for _ in pending_turn:
+                pass
+            self.setPendingTurn(None)
+
     def doEnemyActions(self) -> list[Optional[str]]:
-        """Handles the actions of all enemies on the board.
+        """Handles the actions of all enemies on the board, after the character has acted.
 
-        Runs action() method for each enemy in enemy_group.
         Returns a list of game events representing the actions by each enemy.
+        See iterEnemyActions().
         """
         enemy_caused_events = list()
-        coords_to_tile = self.getBoard().getCoordsToTile()
-        # Does enemy action for each enemy, and adds events to enemy_caused_events
-        for enemy in self.getEnemyGroup():
-            events = enemy.action(self.getCharacter(), coords_to_tile)
+        for events in self.iterEnemyActions():
             enemy_caused_events.extend(events)
         return enemy_caused_events
 
-    def handleEndOfTurn(self, events: list[str]) -> None:
+    def iterEnemyActions(self) -> Generator[list[GameEvent], None, None]:
+        """Generator that handles the actions of all enemies on the board, after the character has acted.
+        Yields the game events of each enemy action, so enemy actions can be resolved across frames.
+
+        Reschedules the character in turn_scheduler, then runs action() method for each enemy
+        scheduled to act before the character's next action, in turn order 
+        (an enemy may act more than once if it is faster than the character).
+        If cooperative_enemy_movement, enemy movement is planned by a single 
+        CooperativePathfinder (using the level's caching pathfinder), so that enemies do not 
+        obstruct each other's paths (a new one is used when an enemy acts again).
+        Else each enemy finds its own path with the level's (caching) pathfinder.
+        Each enemy action is timed (see Metrics).
+        """
+        coords_to_tile = self.getBoard().getCoordsToTile()
+        character = self.getCharacter()
+        turn_scheduler = self.getTurnScheduler()
+        turn_scheduler.completeAction(character)
+        cooperative_pathfinder = None
+        planned_enemies = set() # Enemies whose movement has been planned by cooperative_pathfinder.
+        # Does enemy action for each enemy, and yields its events.
+        while turn_scheduler.peekNextEntity() != character:
+            enemy = turn_scheduler.peekNextEntity()
+            if self.getCooperativeEnemyMovement() and (cooperative_pathfinder == None or enemy in planned_enemies):
+                character_distance_field = self.getCharacterDistanceField()
+                character_distance_field.update((character.getXcoord(), character.getYcoord()))
+                cooperative_pathfinder = CooperativePathfinder(coords_to_tile, character_distance_field, Enemy,
+                                                               next_hop_table=self.getBoard().getNextHopTable(),
+                                                               pathfinder=self.getPathfinder())
+                planned_enemies = set()
+            action_start = perf_counter()
+            events = enemy.action(character, coords_to_tile, cooperative_pathfinder, self.getPathfinder())
+            action_time = perf_counter() - action_start
+            METRICS.addTime('enemy_action', action_time)
+            METRICS.addTime(f"enemy_action.{enemy.getName()}", action_time)
+            planned_enemies.add(enemy)
+            turn_scheduler.completeAction(enemy)
+            yield events
+
+    def handleEndOfTurn(self, events: list[GameEvent]) -> None:
         """Handles all calculations at the end of a turn.
         
         - Computes tile damage for all entities currently on tile.
@@ -261,13 +596,17 @@ class GameWorld(GameState):
             If any enemy is dead, kill()s it.
         - Regenerates character
         - Updates the number of remaining enemies.
-        - If any portals have been activated, initialises the new level.
+        - If any portals have been activated, stores the current level (if level_cache exists)
+            and initialises the new level.
+        - Records the turn's events with telemetry (if it exists), and ends the turn's metrics.
         - Sends all information to Sidebar's GameEventDisplay and DataDisplay.
         """
+        level_name = self.getLevelName() # Level the turn was taken on, before any portal is entered.
         coords_to_tile = self.getBoard().getCoordsToTile()
         character = self.getCharacter()
         enemy_group = self.getEnemyGroup()
-        # Does tile damage to each entity.
+        # Sets the damage of timed hazards for this turn, then does tile damage to each entity.
+        self.getBoard().advanceTimedHazards(self.getTurnNumber())
         tile_damage_events = self.tileDamage(coords_to_tile)
         events.extend(tile_damage_events)
         # Removes all dead enemies from board that died to tile damage.
@@ -277,41 +616,53 @@ class GameWorld(GameState):
         # Checking for alive status of character.
         if not character.getIsAlive():
             self.setInternalState('game_over')
+            # The game is returned to the last save, without replaying the turns after it.
+            if self.getTurnJournal() != None:
+                self.getTurnJournal().clear()
         character.regenerate() # Regenerating character.
         self.setNumEnemies(len(self.getEnemyGroup())) # Setting number of enemies.
         # Checking for portal activation.
         for portal in self.getPortalGroup():
             if portal.getIsActivated():
+                if self.getLevelCache() != None:
+                    self.getLevelCache().storeLevel(self.getLevelName(), self.getLevelContents(), character)
                 self.setLevelName(portal.getDestination())
                 init_events = self.initialiseLevel()
                 events.extend(init_events)
+        # Taking a checkpoint every CHECKPOINT_INTERVAL turns, which bounds the turns replayed on recovery.
+        if (self.getTurnJournal() != None and self.getTurnNumber() % self.CHECKPOINT_INTERVAL == 0 
+            and self.getInternalState() != 'game_over'):
+            self.saveGame()
+        if self.getTelemetry() != None:
+            self.getTelemetry().recordTurn(self.getTurnNumber(), level_name, events)
+        if self.getLevelCache() != None and self.getLevelCache().getLevelTicker() != None:
+            self.getLevelCache().getLevelTicker().reportTickMetrics()
+        METRICS.endTurn(self.getTurnNumber(), level_name)
         # Updating Sidebar information.
         self.updateSidebarInfo(events)
 
     def removeEnemy(self, enemy: Enemy) -> None:
-        """Removes enemy from enemy_group and from board."""
+        """Removes enemy from enemy_group, from board and from turn_scheduler."""
         coords = (enemy.getXcoord(), enemy.getYcoord())
         coords_to_tile = self.getBoard().getCoordsToTile()
         coords_to_tile[coords].setOccupiedBy(None)
+        self.getTurnScheduler().removeEntity(enemy)
         enemy.kill()
     
     def tileDamage(self,
-                   coords_to_tile: dict[tuple[int, int], Tile]) -> list[str]:
-        """Computes tile damage for all tiles.
+                   coords_to_tile: TileMap) -> list[GameEvent]:
+        """Computes tile damage for all hazards (damaging tiles) occupied by entities with health.
         
         Returns a list of events caused.
         """
         events = []
-        for tile in coords_to_tile.values():
+        for _, tile in coords_to_tile.occupiedHazardItems(ComponentStore.HEALTH):
             tile_damage = tile.getDamage()
             occupying_entity = tile.getOccupiedBy()
-            # Checks that tile damage is nonzero, and a Character/Enemy is in the tile.
-            if tile_damage != 0 and isinstance(occupying_entity, ActiveEntity) == True:
-                damage_taken = occupying_entity.takeDamage(tile_damage)
-                events.append(f"{occupying_entity.getName()} took"
-                              f" {damage_taken} damage from a {tile.getName()} tile!")
-                if not occupying_entity.getIsAlive():
-                    events.append(f'{occupying_entity.getName()} fainted!')
+            damage_taken = occupying_entity.takeDamage(tile_damage)
+            events.append(GameEvent(GameEvent.TILE_DAMAGE, occupying_entity.getName(), damage_taken, tile.getName()))
+            if not occupying_entity.getIsAlive():
+                events.append(GameEvent(GameEvent.FAINT, occupying_entity.getName()))
         return events
 
     def handleAttackSelection(self, selected_attack_index: int) -> None:
@@ -343,56 +694,107 @@ class GameWorld(GameState):
         self.getCharacter().setEnemiesInRange([])
         return
 
-    def initialiseLevel(self) -> list[str]:
+    def initialiseLevel(self, turn_state: Optional[dict[str, Any]] = None) -> list[GameEvent]:
         """Initialises level contents based on level_name
         
         Sets the enemy/npc/portal/quest_item sprite groups, 
-        Board, and num_enemies_remaining.
+        Board, camera, num_enemies_remaining, character_distance_field, pathfinder and turn_scheduler.
+        Level contents are got from level_cache if it exists, else loaded from world_gen.txt.
+        The character is healed, unless the level is resumed from a save with its turn_state 
+        (see getTurnState()), which is restored instead (along with the state of the random module).
         Returns list of events representing the enemies spotted.
+        The level's loading is timed (see Metrics).
         """
-        level_contents = LevelInitialiser().getLevelContents(self.getLevelName(), self.getCharacter())
+        load_start = perf_counter()
+        if self.getCharacterDistanceField() != None:
+            self.getCharacterDistanceField().detach() # The previous level's board may be kept by level_cache.
+        if self.getLevelCache() != None:
+            level_contents = self.getLevelCache().getLevelContents(self.getLevelName(), self.getCharacter())
+        else:
+            level_contents = LevelInitialiser().getLevelContents(self.getLevelName(), self.getCharacter())
         board, enemy_group, npc_group, portal_group, quest_item_group = level_contents
         self.setBoard(board)
+        self.setCamera(Camera(pygame.Rect(0, 0, 768, 768), (board.getWidth(), board.getHeight())))
         self.setEnemyGroup(enemy_group)
         self.setNpcGroup(npc_group)
         self.setPortalGroup(portal_group)
         self.setQuestItemGroup(quest_item_group)
         self.setNumEnemies(len(enemy_group))
-        self.getCharacter().updateRect()
-        self.getCharacter().healToFull()
+        character = self.getCharacter()
+        self.setCharacterDistanceField(IncrementalDistanceField(board.getCoordsToTile(), (Npc, Portal, QuestItem),
+                                                                (character.getXcoord(), character.getYcoord())))
+        self.setPathfinder(Pathfinder(board))
+        turn_scheduler = TurnScheduler(self.getTurnSeed())
+        if turn_state != None:
+            turn_scheduler.loadState(turn_state['turn_scheduler'], [character] + enemy_group.sprites())
+            version, internal_state, gauss_next = turn_state['random_state']
+            random.setstate((version, tuple(internal_state), gauss_next))
+        else:
+            turn_scheduler.addEntity(character, initiative=-1.0)
+            for enemy in enemy_group:
+                turn_scheduler.addEntity(enemy)
+            character.healToFull()
+        self.setTurnScheduler(turn_scheduler)
         # Creating events for each enemy.
         events = []
         for enemy in self.getEnemyGroup():
-            events.append(f"You spotted a {enemy.getName()} wielding a {enemy.getWeapon().getName()}")
+            events.append(GameEvent(GameEvent.SPOTTED, enemy.getName(), enemy.getWeapon().getName()))
+        METRICS.addTime('level_load', perf_counter() - load_start)
         # Saving game if level is Dining Hall
         if self.getLevelName() == 'Dining Hall':
             self.saveGame()
         return events
     
-    def updateSidebarInfo(self, events: list[str]) -> None:
-        """Updates DataDisplay and GameEventDisplay."""
+    def getLevelContents(self) -> tuple[Board, pygame.sprite.Group, pygame.sprite.Group, 
+                                        pygame.sprite.Group, pygame.sprite.Group]:
+        """Returns tuple containing current level contents: 
+            (board, enemy group, npc group, portal group, quest item group).
+        """
+        return (self.getBoard(), self.getEnemyGroup(), self.getNpcGroup(), 
+                self.getPortalGroup(), self.getQuestItemGroup())
+
+    def updateSidebarInfo(self, events: list[GameEvent]) -> None:
+        """Updates DataDisplay and GameEventDisplay.
+
+        DataDisplay observes the character's stats itself, so is only given the level name,
+        number of enemies and upcoming turn order, and renders when the sidebar is next updated.
+        """
         data_display = self.getSidebar().getDataDisplay()
         game_event_display = self.getSidebar().getGameEventDisplay()
-        data_display.updateSurf(self.getCharacter(), self.getLevelName(),
-                                self.getNumEnemies())
-        game_event_display.updateEvents(events)
+        data_display.setLevelName(self.getLevelName())
+        data_display.setNumRemainingEnemies(self.getNumEnemies())
+        turn_order = self.getTurnScheduler().getTurnOrder(data_display.NUM_TURN_ORDER)
+        data_display.setTurnOrder([entity.getName() for entity in turn_order])
+        game_event_display.updateEvents(events, self.getTurnNumber())
 
     def updateDisplay(self) -> None:
         """Updates all surfaces and blits onto main_surf.
         
-        Updates the surfaces of sidebar and active entities.
+        Updates the surfaces of sidebar and active entities, if the data they display has changed.
         Highlights enemies in range of Character's attack.
-        Blits board, sidebar and entities onto main_surf.
+        Centres the camera on the character, and blits the visible part of the board
+        and the visible entities onto main_surf (within the camera's viewport), then the sidebar.
+        Times the 'update_display' and 'sidebar' phases with frame_profiler, if it exists.
         """
+        frame_profiler = self.getFrameProfiler()
+        if frame_profiler != None:
+            frame_profiler.startPhase('update_display')
         board = self.getBoard()
+        camera = self.getCamera()
         character = self.getCharacter()
         sidebar = self.getSidebar()
         main_surf = self.getMainSurf()
-        # Updating entity/sidebar surfaces.
-        character.updateSurf()
+        camera.follow(character.getXcoord(), character.getYcoord())
+        # Updating entity/sidebar surfaces (only for visible entities).
+        character.refreshSurf()
         for enemy in self.getEnemyGroup():
-            enemy.updateSurf()
+            if camera.isVisible(enemy.getRect()):
+                enemy.refreshSurf()
+        if frame_profiler != None:
+            frame_profiler.startPhase('sidebar')
         sidebar.updateSurf(self.getInternalState())
+        if frame_profiler != None:
+            frame_profiler.endPhase('sidebar')
         # Surfaces that highlight all enemies of character's selected attack.
         highlight_to_rect = {} # Dictionary mapping squares to their position.
         for enemy in character.getEnemiesInRange():
@@ -400,31 +802,121 @@ class GameWorld(GameState):
             square = pygame.Surface((64, 64), SRCALPHA)
             square.fill((255, 255, 0, 180))
             highlight_to_rect[square] = enemy.getRect()
-        # Blitting all surfaces onto main_surf.
+        # Blitting all surfaces onto main_surf. 
+        # Board and entities are clipped to the viewport, so they do not overlap the sidebar.
         main_surf.fill((0, 0, 0))
-        main_surf.blit(board.getSurf(), (0, 0))
-        main_surf.blit(sidebar.getSurf(), (768, 0))
-        main_surf.blit(character.getSurf(), character.getRect())
-        # All entities (npcs/enemies/portals/quest items)
+        main_surf.set_clip(camera.getViewportRect())
+        board.drawVisible(main_surf, camera)
+        main_surf.blit(character.getSurf(), camera.boardToScreenRect(character.getRect()))
+        # All visible entities (npcs/enemies/portals/quest items)
         for entity in (self.getNpcGroup().sprites() + self.getEnemyGroup().sprites() + 
                        self.getPortalGroup().sprites() + self.getQuestItemGroup().sprites()):
-            main_surf.blit(entity.getSurf(), entity.getRect())
+            if camera.isVisible(entity.getRect()):
+                main_surf.blit(entity.getSurf(), camera.boardToScreenRect(entity.getRect()))
         # Highlighted squares (in range of attack).
         for square in highlight_to_rect.keys():
-            main_surf.blit(square, highlight_to_rect[square])
+            main_surf.blit(square, camera.boardToScreenRect(highlight_to_rect[square]))
+        main_surf.set_clip(None)
+        main_surf.blit(sidebar.getSurf(), (768, 0))
+        if frame_profiler != None:
+            frame_profiler.endPhase('update_display')
         return
     
     def saveGame(self) -> None:
-        """Saves game to save file. To be run when entering Dining Hall."""
-        with open('gameinfostorage/save_info.txt', 'w') as file:
-            file.write(self.getLevelName() + '\n')
-            character_stats = self.getCharacter().getStats()
-            for stat in character_stats:
-                if isinstance(stat, int): # Numerical stats
-                    file.write(str(stat) + '\n')
-                elif isinstance(stat, str): # Weapon
-                    file.write(stat + '\n')
-                elif isinstance(stat, set): # Quest items.
-                    for item in stat:
-                        file.write(item + '\n')
+        """Saves game to save_slot, with a thumbnail. To be run when entering Dining Hall, and for checkpoints.
+        
+        If save_writer exists, a snapshot of the world (see getSaveInfo()) is queued to be written in the background.
+        If turn_journal exists, starts a new journal segment after the save, and discards 
+        the segments before it once it has been written.
+        """
+        save_writer = self.getSaveWriter()
+        turn_journal = self.getTurnJournal()
+        if save_writer != None:
+            save_writer.requestSave(self.getSaveSlot(), self.getSlotSaveInfo())
+            if turn_journal != None:
+                turn_journal.startSegment(self.getTurnNumber())
+        else:
+            SaveSlots().writeSlot(self.getSaveSlot(), self.getSlotSaveInfo())
+            if turn_journal != None:
+                turn_journal.startSegment(self.getTurnNumber())
+                turn_journal.discardBefore(self.getTurnNumber())
+
+    def getSlotSaveInfo(self) -> dict[str, Any]:
+        """Returns the save info to be written to save_slot: getSaveInfo(), with a thumbnail 
+        (see SaveSlots.writeSlot()).
+        """
+        save_info = self.getSaveInfo()
+        save_info['thumbnail'] = self.renderThumbnail()
+        return save_info
+
+    def renderThumbnail(self) -> bytes:
+        """Returns a thumbnail of the board around the character, as RGB bytes (see SaveSlots)."""
+        camera = self.getCamera()
+        character = self.getCharacter()
+        camera.follow(character.getXcoord(), character.getYcoord())
+        board_surf = pygame.Surface(camera.getViewportRect().size)
+        self.getBoard().drawVisible(board_surf, camera)
+        for entity in ([character] + self.getNpcGroup().sprites() + self.getEnemyGroup().sprites() + 
+                       self.getPortalGroup().sprites() + self.getQuestItemGroup().sprites()):
+            if camera.isVisible(entity.getRect()):
+                board_surf.blit(entity.getSurf(), camera.boardToScreenRect(entity.getRect()))
+        thumbnail = pygame.transform.smoothscale(board_surf, SaveSlots.THUMBNAIL_SIZE)
+        return pygame.image.tobytes(thumbnail, 'RGB')
+
+    def exportCombatLog(self) -> None:
+        """Exports the combat log of the GameEventDisplay (see CombatLog.export()),
+        and adds a game event reporting the outcome.
+        """
+        game_event_display = self.getSidebar().getGameEventDisplay()
+        try:
+            num_exported = game_event_display.getCombatLog().export()
+            event = GameEvent(GameEvent.MESSAGE, f"Exported {num_exported} events to {CombatLog.EXPORT_PATH}.")
+        except OSError as error:
+            event = GameEvent(GameEvent.MESSAGE, f"Combat log could not be exported: {error}")
+        game_event_display.addEvents([event], self.getTurnNumber())
+
+    def reportSaveEvents(self) -> None:
+        """Adds the events reported by save_writer (save completed/failed) to the GameEventDisplay.
+        Discards the journal segments before the last save written.
+        """
+        if self.getSaveWriter() != None:
+            events = self.getSaveWriter().collectReportedEvents()
+            if events:
+                self.getSidebar().getGameEventDisplay().addEvents(events, self.getTurnNumber())
+                written_turn_number = self.getSaveWriter().getWrittenTurnNumber()
+                if self.getTurnJournal() != None and written_turn_number != None:
+                    self.getTurnJournal().discardBefore(written_turn_number)
+
+    def getTurnState(self) -> dict[str, Any]:
+        """Returns the state of the current level's turns that is not kept by the level itself, 
+        to be saved with it (see WorldSave): {'turn_scheduler': see TurnScheduler.saveState(),
+        'random_state': state of the random module (see random.getstate())}.
+        Enemies are referred to by their order in enemy_group, which is kept by LevelCache.serializeLevel().
+        The random module's state makes the turns after the save draw the same seeds (see seedTurn()) 
+        and random numbers as they would have without loading.
+        """
+        entities = [self.getCharacter()] + self.getEnemyGroup().sprites()
+        return {'turn_scheduler': self.getTurnScheduler().saveState(entities), 'random_state': random.getstate()}
+
+    def getSaveInfo(self) -> dict[str, Any]:
+        """Returns the save info of the complete world state (see WorldSave).
+
+        Includes the current level (with the character on its board) and its turn state (see getTurnState()),
+        and every level kept by level_cache.
+        """
+        level_name = self.getLevelName()
+        character = self.getCharacter()
+        character_stats = character.getStats()
+        level_cache = self.getLevelCache()
+        levels = dict()
+        if level_cache != None:
+            levels.update(level_cache.getSavedLevels())
+            spawn_coords = level_cache.getSpawnCoords()[level_name]
+        else:
+            level_cache = LevelCache()
+            spawn_coords = (character.getXcoord(), character.getYcoord())
+        levels[level_name] = (spawn_coords, level_cache.serializeLevel(self.getLevelContents()))
+        return {'turn_number': self.getTurnNumber(), 'turn_state': self.getTurnState(),
+                'level_name': level_name, 'weapon_id': character_stats[7], 'stats': character_stats[:7],
+                'quest_items': frozenset(character_stats[8]), 'levels': levels}
             
\ No newline at end of file
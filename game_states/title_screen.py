@@ -1,18 +1,26 @@
+import time
 import pygame
 from game_states.game_state import GameState
 from pygame.locals import *
 from assets import GAME_ASSETS
 from sprites.button import Button
 from button_output_getter import ButtonOutputGetter
+from typing import Any, Optional
+from save_slots import SaveSlots
 
 class TitleScreen(GameState):
     """Class for title screen game state.
     
     Loaded when game is initialised, and from selecting Save and Exit from GameMenu.
+    Load Game opens a slot picker, listing the used save slots (see SaveSlots) from their headers only.
 
     Attributes:
         button_group (pygame.sprite.Group): Sprite group that contains buttons:
-            Includes new_game, quit and load_game
+            Includes new_game, quit and load_game, or a button for each used slot and back in the slot picker.
+        slot_headers (list[Optional[dict[str, Any]]]): Header of each save slot (None if unused).
+        selected_slot (Optional[int]): Save slot of the game to load/start, once selected.
+        is_picking_slot (bool): Whether the slot picker is shown.
+        message (Optional[str]): Message shown under the title (e.g. that a save is corrupted), if any.
         confirm_button_group (pygame.sprite.Group): Sprite group that contains
             confirmation button.
 
@@ -23,41 +31,77 @@ class TitleScreen(GameState):
 
     # Attributes
     __button_group = None 
+    __slot_headers = None
+    __selected_slot = None
+    __is_picking_slot = None
+    __message = None
 
     # Constructor
     def __init__(self):
         super().__init__()
+        self.setMessage(None)
+        self.loadSlotHeaders()
+        self.setSelectedSlot(None)
+        self.setIsPickingSlot(False)
         self.initialiseButtons()
         self.createSurf()
 
     # Getters
     def getButtonGroup(self) -> pygame.sprite.Group:
         return self.__button_group
+    def getSlotHeaders(self) -> list[Optional[dict[str, Any]]]:
+        return self.__slot_headers
+    def getSelectedSlot(self) -> Optional[int]:
+        return self.__selected_slot
+    def getIsPickingSlot(self) -> bool:
+        return self.__is_picking_slot
+    def getMessage(self) -> Optional[str]:
+        return self.__message
 
     # Setters
     def setButtonGroup(self, button_group):
         self.__button_group = button_group
+    def setSlotHeaders(self, slot_headers):
+        self.__slot_headers = slot_headers
+    def setSelectedSlot(self, selected_slot):
+        self.__selected_slot = selected_slot
+    def setIsPickingSlot(self, is_picking_slot):
+        self.__is_picking_slot = is_picking_slot
+    def setMessage(self, message):
+        self.__message = message
 
     # Methods
     def run(self, pygame_events: list[pygame.event.Event], mouse_pos: tuple[int, int]) -> str: 
         """
         Runs all functions associated with TitleScreen. To be called each iteration of game loop.
-        Returns the next state game is to enter: in [title_screen, game_world, exit]
+        Returns the next state game is to enter: in [title_screen, world_init, world_load, quit]
         """
-        button_outputs = ButtonOutputGetter().getOutputs(self.getButtonGroup(), pygame_events, mouse_pos) # Gets all button outputs
+        # Gets all button outputs
+        button_outputs = ButtonOutputGetter().getOutputs(self.getButtonGroup(), pygame_events, mouse_pos)
         # If there exists button output(s), interprets the first one in button_outputs.
         if button_outputs:
             button_output = button_outputs[0]
             match button_output:
                 case 'new_game': 
-                    # Checking for confirmation if a saved game exists.
-                    if self.savedGameExist():
+                    slot_headers = self.getSlotHeaders()
+                    self.setSelectedSlot(SaveSlots().findNewGameSlot(slot_headers))
+                    # Checking for confirmation if every slot is used (the least recently saved is overwritten).
+                    if slot_headers[self.getSelectedSlot()] != None:
                         self.createConfirmationButton()
                     else:
                         return 'world_init'
                 case 'confirm':
                     return 'world_init'
                 case 'load_game':
+                    self.setIsPickingSlot(True)
+                    self.initialiseSlotButtons()
+                    self.createSurf()
+                case 'back':
+                    self.setIsPickingSlot(False)
+                    self.initialiseButtons()
+                    self.createSurf()
+                case ('load_slot', slot):
+                    self.setSelectedSlot(slot)
                     return 'world_load'
                 case 'quit':
                     return 'quit'
@@ -66,6 +110,36 @@ class TitleScreen(GameState):
                 
         return 'title_screen'
             
+    def loadSlotHeaders(self) -> None:
+        """Reads the slot headers (see SaveSlots) into slot_headers.
+
+        If the index file does not exist, it is created (see SaveSlots.createIndex()), and a message is shown
+        if the save of previous versions could not be migrated.
+        If the index file is corrupted, it is rebuilt from the slots' save files, and a message is shown.
+        If it still cannot be read, every slot is shown as unused.
+        """
+        save_slots = SaveSlots()
+        try:
+            if not save_slots.hasIndex() and not save_slots.createIndex():
+                self.setMessage("Previous save corrupted - not migrated.")
+            slot_headers = save_slots.readHeaders()
+        except (ValueError, OSError):
+            self.setMessage("Save index corrupted - rebuilt from the saves.")
+            try:
+                save_slots.rebuildIndex()
+                slot_headers = save_slots.readHeaders()
+            except (ValueError, OSError):
+                self.setMessage("Save index corrupted.")
+                slot_headers = [None] * SaveSlots.NUM_SLOTS
+        self.setSlotHeaders(slot_headers)
+
+    def showLoadError(self, slot: int) -> None:
+        """Shows that the save in slot could not be loaded, with the title screen's buttons."""
+        self.setMessage(f"Save {slot + 1} corrupted.")
+        self.setIsPickingSlot(False)
+        self.initialiseButtons()
+        self.createSurf()
+
     def initialiseButtons(self) -> None:
         """Creates title screen buttons and adds them to button groups."""
         button_group = pygame.sprite.Group()
@@ -81,6 +155,25 @@ class TitleScreen(GameState):
         self.setButtonGroup(button_group)
         return
     
+    def initialiseSlotButtons(self) -> None:
+        """Creates a button for each used save slot (in a grid, by slot), and a back button, for the slot picker."""
+        button_group = pygame.sprite.Group()
+        for slot, slot_header in enumerate(self.getSlotHeaders()):
+            if slot_header != None:
+                slot_button = Button(pygame.Surface((256, 64)), slot_header['level_name'], 28,
+                                     (200, 200, 200), ('load_slot', slot), self.getSlotCentreCoords(slot, 110), 
+                                     str(slot + 1))
+                button_group.add(slot_button)
+        back_button = Button(pygame.Surface((200, 64)), 'Back', 32,
+                             (200, 100, 0), 'back', (600, 720), '0')
+        button_group.add(back_button)
+        self.setButtonGroup(button_group)
+        return
+
+    def getSlotCentreCoords(self, slot: int, yoffset: int = 0) -> tuple[int, int]:
+        """Returns the centre of the slot's thumbnail in the slot picker, offset downwards by yoffset."""
+        return (250 + (slot % 3) * 350, 220 + (slot // 3) * 270 + yoffset)
+
     def createConfirmationButton(self) -> None:
         """Creates a confirmation button if user presses New Game
         but has an existing save file.
@@ -104,15 +197,28 @@ class TitleScreen(GameState):
         title_text_rect = title_text.get_rect()
         title_text_rect.center = (600, 100)
         main_surf.blit(title_text, title_text_rect)
+        if self.getMessage() != None:
+            message_text = pygame.font.Font(None, 36).render(self.getMessage(), True, (200, 0, 0))
+            main_surf.blit(message_text, message_text.get_rect(center=(600, 165)))
+        # Blitting the thumbnail and details of each used slot (reading only their thumbnails).
+        if self.getIsPickingSlot():
+            save_slots = SaveSlots()
+            font = pygame.font.Font(None, 28)
+            for slot, slot_header in enumerate(self.getSlotHeaders()):
+                if slot_header == None:
+                    continue
+                thumbnail = save_slots.readThumbnail(slot_header)
+                if thumbnail != None:
+                    thumbnail = pygame.transform.scale(thumbnail, (144, 144))
+                    main_surf.blit(thumbnail, thumbnail.get_rect(center=self.getSlotCentreCoords(slot)))
+                saved_time = time.strftime('%d %b %H:%M', time.localtime(slot_header['timestamp']))
+                details_text = font.render(f"Level {slot_header['character_level']} - {saved_time}", True, (0,0,0))
+                main_surf.blit(details_text, details_text.get_rect(center=self.getSlotCentreCoords(slot, 160)))
         # Blitting buttons.
         for button in self.getButtonGroup():
             main_surf.blit(button.getSurf(), button.getRect())
     
     def savedGameExist(self) -> bool:
-        """Returns True/False for whether a saved gamefile exists."""
-        with open('gameinfostorage/save_info.txt', 'r') as file:
-            if file.readlines() == []:
-                return False
-            else:
-                return True
+        """Returns True/False for whether a saved game exists in any slot (from the slot headers)."""
+        return any(slot_header != None for slot_header in self.getSlotHeaders())
 
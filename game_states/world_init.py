@@ -4,8 +4,15 @@ from pygame.locals import *
 from assets import GAME_ASSETS
 from sprites.character import Character
 from game_states.game_world import GameWorld
+from level_cache import LevelCache
+from level_ticker import LevelTicker
+from save_writer import SaveWriter
+from turn_journal import TurnJournal
+from telemetry import Telemetry
+from save_slots import SaveSlots
 from button_output_getter import ButtonOutputGetter
 from sprites.button import Button
+from typing import Optional
 
 class WorldInit(GameState):
     """Class for world initialisation game state.
@@ -15,6 +22,9 @@ class WorldInit(GameState):
 
     Attributes:
         weapon_select_buttons (pygame.sprite.Group): Group containing buttons for weapon selection.
+        save_slot (int): Save slot the new game is saved to (see SaveSlots).
+        enemy_ai_budget_ms (Optional[float]): enemy_ai_budget_ms of the new GameWorld.
+        animate_enemy_actions (bool): animate_enemy_actions of the new GameWorld.
         initialised_game_world (Optional[GameWorld]): The GameWorld object (containing Character) 
             that is initialised as a result of running this gamestate.
 
@@ -24,24 +34,44 @@ class WorldInit(GameState):
     """
     # Attributes
     __weapon_select_buttons = None
+    __save_slot = None
+    __enemy_ai_budget_ms = None
+    __animate_enemy_actions = None
     __initialised_game_world = None
 
     # Constructor
-    def __init__(self):
+    def __init__(self,
+                 enemy_ai_budget_ms: Optional[float] = GameWorld.DEFAULT_ENEMY_AI_BUDGET_MS,
+                 animate_enemy_actions: bool = False):
         super().__init__()
         self.createButtons()
         self.createSurf()
+        self.setSaveSlot(0)
+        self.setEnemyAiBudgetMs(enemy_ai_budget_ms)
+        self.setAnimateEnemyActions(animate_enemy_actions)
         self.setInitialisedGameWorld(None)
 
     # Getters
     def getWeaponSelectButtons(self):
         return self.__weapon_select_buttons
+    def getSaveSlot(self) -> int:
+        return self.__save_slot
+    def getEnemyAiBudgetMs(self) -> Optional[float]:
+        return self.__enemy_ai_budget_ms
+    def getAnimateEnemyActions(self) -> bool:
+        return self.__animate_enemy_actions
     def getInitialisedGameWorld(self):
         return self.__initialised_game_world
 
     # Setters
     def setWeaponSelectButtons(self, weapon_select_buttons):
         self.__weapon_select_buttons = weapon_select_buttons
+    def setSaveSlot(self, save_slot):
+        self.__save_slot = save_slot
+    def setEnemyAiBudgetMs(self, enemy_ai_budget_ms):
+        self.__enemy_ai_budget_ms = enemy_ai_budget_ms
+    def setAnimateEnemyActions(self, animate_enemy_actions):
+        self.__animate_enemy_actions = animate_enemy_actions
     def setInitialisedGameWorld(self, initialised_game_world):
         self.__initialised_game_world = initialised_game_world
 
@@ -66,8 +96,17 @@ class WorldInit(GameState):
         return 'world_init'
 
     def instantiateGameWorld(self, character: Character) -> GameWorld:
-        """Instantiates and returns initial GameWorld object."""
-        game_world = GameWorld('Dining Hall', character)
+        """Instantiates and returns initial GameWorld object.
+        
+        Clears the turn journal of any previous game in save_slot.
+        """
+        turn_journal = TurnJournal(SaveSlots().getJournalDir(self.getSaveSlot()))
+        turn_journal.clear()
+        game_world = GameWorld('Dining Hall', character, LevelCache(level_ticker=LevelTicker()),
+                               enemy_ai_budget_ms=self.getEnemyAiBudgetMs(), 
+                               animate_enemy_actions=self.getAnimateEnemyActions(),
+                               save_slot=self.getSaveSlot(), save_writer=SaveWriter(), turn_journal=turn_journal,
+                               telemetry=Telemetry())
         return game_world
 
     def instantiateCharacter(self, weapon_id: str) -> Character:
@@ -3,16 +3,26 @@ from game_states.game_state import GameState
 from pygame.locals import *
 from assets import GAME_ASSETS
 from game_states.game_world import GameWorld
-from typing import Optional
+from level_cache import LevelCache
+from level_ticker import LevelTicker
+from save_writer import SaveWriter
+from telemetry import Telemetry
+from typing import Optional, Any
+from world_save import WorldSave
+from save_slots import SaveSlots
+from turn_journal import TurnJournal
 from sprites.character import Character
 
 class WorldLoad(GameState):
     """Class that represents the game state for loading world.
     
-    Instantiates GameWorld object from save file.
-    Loaded when Load Game is selected in TitleScreen.
+    Instantiates GameWorld object from the save file of save_slot.
+    Loaded when a save slot is selected in TitleScreen, and after GameOver.
 
     Attributes:
+        save_slot (int): Save slot to load (see SaveSlots).
+        enemy_ai_budget_ms (Optional[float]): enemy_ai_budget_ms of the loaded GameWorld.
+        animate_enemy_actions (bool): animate_enemy_actions of the loaded GameWorld.
         initialised_game_world (Optional[GameWorld]): The GameWorld object (containing Character) 
             that is initialised as a result of running this gamestate.
 
@@ -21,51 +31,93 @@ class WorldLoad(GameState):
             Size: 1200 x 768
     """
     # Attributes
+    __save_slot = None
+    __enemy_ai_budget_ms = None
+    __animate_enemy_actions = None
     __initialised_game_world = None
 
     # Constructor
-    def __init__(self):
+    def __init__(self,
+                 enemy_ai_budget_ms: Optional[float] = GameWorld.DEFAULT_ENEMY_AI_BUDGET_MS,
+                 animate_enemy_actions: bool = False):
         super().__init__()
+        self.setSaveSlot(0)
+        self.setEnemyAiBudgetMs(enemy_ai_budget_ms)
+        self.setAnimateEnemyActions(animate_enemy_actions)
         self.setInitialisedGameWorld(None)
 
     # Getters
+    def getSaveSlot(self) -> int:
+        return self.__save_slot
+    def getEnemyAiBudgetMs(self) -> Optional[float]:
+        return self.__enemy_ai_budget_ms
+    def getAnimateEnemyActions(self) -> bool:
+        return self.__animate_enemy_actions
     def getInitialisedGameWorld(self) -> Optional[GameWorld]:
         return self.__initialised_game_world
 
     # Setters
+    def setSaveSlot(self, save_slot):
+        self.__save_slot = save_slot
+    def setEnemyAiBudgetMs(self, enemy_ai_budget_ms):
+        self.__enemy_ai_budget_ms = enemy_ai_budget_ms
+    def setAnimateEnemyActions(self, animate_enemy_actions):
+        self.__animate_enemy_actions = animate_enemy_actions
     def setInitialisedGameWorld(self, initialised_game_world):
         self.__initialised_game_world = initialised_game_world
 
     def run(self) -> str:
         """Instantiates the GameWorld object from file, and sets as
         initialised_game_world attribute.
-        
-        Immediately returns 'game_world' to enter game world.
+
+        Turns journaled since the save are recovered (see GameWorld.recoverTurns()).
+        If they cannot be replayed, the world is loaded from the save again, and the journal is discarded.
+        Immediately returns 'game_world' to enter game world, 
+        or 'title_screen' if the save is corrupted or cannot be read (initialised_game_world is then None).
         """
-        with open('gameinfostorage/save_info.txt', 'r') as file:
-            file_lines = file.readlines()
-            self.interpretSaveInfo(file_lines)
+        save_slots = SaveSlots()
+        try:
+            save_info = WorldSave().readSave(save_slots.getSlotPath(self.getSaveSlot()))
+        except (ValueError, OSError):
+            self.setInitialisedGameWorld(None)
+            return 'title_screen'
+        self.interpretSaveInfo(save_info)
+        turn_journal = TurnJournal(save_slots.getJournalDir(self.getSaveSlot()))
+        # Replaying the turns journaled since the save, which also saves the recovered world.
+        if not self.getInitialisedGameWorld().recoverTurns(turn_journal):
+            self.discardGameWorld(self.getInitialisedGameWorld())
+            self.interpretSaveInfo(save_info)
+            turn_journal.clear()
+            self.getInitialisedGameWorld().startTurnJournal(turn_journal)
         return 'game_world'
+
+    def discardGameWorld(self, game_world: GameWorld) -> None:
+        """Discards a partially recovered game world: writes any saves it requested (so they are not 
+        written over later saves), and stops its background threads.
+        """
+        game_world.getSaveWriter().stop()
+        game_world.getTelemetry().stop()
+        if game_world.getLevelCache().getLevelTicker() != None:
+            game_world.getLevelCache().getLevelTicker().stop()
     
-    def interpretSaveInfo(self, file_lines: list[str]) -> GameWorld:
-        """Interprets save info and sets initialised_game_world object."""
-        level_name = file_lines[0].strip()
-        raw_character_stats = file_lines[1:8]
-        character_stats = [int(i.strip()) for i in raw_character_stats]
-        sth, dfn, hp, maxhp, hr, exp, lvl = character_stats
-        weapon_id = file_lines[8].strip()
-        # Creating set of quest items
-        character_quest_items = set()
-        items = file_lines[9:]
-        for i in items:
-            if i != None:
-                character_quest_items.add(i.strip())
+    def interpretSaveInfo(self, save_info: dict[str, Any]) -> GameWorld:
+        """Interprets save info (see WorldSave) and sets initialised_game_world object."""
+        sth, dfn, hp, maxhp, hr, exp, lvl = save_info['stats']
         # Creating Character object
         character_image = pygame.image.load(GAME_ASSETS['character'])
-        character = Character(character_image, 'Player', weapon_id,
+        character = Character(character_image, 'Player', save_info['weapon_id'],
                               sth, dfn, maxhp, hp, lvl, exp, hr)
-        character.setQuestItemNames(character_quest_items)
-        # Creating GameWorld and initialising level.
-        game_world = GameWorld(level_name, character)
-        game_world.initialiseLevel()
-        self.setInitialisedGameWorld(game_world)
\ No newline at end of file
+        character.setQuestItemNames(save_info['quest_items'])
+        # Restoring the saved levels, to be loaded when entered.
+        level_cache = LevelCache(level_ticker=LevelTicker())
+        for level_name, (spawn_coords, level_data) in save_info['levels'].items():
+            level_cache.addColdLevel(level_name, level_data, spawn_coords)
+        # Creating GameWorld, which initialises the level.
+        game_world = GameWorld(save_info['level_name'], character, level_cache, 
+                               enemy_ai_budget_ms=self.getEnemyAiBudgetMs(), 
+                               animate_enemy_actions=self.getAnimateEnemyActions(), 
+                               save_slot=self.getSaveSlot(), save_writer=SaveWriter(), 
+                               turn_number=save_info['turn_number'], telemetry=Telemetry(),
+                               turn_state=save_info['turn_state'])
+        self.setInitialisedGameWorld(game_world)
+        return game_world
@@ -0,0 +1,269 @@
+import os
+import json
+import zlib
+import pygame
+from collections import OrderedDict
+from typing import Optional
+from level_initialiser import LevelInitialiser
+from level_ticker import LevelTicker
+from sprites.board import Board
+from sprites.character import Character
+from sprites.enemy import Enemy
+from sprites.npc import Npc
+from sprites.portal import Portal
+from sprites.quest_item import QuestItem
+
+class LevelCache:
+    """Class that keeps recently left levels resident, so that re-entering a level
+    is instant and keeps its state (e.g. the positions and health of enemies).
+
+    Up to max_resident_levels levels are kept in memory, least recently used first.
+    When a level is evicted, it is serialized to a compressed file in cold_level_dir
+    (as level code in the format of world_gen.txt, along with the coords and health of each enemy, in order),
+    and is restored from this file when it is next entered.
+    Levels that have not been entered before are loaded from world_gen.txt.
+    If level_ticker exists, resident levels keep being simulated by it until they are entered or evicted.
+
+    Attributes:
+        resident_levels (OrderedDict[str, tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                                pygame.sprite.Group, pygame.sprite.Group]]):
+            Level contents of each resident level, by level name, least recently used first.
+        max_resident_levels (int): Maximum number of resident levels (not including the current level).
+        cold_level_dir (str): Directory to which evicted levels are serialized.
+        cold_level_names (set[str]): Names of levels that have been serialized to cold_level_dir.
+        spawn_coords (dict[str, tuple[int, int]]): Coords the character is placed on when entering each level.
+        level_ticker (Optional[LevelTicker]): Simulates resident levels in the background.
+    """
+
+    TILE_NAME_TO_TYPE = {'grass': 'G', 'wall': 'W', 'lava': 'L'}
+    ENTITY_CLASS_TO_TYPE = {Enemy: 'E', Npc: 'N', Portal: 'P', QuestItem: 'Q'}
+
+    # Attributes
+    __resident_levels = None
+    __max_resident_levels = None
+    __cold_level_dir = None
+    __cold_level_names = None
+    __spawn_coords = None
+    __level_ticker = None
+
+    # Constructor
+    def __init__(self,
+                 max_resident_levels: int = 4,
+                 cold_level_dir: str = 'gameinfostorage/cold_levels',
+                 level_ticker: Optional[LevelTicker] = None):
+        self.setResidentLevels(OrderedDict())
+        self.setMaxResidentLevels(max_resident_levels)
+        self.setColdLevelDir(cold_level_dir)
+        self.setColdLevelNames(set())
+        self.setSpawnCoords(dict())
+        self.setLevelTicker(level_ticker)
+
+    # Getters
+    def getResidentLevels(self) -> OrderedDict:
+        return self.__resident_levels
+    def getMaxResidentLevels(self) -> int:
+        return self.__max_resident_levels
+    def getColdLevelDir(self) -> str:
+        return self.__cold_level_dir
+    def getColdLevelNames(self) -> set[str]:
+        return self.__cold_level_names
+    def getSpawnCoords(self) -> dict[str, tuple[int, int]]:
+        return self.__spawn_coords
+    def getLevelTicker(self) -> Optional[LevelTicker]:
+        return self.__level_ticker
+
+    # Setters
+    def setResidentLevels(self, resident_levels):
+        self.__resident_levels = resident_levels
+    def setMaxResidentLevels(self, max_resident_levels):
+        self.__max_resident_levels = max_resident_levels
+    def setColdLevelDir(self, cold_level_dir):
+        self.__cold_level_dir = cold_level_dir
+    def setColdLevelNames(self, cold_level_names):
+        self.__cold_level_names = cold_level_names
+    def setSpawnCoords(self, spawn_coords):
+        self.__spawn_coords = spawn_coords
+    def setLevelTicker(self, level_ticker):
+        self.__level_ticker = level_ticker
+
+    # Methods
+    def getLevelContents(self,
+                         level_name: str,
+                         character: Character
+                         ) -> tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                    pygame.sprite.Group, pygame.sprite.Group]:
+        """Gets the contents of the level being entered, and places the character on its board.
+
+        The level is taken from resident_levels if it is resident, else restored from
+        cold_level_dir if it was evicted, else loaded from world_gen.txt.
+        Returns tuple containing level contents:
+            (board, enemy group, npc group, portal group, quest item group).
+        """
+        resident_levels = self.getResidentLevels()
+        if level_name in resident_levels:
+            level_contents = resident_levels.pop(level_name)
+            if self.getLevelTicker() != None:
+                self.getLevelTicker().removeLevel(level_name, level_contents[0])
+        elif level_name in self.getColdLevelNames():
+            with open(self.getColdLevelPath(level_name), 'rb') as file:
+                level_contents = self.deserializeLevel(file.read(), character)
+        else:
+            level_contents = LevelInitialiser().getLevelContents(level_name, character)
+            self.getSpawnCoords()[level_name] = (character.getXcoord(), character.getYcoord())
+            return level_contents
+        # A level restored from a save already has the character on its board.
+        character_tile = level_contents[0].getCoordsToTile().get((character.getXcoord(), character.getYcoord()))
+        if character_tile == None or character_tile.getOccupiedBy() != character:
+            self.placeCharacter(level_contents[0], character, self.getSpawnCoords()[level_name])
+        return level_contents
+
+    def storeLevel(self,
+                   level_name: str,
+                   level_contents: tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                         pygame.sprite.Group, pygame.sprite.Group],
+                   character: Character) -> None:
+        """Makes the level being left resident, as the most recently used level.
+
+        Removes the character from the level's board and deactivates its portals.
+        If level_ticker exists, starts simulating the level.
+        If there are more than max_resident_levels resident levels, evicts the least recently used.
+        """
+        board, enemy_group, npc_group, portal_group, quest_item_group = level_contents
+        character_tile = board.getCoordsToTile()[(character.getXcoord(), character.getYcoord())]
+        if character_tile.getOccupiedBy() == character:
+            character_tile.setOccupiedBy(None)
+        for portal in portal_group:
+            portal.setIsActivated(False)
+        resident_levels = self.getResidentLevels()
+        resident_levels[level_name] = level_contents
+        resident_levels.move_to_end(level_name)
+        if self.getLevelTicker() != None:
+            self.getLevelTicker().addLevel(level_name, level_contents, self.getSpawnCoords()[level_name])
+        while len(resident_levels) > self.getMaxResidentLevels():
+            self.evictLevel()
+
+    def evictLevel(self) -> None:
+        """Serializes the least recently used resident level to cold_level_dir,
+        and removes it from resident_levels.
+        """
+        level_name, level_contents = self.getResidentLevels().popitem(last=False)
+        if self.getLevelTicker() != None:
+            self.getLevelTicker().removeLevel(level_name, level_contents[0])
+        self.writeColdLevel(level_name, self.serializeLevel(level_contents))
+        self.getColdLevelNames().add(level_name)
+
+    def getSavedLevels(self) -> dict[str, tuple[tuple[int, int], bytes]]:
+        """Returns the spawn coords and serialized form of each resident and cold level, by level name.
+        To be used for saving the world.
+
+        Cold level files are read now, so the result is a complete snapshot which later evictions
+        (or other worlds using cold_level_dir) cannot change while it waits to be written (see SaveWriter).
+        If level_ticker exists, the simulated state of each resident level is merged into it before
+        it is serialized, and the level is then ticked again.
+        """
+        saved_levels = dict()
+        for level_name in self.getColdLevelNames():
+            with open(self.getColdLevelPath(level_name), 'rb') as file:
+                saved_levels[level_name] = (self.getSpawnCoords()[level_name], file.read())
+        level_ticker = self.getLevelTicker()
+        for level_name, level_contents in self.getResidentLevels().items():
+            spawn_coords = self.getSpawnCoords()[level_name]
+            if level_ticker != None:
+                level_ticker.removeLevel(level_name, level_contents[0])
+            saved_levels[level_name] = (spawn_coords, self.serializeLevel(level_contents))
+            if level_ticker != None:
+                level_ticker.addLevel(level_name, level_contents, spawn_coords)
+        return saved_levels
+
+    def addColdLevel(self,
+                     level_name: str,
+                     data: bytes,
+                     spawn_coords: tuple[int, int]) -> None:
+        """Adds a level from its serialized form (e.g. from a save), to be restored when it is entered."""
+        self.writeColdLevel(level_name, data)
+        self.getColdLevelNames().add(level_name)
+        self.getSpawnCoords()[level_name] = spawn_coords
+
+    def writeColdLevel(self, level_name: str, data: bytes) -> None:
+        """Writes the serialized level to its file in cold_level_dir, replacing the file atomically."""
+        os.makedirs(self.getColdLevelDir(), exist_ok=True)
+        cold_level_path = self.getColdLevelPath(level_name)
+        with open(cold_level_path + '.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(cold_level_path + '.tmp', cold_level_path)
+
+    def getColdLevelPath(self, level_name: str) -> str:
+        """Returns the path of the file that the level is serialized to."""
+        file_name = ''.join(char if char.isalnum() else '_' for char in level_name)
+        return os.path.join(self.getColdLevelDir(), file_name + '.lvl')
+
+    def serializeLevel(self,
+                       level_contents: tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                             pygame.sprite.Group, pygame.sprite.Group]) -> bytes:
+        """Returns the compressed serialized form of the level.
+
+        Consists of the level's tile info (as in LevelInitialiser.parseLevelCode(), including the character
+        if it is on the board, e.g. for the current level of a save) and each enemy as (xcoord, ycoord, health),
+        in the order of the enemy group (which is their turn order when the level is entered).
+        """
+        board, enemy_group = level_contents[0], level_contents[1]
+        tile_info_list = []
+        for coords, tile in board.getCoordsToTile().items():
+            occupied_by = tile.getOccupiedBy()
+            entity_type = self.ENTITY_CLASS_TO_TYPE.get(type(occupied_by))
+            if isinstance(occupied_by, Character):
+                tile_code = f"{self.TILE_NAME_TO_TYPE[tile.getName()]}_C_00"
+            elif entity_type != None:
+                tile_code = f"{self.TILE_NAME_TO_TYPE[tile.getName()]}_{entity_type}_{occupied_by.getId()}"
+            else:
+                tile_code = f"{self.TILE_NAME_TO_TYPE[tile.getName()]}_0_00"
+            tile_info_list.append((tile_code, coords[0], coords[1]))
+        enemy_list = [(enemy.getXcoord(), enemy.getYcoord(), enemy.getHealth()) for enemy in enemy_group]
+        level_info = {'tiles': tile_info_list, 'enemies': enemy_list}
+        return zlib.compress(json.dumps(level_info, separators=(',', ':')).encode())
+
+    def deserializeLevel(self,
+                         data: bytes,
+                         character: Character
+                         ) -> tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                    pygame.sprite.Group, pygame.sprite.Group]:
+        """Returns the level contents restored from the output of serializeLevel(),
+        with the enemy group in its serialized order.
+        """
+        level_info = json.loads(zlib.decompress(data).decode())
+        tile_info_list = [(tile_code, xcoord, ycoord) for tile_code, xcoord, ycoord in level_info['tiles']]
+        level_initialiser = LevelInitialiser()
+        level_contents = level_initialiser.interpretTileInfo(tile_info_list, character, require_character=False)
+        level_initialiser.prepareBoard(level_contents[0])
+        enemy_group = level_contents[1]
+        coords_to_enemy = {(enemy.getXcoord(), enemy.getYcoord()): enemy for enemy in enemy_group}
+        enemy_group.empty()
+        for xcoord, ycoord, health in level_info['enemies']:
+            enemy = coords_to_enemy[(xcoord, ycoord)]
+            enemy.setHealth(health)
+            enemy_group.add(enemy)
+        return level_contents
+
+    def placeCharacter(self,
+                       board: Board,
+                       character: Character,
+                       spawn_coords: tuple[int, int]) -> None:
+        """Places the character on the unoccupied accessible tile nearest to spawn_coords
+        (spawn_coords itself, unless e.g. an enemy has moved onto it).
+        """
+        coords_to_tile = board.getCoordsToTile()
+        # Breadth first search outwards from spawn_coords.
+        queue, visited = [spawn_coords], {spawn_coords}
+        for coords in queue:
+            tile = coords_to_tile[coords]
+            if tile.getAccessible() and tile.getOccupiedBy() == None:
+                character.setXcoord(coords[0])
+                character.setYcoord(coords[1])
+                tile.setOccupiedBy(character)
+                return
+            for offset in ((1, 0), (-1, 0), (0, -1), (0, 1)):
+                neighbour_coords = (coords[0] + offset[0], coords[1] + offset[1])
+                if neighbour_coords in coords_to_tile and neighbour_coords not in visited:
+                    visited.add(neighbour_coords)
+                    queue.append(neighbour_coords)
+        raise ValueError("There is no unoccupied tile to place the character on.")
@@ -1,5 +1,4 @@
 import pygame
-from sprites.tile import Tile
 from sprites.enemy import Enemy
 from sprites.npc import Npc
 from sprites.portal import Portal
@@ -19,19 +18,28 @@ class LevelInitialiser:
                                     pygame.sprite.Group, pygame.sprite.Group]:
         """
         Main method for getting the level's board and entities.
-        Parses the level code, gets Board and entity sprite groups, and draws board surface.
+        Parses the level code, gets Board and entity sprite groups, initialises the board's chunks,
+        and precomputes the board's next-hop table.
         Returns tuple containing level contents: 
             (board, enemy group, npc group, portal group, quest item group).
         """
         tile_info_list = self.parseLevelCode(level_name)
         level_contents = self.interpretTileInfo(tile_info_list, character)
-        board = level_contents[0]
-        board.drawBoardSurface()
+        self.prepareBoard(level_contents[0])
         return level_contents
 
+    def prepareBoard(self, board: Board) -> None:
+        """Initialises the board's chunks and precomputes its next-hop table.
+        To be run once the board's tiles are added.
+        """
+        board.initialiseChunks()
+        board.buildNextHopTable()
+
     def parseLevelCode(self, level_name: str) -> list[tuple[str, int, int]]:
         """
         Find the level code in world_gen.txt, and gets its information.
+        The level code is every line after the marker, up to the next blank line, marker, 
+        or the end of the file, so levels may be any width and height.
         Returns list of tuples each representing a tile's info in form: 
             (tile_code, xcoord, ycoord), where tile_code is a string of form 'X_X_XX'
             representing {tile_type}_{entity_type}_{entity_id}.
@@ -43,8 +51,13 @@ class LevelInitialiser:
             for pos, line in enumerate(file_lines):
                 if str_to_find in line:
                     starting_pos = pos + 1 # position of line at which level code starts
-                    # Splits the 12x12 grid code into level_info.
-                    level_code_lines = [file_lines[starting_pos + i] for i in range(12)] # The lines which contain the code.
+                    # Finds the lines which contain the code.
+                    level_code_lines = []
+                    for code_line in file_lines[starting_pos:]:
+                        if code_line.strip() == '' or code_line.startswith('!!'):
+                            break
+                        level_code_lines.append(code_line)
+                    # Splits the grid code into level_info.
                     tile_info_list = [(tile_code, int(xcoord), int(ycoord)) 
                                       for ycoord, code_line in enumerate(level_code_lines) 
                                       for xcoord, tile_code in enumerate(code_line.split())]
@@ -54,21 +67,26 @@ class LevelInitialiser:
 
     def interpretTileInfo(self, 
                           tile_info_list: list[tuple[str, int, int]],
-                          character: Character
+                          character: Character,
+                          require_character: bool = True
                           ) -> tuple[Board, pygame.sprite.Group, pygame.sprite.Group, 
                                      pygame.sprite.Group, pygame.sprite.Group]:
         """
         Interprets the list of tuples representing tile information.
 
         Iterates through the list of tuples, and using this:
-            - Creates Board object, and fills its coords_to_tile dict.
+            - Creates Board object sized to fit the tiles, and fills its grids.
             - Locates Character's coordinates, and sets them.
             - Creates and fills the sprite groups for the different entities.
+        If require_character, the character must be on exactly one tile.
+        Else (e.g. for a level restored by LevelCache) the character may not be on any tile.
 
         Returns a tuple containing the board, enemy sprite group, 
         npc sprite group and portal sprite group.
         """
         board = Board()
+        board.initialiseGrids(max([tile_info[1] for tile_info in tile_info_list], default=-1) + 1,
+                              max([tile_info[2] for tile_info in tile_info_list], default=-1) + 1)
         enemy_group, npc_group = pygame.sprite.Group(), pygame.sprite.Group()
         portal_group, quest_item_group = pygame.sprite.Group(), pygame.sprite.Group()
         num_located_character = 0 # Number of times character has been located.
@@ -84,7 +102,7 @@ class LevelInitialiser:
             if isinstance(entity_on_tile, Character):
                 num_located_character += 1
 
-        if num_located_character != 1:
+        if num_located_character != 1 and (require_character or num_located_character != 0):
             raise ValueError(f"Character exists on {num_located_character} tiles.")
         return board, enemy_group, npc_group, portal_group, quest_item_group
 
@@ -131,17 +149,15 @@ class LevelInitialiser:
 
     def addTileToBoard(self, board: Board, tile_type: str, entity: Optional[Entity], 
                        xcoord: int, ycoord: int) -> None:
-        """Adds a tile to Board's coord_to_tile dictionary."""
-        coords_to_tile = board.getCoordsToTile()
+        """Adds a tile to Board's grids."""
         match tile_type:
             case 'G':
-                tile = Tile('grass', (123, 245, 10), True, entity)
+                tile_type_index = 0 # grass
             case 'W':
-                tile = Tile('wall', (77, 77, 77), False, entity)
+                tile_type_index = 1 # wall
             case 'L':
-                tile = Tile('lava', (209, 23, 23), True, entity, 10)
+                tile_type_index = 2 # lava
             case _:
                 raise ValueError(f"Tile type ({tile_type}) is unknown.")
-        coords_to_tile[(xcoord, ycoord)] = tile
-        board.setCoordsToTile(coords_to_tile)
-        return
\ No newline at end of file
+        board.addTile((xcoord, ycoord), tile_type_index, entity)
+        return
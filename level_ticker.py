@@ -0,0 +1,328 @@
+import pygame
+import threading
+from time import perf_counter
+from collections import OrderedDict
+from typing import Optional
+from sprites.board import Board
+from sprites.enemy import Enemy
+from sprites.npc import Npc
+from sprites.portal import Portal
+from sprites.quest_item import QuestItem
+from metrics import METRICS
+
+class HeadlessLevel:
+    """Class representing a non-active level, simulated without the character or any surfaces.
+
+    Created from a level's contents when the level is left, and ticked on LevelTicker's worker thread.
+    Ticks only change enemy_states, which are merged back into the level's sprites by apply()
+    when the level is next entered. The headless turn rules are:
+        - Enemies with 'direct' movement move one tile per tick towards spawn_coords
+            (where the character will be placed on return), stopping MIN_SPAWN_DISTANCE tiles away.
+        - Enemies on damaging tiles take tile damage, and are removed if they faint.
+
+    Attributes:
+        enemies (list[Enemy]): Enemies of the level. Only to be used on the main thread.
+        enemy_states (list[list[int]]): [xcoord, ycoord, health] of each enemy in enemies.
+        moves_to_spawn (list[bool]): Whether each enemy in enemies moves.
+        tile_damage_taken (list[dict[int, int]]): Damage taken by each enemy in enemies, by tile damage.
+        passable_coords (set[tuple[int, int]]): Coords of accessible tiles without npcs/portals/quest items.
+        tile_damage (dict[tuple[int, int], int]): Damage of each damaging tile, by coords.
+        spawn_coords (tuple[int, int]): Coords the character is placed on when entering the level.
+        spawn_distances (Optional[dict[tuple[int, int], int]]): Distance from each passable tile to
+            spawn_coords. Computed on the first tick.
+        num_ticks (int): Number of ticks simulated since the level was left.
+    """
+
+    MIN_SPAWN_DISTANCE = 2
+
+    # Attributes
+    __enemies = None
+    __enemy_states = None
+    __moves_to_spawn = None
+    __tile_damage_taken = None
+    __passable_coords = None
+    __tile_damage = None
+    __spawn_coords = None
+    __spawn_distances = None
+    __num_ticks = None
+
+    # Constructor
+    def __init__(self,
+                 level_contents: tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                       pygame.sprite.Group, pygame.sprite.Group],
+                 spawn_coords: tuple[int, int]):
+        board, enemy_group = level_contents[0], level_contents[1]
+        coords_to_tile = board.getCoordsToTile()
+        enemies = enemy_group.sprites()
+        tile_damage = {board.getIndexCoords(index): board.getDamageAt(index) for index in board.getHazardIndices()}
+        self.setEnemies(enemies)
+        self.setEnemyStates([[enemy.getXcoord(), enemy.getYcoord(), enemy.getHealth()] for enemy in enemies])
+        self.setMovesToSpawn([enemy.getMovementPattern() == 'direct' for enemy in enemies])
+        self.setTileDamageTaken([{damage: enemy.calcDamageTaken(damage) for damage in set(tile_damage.values())}
+                                 for enemy in enemies])
+        self.setPassableCoords({coords for coords, tile in coords_to_tile.items()
+                                if tile.getAccessible() and
+                                not isinstance(tile.getOccupiedBy(), (Npc, Portal, QuestItem))})
+        self.setTileDamage(tile_damage)
+        self.setSpawnCoords(spawn_coords)
+        self.setSpawnDistances(None)
+        self.setNumTicks(0)
+
+    # Getters
+    def getEnemies(self) -> list[Enemy]:
+        return self.__enemies
+    def getEnemyStates(self) -> list[list[int]]:
+        return self.__enemy_states
+    def getMovesToSpawn(self) -> list[bool]:
+        return self.__moves_to_spawn
+    def getTileDamageTaken(self) -> list[dict[int, int]]:
+        return self.__tile_damage_taken
+    def getPassableCoords(self) -> set[tuple[int, int]]:
+        return self.__passable_coords
+    def getTileDamage(self) -> dict[tuple[int, int], int]:
+        return self.__tile_damage
+    def getSpawnCoords(self) -> tuple[int, int]:
+        return self.__spawn_coords
+    def getSpawnDistances(self) -> Optional[dict[tuple[int, int], int]]:
+        return self.__spawn_distances
+    def getNumTicks(self) -> int:
+        return self.__num_ticks
+
+    # Setters
+    def setEnemies(self, enemies):
+        self.__enemies = enemies
+    def setEnemyStates(self, enemy_states):
+        self.__enemy_states = enemy_states
+    def setMovesToSpawn(self, moves_to_spawn):
+        self.__moves_to_spawn = moves_to_spawn
+    def setTileDamageTaken(self, tile_damage_taken):
+        self.__tile_damage_taken = tile_damage_taken
+    def setPassableCoords(self, passable_coords):
+        self.__passable_coords = passable_coords
+    def setTileDamage(self, tile_damage):
+        self.__tile_damage = tile_damage
+    def setSpawnCoords(self, spawn_coords):
+        self.__spawn_coords = spawn_coords
+    def setSpawnDistances(self, spawn_distances):
+        self.__spawn_distances = spawn_distances
+    def setNumTicks(self, num_ticks):
+        self.__num_ticks = num_ticks
+
+    # Methods
+    def tick(self) -> None:
+        """Simulates one turn of the level, using the headless turn rules."""
+        if self.getSpawnDistances() == None:
+            self.calcSpawnDistances()
+        spawn_distances = self.getSpawnDistances()
+        tile_damage = self.getTileDamage()
+        enemy_states = self.getEnemyStates()
+        occupied_coords = {(state[0], state[1]) for state in enemy_states if state[2] > 0}
+        for enemy_index, state in enumerate(enemy_states):
+            if state[2] <= 0: # Fainted enemy.
+                continue
+            coords = (state[0], state[1])
+            # Moving towards spawn_coords.
+            distance = spawn_distances.get(coords)
+            if self.getMovesToSpawn()[enemy_index] and distance != None and distance > self.MIN_SPAWN_DISTANCE:
+                for offset in ((1, 0), (-1, 0), (0, -1), (0, 1)):
+                    neighbour_coords = (coords[0] + offset[0], coords[1] + offset[1])
+                    if (spawn_distances.get(neighbour_coords) == distance - 1 and
+                            neighbour_coords not in occupied_coords):
+                        occupied_coords.remove(coords)
+                        occupied_coords.add(neighbour_coords)
+                        coords = neighbour_coords
+                        state[0], state[1] = coords
+                        break
+            # Taking tile damage.
+            if coords in tile_damage:
+                state[2] = max(0, state[2] - self.getTileDamageTaken()[enemy_index][tile_damage[coords]])
+                if state[2] == 0:
+                    occupied_coords.remove(coords)
+        self.setNumTicks(self.getNumTicks() + 1)
+
+    def calcSpawnDistances(self) -> None:
+        """Sets spawn_distances, using a breadth first search from spawn_coords over passable_coords."""
+        passable_coords = self.getPassableCoords()
+        spawn_coords = self.getSpawnCoords()
+        spawn_distances = {spawn_coords: 0}
+        queue = [spawn_coords]
+        for coords in queue:
+            for offset in ((1, 0), (-1, 0), (0, -1), (0, 1)):
+                neighbour_coords = (coords[0] + offset[0], coords[1] + offset[1])
+                if neighbour_coords in passable_coords and neighbour_coords not in spawn_distances:
+                    spawn_distances[neighbour_coords] = spawn_distances[coords] + 1
+                    queue.append(neighbour_coords)
+        self.setSpawnDistances(spawn_distances)
+
+    def apply(self, board: Board) -> None:
+        """Merges the simulated enemy states into the level's enemies and board.
+
+        To be run on the main thread, once the level is no longer ticked.
+        """
+        coords_to_tile = board.getCoordsToTile()
+        enemies_and_states = list(zip(self.getEnemies(), self.getEnemyStates()))
+        # Tiles are vacated before any are entered, as enemies may move onto each other's previous tiles.
+        for enemy, state in enemies_and_states:
+            coords = (enemy.getXcoord(), enemy.getYcoord())
+            if coords != (state[0], state[1]) or state[2] == 0:
+                coords_to_tile[coords].setOccupiedBy(None)
+        for enemy, state in enemies_and_states:
+            enemy.setHealth(state[2])
+            if state[2] == 0:
+                enemy.setIsAlive(False)
+                enemy.kill()
+            elif (enemy.getXcoord(), enemy.getYcoord()) != (state[0], state[1]):
+                enemy.setXcoord(state[0])
+                enemy.setYcoord(state[1])
+                coords_to_tile[(state[0], state[1])].setOccupiedBy(enemy)
+
+
+class LevelTicker:
+    """Class that keeps simulating resident non-active levels (as HeadlessLevel)
+    at a reduced rate, on a worker thread.
+
+    Every tick_interval seconds, the worker ticks resident levels (least recently ticked first)
+    until tick_budget seconds have been used, so the main thread's frames are not held up.
+    Levels are only locked while being ticked, so removeLevel() waits for at most one tick.
+    The worker thread is stopped by stop() when the world is replaced or the game quits.
+    The worker only records the cost of its ticks in tick_costs; they are added to METRICS 
+    on the main thread by reportTickMetrics(), outside of any turn.
+
+    Attributes:
+        headless_levels (OrderedDict[str, HeadlessLevel]): Levels being ticked, least recently ticked first.
+        tick_interval (float): Seconds between rounds of ticks.
+        tick_budget (float): Maximum seconds spent ticking levels in each round.
+        tick_costs (dict[str, list[float]]): [number of ticks, total seconds, max seconds]
+            spent ticking each level, since the last reportTickMetrics().
+        lock (threading.Lock): Lock on headless_levels and tick_costs.
+        stop_event (threading.Event): Set to stop the worker thread.
+        thread (Optional[threading.Thread]): Worker thread. Started when the first level is added.
+    """
+
+    # Attributes
+    __headless_levels = None
+    __tick_interval = None
+    __tick_budget = None
+    __tick_costs = None
+    __lock = None
+    __stop_event = None
+    __thread = None
+
+    # Constructor
+    def __init__(self,
+                 tick_interval: float = 1.0,
+                 tick_budget: float = 0.002):
+        self.setHeadlessLevels(OrderedDict())
+        self.setTickInterval(tick_interval)
+        self.setTickBudget(tick_budget)
+        self.setTickCosts(dict())
+        self.setLock(threading.Lock())
+        self.setStopEvent(threading.Event())
+        self.setThread(None)
+
+    # Getters
+    def getHeadlessLevels(self) -> OrderedDict:
+        return self.__headless_levels
+    def getTickInterval(self) -> float:
+        return self.__tick_interval
+    def getTickBudget(self) -> float:
+        return self.__tick_budget
+    def getTickCosts(self) -> dict[str, list[float]]:
+        return self.__tick_costs
+    def getLock(self) -> threading.Lock:
+        return self.__lock
+    def getStopEvent(self) -> threading.Event:
+        return self.__stop_event
+    def getThread(self) -> Optional[threading.Thread]:
+        return self.__thread
+
+    # Setters
+    def setHeadlessLevels(self, headless_levels):
+        self.__headless_levels = headless_levels
+    def setTickInterval(self, tick_interval):
+        self.__tick_interval = tick_interval
+    def setTickBudget(self, tick_budget):
+        self.__tick_budget = tick_budget
+    def setTickCosts(self, tick_costs):
+        self.__tick_costs = tick_costs
+    def setLock(self, lock):
+        self.__lock = lock
+    def setStopEvent(self, stop_event):
+        self.__stop_event = stop_event
+    def setThread(self, thread):
+        self.__thread = thread
+
+    # Methods
+    def addLevel(self,
+                 level_name: str,
+                 level_contents: tuple[Board, pygame.sprite.Group, pygame.sprite.Group,
+                                       pygame.sprite.Group, pygame.sprite.Group],
+                 spawn_coords: tuple[int, int]) -> None:
+        """Starts ticking the level. Starts the worker thread if it has not been started."""
+        headless_level = HeadlessLevel(level_contents, spawn_coords)
+        with self.getLock():
+            self.getHeadlessLevels()[level_name] = headless_level
+        if self.getThread() == None:
+            thread = threading.Thread(target=self.run, name='LevelTicker', daemon=True)
+            self.setThread(thread)
+            thread.start()
+
+    def removeLevel(self,
+                    level_name: str,
+                    board: Board) -> None:
+        """Stops ticking the level (if it is being ticked), and merges its simulated state into board."""
+        with self.getLock():
+            headless_level = self.getHeadlessLevels().pop(level_name, None)
+        if headless_level != None:
+            headless_level.apply(board)
+
+    def run(self) -> None:
+        """Main function of the worker thread. Ticks levels every tick_interval seconds until stopped."""
+        stop_event = self.getStopEvent()
+        while not stop_event.wait(self.getTickInterval()):
+            self.tickLevels()
+
+    def tickLevels(self) -> None:
+        """Ticks levels, least recently ticked first, until tick_budget seconds have been used
+        or every level has been ticked once.
+        """
+        round_start_time = perf_counter()
+        headless_levels = self.getHeadlessLevels()
+        with self.getLock():
+            level_names = list(headless_levels.keys())
+        for level_name in level_names:
+            if perf_counter() - round_start_time > self.getTickBudget():
+                break
+            with self.getLock():
+                headless_level = headless_levels.get(level_name)
+                if headless_level == None: # Removed since the round started.
+                    continue
+                tick_start_time = perf_counter()
+                headless_level.tick()
+                tick_time = perf_counter() - tick_start_time
+                headless_levels.move_to_end(level_name)
+                tick_cost = self.getTickCosts().setdefault(level_name, [0, 0.0, 0.0])
+                tick_cost[0] += 1
+                tick_cost[1] += tick_time
+                tick_cost[2] = max(tick_cost[2], tick_time)
+
+    def stop(self) -> None:
+        """Stops the worker thread (if started), e.g. when the world is replaced.
+        Levels are then no longer ticked until another is added, but can still be removed."""
+        if self.getThread() != None:
+            self.getStopEvent().set()
+            self.getThread().join()
+            self.setThread(None)
+            self.setStopEvent(threading.Event())
+
+    def reportTickMetrics(self) -> None:
+        """Adds the tick costs since the last report to the session timers 'level_tick' and 
+        'level_tick.<level name>' of METRICS (see Metrics.addSessionTimer()), so they are not 
+        charged to the current turn. To be run on the main thread, e.g. at the end of each turn.
+        """
+        with self.getLock():
+            tick_costs = self.getTickCosts()
+            self.setTickCosts(dict())
+        for level_name, (num_ticks, total_time, max_time) in tick_costs.items():
+            METRICS.addSessionTimer('level_tick', num_ticks, total_time, max_time)
+            METRICS.addSessionTimer(f"level_tick.{level_name}", num_ticks, total_time, max_time)
@@ -0,0 +1,232 @@
+import os
+import csv
+import json
+import threading
+from collections import deque
+from typing import Any
+
+class Metrics:
+    """Class that counts and times the hot paths of each turn (e.g. pathfinding, range checks),
+    so that the path dominating each level can be found, and regressions caught.
+
+    Hot paths add to counters (increment()) and timers (addTime()) of the current turn.
+    At the end of each turn (endTurn()), the turn's counters and timers are added to the session totals,
+    and kept as a row of the turn history (the last MAX_TURNS turns), before being reset.
+    Counts made between turns (e.g. loading the first level) are counted in the next turn.
+    Metrics are locked while being changed or read, so they can also be counted by worker threads.
+    Timings made in the background, outside of any turn, are only added to the session totals 
+    (see addSessionTimer()).
+
+    The metrics of the game are kept by the module's METRICS instance.
+
+    Counters:
+        'find_path.calls', 'find_path.nodes_expanded': Pathfinder.findPath().
+        'find_weighted_path.calls', 'find_weighted_path.nodes_expanded': Pathfinder.findWeightedPath().
+        'path_cache.hits', 'path_cache.misses': Searches of a caching Pathfinder answered, and not answered,
+            by its cache.
+        'plan_move.table_routes', 'plan_move.weighted_routes', 'plan_move.windowed_searches': Moves planned by
+            CooperativePathfinder.planMove() from the next-hop table, from a weighted search, 
+            and with a windowed search.
+        'obstructed_coords.rebuilds': Sets of obstructed coords built (Board.getObstructedCoords()).
+        'is_in_range.calls', 'is_in_range.tiles_traversed': Attack.isInRange(), and the tiles
+            between origin and target it checked.
+    Timers:
+        'enemy_action': Every enemy action. 'enemy_action.<name>': The actions of enemies named <name>.
+        'level_load': GameWorld.initialiseLevel().
+        'turn_resolution_frame': The part of a pending turn resolved in one frame, within 
+            GameWorld.enemy_ai_budget_ms (see GameWorld.continuePendingTurn()).
+        'level_tick': Every tick of a non-active level. 'level_tick.<level name>': The ticks of that level.
+            Session totals only (see LevelTicker.reportTickMetrics()).
+
+    Attributes:
+        turn_counters (dict[str, int]): Counters of the current turn.
+        turn_timers (dict[str, list]): Timers of the current turn, as [count, total seconds, max seconds].
+        total_counters (dict[str, int]): Counters of the session.
+        total_timers (dict[str, list]): Timers of the session.
+        turn_rows (deque): Rows of the turn history (see getTurnRow()).
+        lock (threading.Lock): Lock on all of the above.
+    """
+
+    MAX_TURNS = 10000
+    METRICS_DIR = 'gameinfostorage/metrics'
+
+    # Attributes
+    __turn_counters = None
+    __turn_timers = None
+    __total_counters = None
+    __total_timers = None
+    __turn_rows = None
+    __lock = None
+
+    # Constructor
+    def __init__(self):
+        self.setLock(threading.Lock())
+        self.reset()
+
+    # Getters
+    def getTurnCounters(self) -> dict[str, int]:
+        return self.__turn_counters
+    def getTurnTimers(self) -> dict[str, list]:
+        return self.__turn_timers
+    def getTotalCounters(self) -> dict[str, int]:
+        return self.__total_counters
+    def getTotalTimers(self) -> dict[str, list]:
+        return self.__total_timers
+    def getTurnRows(self) -> deque:
+        return self.__turn_rows
+    def getLock(self) -> threading.Lock:
+        return self.__lock
+
+    # Setters
+    def setTurnCounters(self, turn_counters):
+        self.__turn_counters = turn_counters
+    def setTurnTimers(self, turn_timers):
+        self.__turn_timers = turn_timers
+    def setTotalCounters(self, total_counters):
+        self.__total_counters = total_counters
+    def setTotalTimers(self, total_timers):
+        self.__total_timers = total_timers
+    def setTurnRows(self, turn_rows):
+        self.__turn_rows = turn_rows
+    def setLock(self, lock):
+        self.__lock = lock
+
+    # Methods
+    def reset(self) -> None:
+        """Discards all metrics."""
+        with self.getLock():
+            self.setTurnCounters(dict())
+            self.setTurnTimers(dict())
+            self.setTotalCounters(dict())
+            self.setTotalTimers(dict())
+            self.setTurnRows(deque(maxlen=self.MAX_TURNS))
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Adds amount to the counter name of the current turn."""
+        with self.__lock:
+            turn_counters = self.__turn_counters
+            turn_counters[name] = turn_counters.get(name, 0) + amount
+
+    def addTime(self, name: str, seconds: float) -> None:
+        """Adds a timing of seconds to the timer name of the current turn."""
+        with self.__lock:
+            timer = self.__turn_timers.get(name)
+            if timer == None:
+                self.__turn_timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def addSessionTimer(self, 
+                        name: str, 
+                        count: int, 
+                        total: float, 
+                        maximum: float) -> None:
+        """Adds count timings (total seconds in total, the longest maximum seconds) to the session total 
+        of timer name, without adding them to the current turn.
+        For timings made in the background, which would otherwise be charged to whichever turn is current.
+        """
+        with self.getLock():
+            total_timer = self.getTotalTimers().setdefault(name, [0, 0.0, 0.0])
+            total_timer[0] += count
+            total_timer[1] += total
+            total_timer[2] = max(total_timer[2], maximum)
+
+    def endTurn(self, turn_number: int, level_name: str) -> None:
+        """Ends the current turn (taken on level level_name): adds its metrics to the session totals
+        and the turn history, then resets them.
+        """
+        with self.getLock():
+            turn_counters = self.getTurnCounters()
+            turn_timers = self.getTurnTimers()
+            self.setTurnCounters(dict())
+            self.setTurnTimers(dict())
+            total_counters = self.getTotalCounters()
+            for name, count in turn_counters.items():
+                total_counters[name] = total_counters.get(name, 0) + count
+            total_timers = self.getTotalTimers()
+            for name, (count, total, maximum) in turn_timers.items():
+                total_timer = total_timers.setdefault(name, [0, 0.0, 0.0])
+                total_timer[0] += count
+                total_timer[1] += total
+                total_timer[2] = max(total_timer[2], maximum)
+            self.getTurnRows().append(self.getTurnRow(turn_number, level_name, turn_counters, turn_timers))
+
+    def getTurnRow(self,
+                   turn_number: int,
+                   level_name: str,
+                   counters: dict[str, int],
+                   timers: dict[str, list]) -> dict[str, Any]:
+        """Returns a row of the turn history: turn_number, level_name, each counter,
+        and each timer as <name>.count, <name>.total_ms and <name>.max_ms.
+        """
+        row = {'turn_number': turn_number, 'level_name': level_name}
+        row.update(counters)
+        for name, (count, total, maximum) in timers.items():
+            row[f"{name}.count"] = count
+            row[f"{name}.total_ms"] = round(total * 1000, 3)
+            row[f"{name}.max_ms"] = round(maximum * 1000, 3)
+        return row
+
+    def getCounter(self, name: str) -> int:
+        """Returns the session total of counter name (0 if it has not been counted)."""
+        with self.getLock():
+            return self.getTotalCounters().get(name, 0)
+
+    def getTimer(self, name: str) -> tuple[int, float, float]:
+        """Returns (count, total seconds, max seconds) of timer name over the session."""
+        with self.getLock():
+            return tuple(self.getTotalTimers().get(name, (0, 0.0, 0.0)))
+
+    def getSummary(self) -> dict[str, Any]:
+        """Returns the session totals: {'counters': {name: count},
+        'timers': {name: {'count', 'total_ms', 'mean_ms', 'max_ms'}}, 'num_turns': int}.
+        """
+        with self.getLock():
+            total_counters = dict(self.getTotalCounters())
+            total_timers = {name: tuple(timer) for name, timer in self.getTotalTimers().items()}
+            num_turns = len(self.getTurnRows())
+        timers = {}
+        for name, (count, total, maximum) in total_timers.items():
+            timers[name] = {'count': count, 'total_ms': round(total * 1000, 3),
+                            'mean_ms': round(total * 1000 / count, 3), 'max_ms': round(maximum * 1000, 3)}
+        return {'counters': total_counters, 'timers': timers, 'num_turns': num_turns}
+
+    def dumpJson(self, path: str) -> None:
+        """Writes the session totals and the turn history to path, as JSON."""
+        summary = self.getSummary()
+        with self.getLock():
+            turn_rows = list(self.getTurnRows())
+        with open(path, 'w') as file:
+            json.dump({'summary': summary, 'turns': turn_rows}, file, indent=1)
+
+    def dumpCsv(self, path: str) -> None:
+        """Writes the turn history to path, as CSV (one row per turn,
+        with a column for every counter and timer of any turn).
+        """
+        with self.getLock():
+            turn_rows = list(self.getTurnRows())
+        columns = ['turn_number', 'level_name']
+        for row in turn_rows:
+            for column in row:
+                if column not in columns:
+                    columns.append(column)
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, columns, restval=0)
+            writer.writeheader()
+            writer.writerows(turn_rows)
+
+    def dump(self, metrics_dir: str = METRICS_DIR) -> None:
+        """Writes metrics.json and metrics.csv to metrics_dir (see dumpJson(), dumpCsv()),
+        if any turn has been taken. To be run at the end of a session.
+        """
+        if not self.getTurnRows():
+            return
+        os.makedirs(metrics_dir, exist_ok=True)
+        self.dumpJson(os.path.join(metrics_dir, 'metrics.json'))
+        self.dumpCsv(os.path.join(metrics_dir, 'metrics.csv'))
+
+
+METRICS = Metrics()
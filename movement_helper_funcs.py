@@ -4,26 +4,20 @@ Contains functions to facilitate ActiveEntity movement and pathfinding.
 
 # Imports
 import pygame
-from sprites.tile import Tile
+from sprites.tile import TileMap
 
 # Functions
-def getObstructedCoords(coords_to_tile: dict[tuple[int, int], Tile],
-                        obstruction_entity_types: tuple[type] | type) -> list[tuple[int, int]]:
+def getObstructedCoords(coords_to_tile: TileMap,
+                        obstruction: str | tuple[type] | type) -> set[tuple[int, int]]:
     """Determines all obstructed coordinates in a board.
 
-    A tile is obstructed if it is not accessible, or
-    contains an entity in obstruction_entity_types.
+    A tile is obstructed if it is not accessible, or contains an entity matching
+    obstruction: a component (e.g. ComponentStore.BLOCKER), or entity types.
     """
-    obstructed_coords = list()
-    for coords, tile in coords_to_tile.items():
-        if tile.getAccessible() == False:
-            obstructed_coords.append(coords)
-        elif isinstance(tile.getOccupiedBy(), obstruction_entity_types):
-            obstructed_coords.append(coords)
-    return obstructed_coords
+    return coords_to_tile.getObstructedCoords(obstruction)
 
-def checkTileEnterable(coords_to_tile: dict[tuple[int, int], Tile],
-                       obstructed_coords: list[tuple[int, int]],
+def checkTileEnterable(coords_to_tile: TileMap,
+                       obstructed_coords: set[tuple[int, int]],
                        coords_to_check: tuple[int, int]) -> bool:
     """Checks whether a single tile is enterable.
 
@@ -32,7 +26,7 @@ def checkTileEnterable(coords_to_tile: dict[tuple[int, int], Tile],
         - Is not in obstructed_coords.
     Return True. Else, return False.
     """
-    if coords_to_check not in coords_to_tile.keys() or coords_to_check in obstructed_coords:
+    if coords_to_check not in coords_to_tile or coords_to_check in obstructed_coords:
         return False
     return True
 
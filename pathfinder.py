@@ -1,11 +1,72 @@
-from typing import Optional
+from typing import Optional, Iterable
+from collections import OrderedDict
+from array import array
+from math import inf
+from heapq import heappush, heappop
 from movement_helper_funcs import getObstructedCoords, checkTileEnterable, getDestinationCoords
-from sprites.tile import Tile
+from sprites.tile import Tile, TileMap
+from metrics import METRICS
 import pygame
 
 class Pathfinder:
-    """Class containing methods that facilitate a pathfinding algorithm."""
+    """Class containing methods that facilitate a pathfinding algorithm.
 
+    If a board is given, found paths are stored in a bounded least-recently-used cache,
+    keyed by (starting_coords, target_coords, search parameters). A search only depends on the tiles
+    it examined, so each path is stored with the rectangle of coords around them (search bounds), 
+    and the versions of the board regions in it (see Board.getRegionVersionsInRect()).
+    A cached path is only used while those versions are unchanged, so it is never outdated, 
+    and is the path the search would find again: occupancy changes elsewhere on the board do not affect it.
+
+    Attributes:
+        board (Optional[Board]): Board that paths are found on. If None, paths are not cached.
+        path_cache (OrderedDict[tuple, tuple]): Cached (path, search bounds, region versions), 
+            from least to most recently used.
+        max_cache_size (int): Maximum number of cached paths.
+        num_cache_hits (int): Number of searches answered by the cache.
+        num_cache_misses (int): Number of searches not answered by the cache.
+    """
+
+    # Attributes
+    __board = None
+    __path_cache = None
+    __max_cache_size = None
+    __num_cache_hits = None
+    __num_cache_misses = None
+
+    # Constructor
+    def __init__(self, board = None, max_cache_size: int = 256):
+        self.setBoard(board)
+        self.setPathCache(OrderedDict())
+        self.setMaxCacheSize(max_cache_size)
+        self.setNumCacheHits(0)
+        self.setNumCacheMisses(0)
+
+    # Getters
+    def getBoard(self):
+        return self.__board
+    def getPathCache(self) -> OrderedDict:
+        return self.__path_cache
+    def getMaxCacheSize(self) -> int:
+        return self.__max_cache_size
+    def getNumCacheHits(self) -> int:
+        return self.__num_cache_hits
+    def getNumCacheMisses(self) -> int:
+        return self.__num_cache_misses
+
+    # Setters
+    def setBoard(self, board):
+        self.__board = board
+    def setPathCache(self, path_cache):
+        self.__path_cache = path_cache
+    def setMaxCacheSize(self, max_cache_size):
+        self.__max_cache_size = max_cache_size
+    def setNumCacheHits(self, num_cache_hits):
+        self.__num_cache_hits = num_cache_hits
+    def setNumCacheMisses(self, num_cache_misses):
+        self.__num_cache_misses = num_cache_misses
+
+    # Methods
     def findPath(self,
                  coords_to_tile: dict[tuple[int, int], Tile],
                  obstruction_entity_types: tuple[type],
@@ -19,6 +80,11 @@ class Pathfinder:
         obstruction_entity_types is the list of entities to be treated as obstructions:
         If for example, Enemy is not included, the algorithm will allow enemies to be part of the path.
         """
+        METRICS.increment('find_path.calls')
+        cache_key = self.makeCacheKey(starting_coords, target_coords, (obstruction_entity_types,))
+        cached_path = self.getCachedPath(cache_key)
+        if cached_path != None:
+            return cached_path
 
         obstructed_coords = getObstructedCoords(coords_to_tile, obstruction_entity_types)
         coords_to_path = {starting_coords: []} # Dictionary to track found paths.
@@ -32,9 +98,12 @@ class Pathfinder:
             # Iterates through all existing coords.
             # If a tile was found the previous iteration (its path length equals the number of iterations), 
             # then check the tiles adjacent to it, to add to new_coords_to_path.
+            num_expanded = 0
             for coords, path in coords_to_path.items():
                 if len(path) == num_iterations: 
                     self.findAdjacentPaths(coords_to_tile, new_coords_to_path, coords, target_coords, obstructed_coords)
+                    num_expanded += 1
+            METRICS.increment('find_path.nodes_expanded', num_expanded)
             coords_to_path = new_coords_to_path
             # If no new tiles have been found, break.
             new_num_found_tiles = len(coords_to_path.keys())
@@ -44,9 +113,11 @@ class Pathfinder:
         
         # Checks whether target coords have been found. 
         if target_coords in coords_to_path.keys():
-            return coords_to_path[target_coords]
+            path = coords_to_path[target_coords]
         else:
-            return 'path not found'
+            path = 'path not found'
+        self.cachePath(cache_key, path, coords_to_path.keys())
+        return path
         
     def findAdjacentPaths(self,
                           coords_to_tile: dict[tuple[int, int], Tile],
@@ -73,4 +144,845 @@ class Pathfinder:
                 # Creates the new path leading to that tile, and adds it to coords_to_path
                 new_path = path_to_root.copy()
                 new_path.append(direction)
-                coords_to_path[dest_coords] = new_path
\ No newline at end of file
+                coords_to_path[dest_coords] = new_path
+
+    def findWeightedPath(self,
+                         coords_to_tile: dict[tuple[int, int], Tile],
+                         obstruction_entity_types: tuple[type],
+                         penalised_entity_types: tuple[type] | type,
+                         starting_coords: tuple[int, int],
+                         target_coords: tuple[int, int],
+                         penalty: int) -> list[str] | str:
+        """Weighted pathfinding method - finds the cheapest path between starting_coords and target_coords.
+
+        Uses A* search, with taxicab distance as the heuristic.
+        Each movement costs 1. Entering a tile occupied by an entity in penalised_entity_types 
+        costs an additional penalty, so such tiles can be passed through, but are avoided 
+        unless the alternative path is more than penalty tiles longer.
+        Tiles occupied by entities in obstruction_entity_types cannot be passed through.
+
+        Returns the cheapest path, as a list containing movement directions in order.
+        If no path exists, returns string 'path not found'.
+        """
+        METRICS.increment('find_weighted_path.calls')
+        cache_key = self.makeCacheKey(starting_coords, target_coords, 
+                                      (obstruction_entity_types, penalised_entity_types, penalty))
+        cached_path = self.getCachedPath(cache_key)
+        if cached_path != None:
+            return cached_path
+
+        obstructed_coords = set(getObstructedCoords(coords_to_tile, obstruction_entity_types))
+        num_pushed = 0
+        open_heap = [(0, num_pushed, starting_coords)] # Entries: (estimated total cost, insertion order, coords)
+        coords_to_cost = {starting_coords: 0}
+        came_from = {starting_coords: None} # coords -> (previous coords, direction)
+        while open_heap:
+            estimated_cost, _, coords = heappop(open_heap)
+            if coords == target_coords:
+                path = []
+                while came_from[coords] != None:
+                    coords, direction = came_from[coords]
+                    path.append(direction)
+                path.reverse()
+                self.cachePath(cache_key, path, came_from.keys())
+                return path
+            cost = coords_to_cost[coords]
+            # Skips outdated heap entries.
+            if estimated_cost > cost + self.calcTaxicabDistance(coords, target_coords):
+                continue
+            METRICS.increment('find_weighted_path.nodes_expanded')
+            for direction in ['right', 'left', 'up', 'down']:
+                dest_coords = getDestinationCoords(coords, direction)
+                if dest_coords == target_coords:
+                    dest_cost = cost + 1
+                elif checkTileEnterable(coords_to_tile, obstructed_coords, dest_coords):
+                    dest_cost = cost + 1
+                    if isinstance(coords_to_tile[dest_coords].getOccupiedBy(), penalised_entity_types):
+                        dest_cost += penalty
+                else:
+                    continue
+                if dest_cost < coords_to_cost.get(dest_coords, inf):
+                    coords_to_cost[dest_coords] = dest_cost
+                    came_from[dest_coords] = (coords, direction)
+                    num_pushed += 1
+                    heappush(open_heap, (dest_cost + self.calcTaxicabDistance(dest_coords, target_coords),
+                                         num_pushed, dest_coords))
+        self.cachePath(cache_key, 'path not found', came_from.keys())
+        return 'path not found'
+
+    def calcTaxicabDistance(self, 
+                            coords1: tuple[int, int], 
+                            coords2: tuple[int, int]) -> int:
+        """Returns the taxicab distance between coords1 and coords2."""
+        return abs(coords1[0] - coords2[0]) + abs(coords1[1] - coords2[1])
+
+    def makeCacheKey(self,
+                     starting_coords: tuple[int, int],
+                     target_coords: tuple[int, int],
+                     search_parameters: tuple) -> Optional[tuple]:
+        """Returns the path cache key for a search, or None if paths are not cached.
+
+        Obstruction types in search_parameters are converted to tuples, so that 
+        a single type, a tuple or a list of types are all hashable.
+        """
+        if self.getBoard() == None:
+            return None
+        obstruction_key = tuple(tuple(parameter) if isinstance(parameter, (tuple, list)) else parameter
+                                for parameter in search_parameters)
+        return (starting_coords, target_coords, obstruction_key)
+
+    def getCachedPath(self, cache_key: Optional[tuple]) -> Optional[list[str] | str]:
+        """Returns a copy of the cached path for cache_key (marking it as most recently used), 
+        or None if no such path is cached, or the board has changed within its search bounds
+        (the path is then removed).
+        """
+        if cache_key == None:
+            return None
+        path_cache = self.getPathCache()
+        cached_entry = path_cache.get(cache_key)
+        if cached_entry != None:
+            path, (min_coords, max_coords), region_versions = cached_entry
+            if self.getBoard().getRegionVersionsInRect(min_coords, max_coords) != region_versions:
+                del path_cache[cache_key]
+                cached_entry = None
+        if cached_entry == None:
+            self.setNumCacheMisses(self.getNumCacheMisses() + 1)
+            METRICS.increment('path_cache.misses')
+            return None
+        self.setNumCacheHits(self.getNumCacheHits() + 1)
+        METRICS.increment('path_cache.hits')
+        path_cache.move_to_end(cache_key)
+        if path == 'path not found':
+            return path
+        return path.copy()
+
+    def cachePath(self, 
+                  cache_key: Optional[tuple], 
+                  path: list[str] | str,
+                  found_coords: Iterable[tuple[int, int]]) -> None:
+        """Caches path under cache_key, evicting the least recently used path if the cache is full.
+
+        found_coords are the coords found by the search. Every tile the search examined is either found, 
+        or adjacent to a found tile, so the search bounds are the rectangle around them, extended by one tile.
+        """
+        if cache_key == None:
+            return
+        xcoords, ycoords = zip(*found_coords)
+        min_coords = (min(xcoords) - 1, min(ycoords) - 1)
+        max_coords = (max(xcoords) + 1, max(ycoords) + 1)
+        if path != 'path not found':
+            path = path.copy()
+        region_versions = self.getBoard().getRegionVersionsInRect(min_coords, max_coords)
+        path_cache = self.getPathCache()
+        path_cache[cache_key] = (path, (min_coords, max_coords), region_versions)
+        path_cache.move_to_end(cache_key)
+        if len(path_cache) > self.getMaxCacheSize():
+            path_cache.popitem(last=False)
+
+
+class NextHopTable:
+    """Class containing a precomputed all-pairs next-hop table for a board, based only 
+    on its static walls (tiles which are not accessible).
+
+    Built once per level: a breadth-first search is run from every accessible tile.
+    The distance and next movement direction between any two accessible tiles can then
+    be looked up without searching. 
+    
+    Tables are stored as flat arrays (from the standard library array module) indexed by 
+    (starting tile index * num_tiles + target tile index), to keep them compact.
+    As their size grows with the square of the number of tiles, tables should only be built
+    for boards with at most MAX_TILES accessible tiles.
+
+    Attributes:
+        coords_to_index (dict[tuple[int, int], int]): Index of each accessible tile.
+        num_tiles (int): Number of accessible tiles.
+        distances (array): Distance between each pair of tiles. UNREACHABLE if no path exists.
+        next_hops (array): Index (in DIRECTIONS) of the first movement direction 
+            from the starting tile towards the target tile. -1 if no path exists.
+    """
+
+    DIRECTIONS = ('right', 'left', 'up', 'down')
+    UNREACHABLE = 65535
+    MAX_TILES = 1024
+
+    # Attributes
+    __coords_to_index = None
+    __num_tiles = None
+    __distances = None
+    __next_hops = None
+
+    # Constructor
+    def __init__(self, coords_to_tile: dict[tuple[int, int], Tile]):
+        accessible_coords = [coords for coords, tile in coords_to_tile.items() if tile.getAccessible()]
+        num_tiles = len(accessible_coords)
+        self.setCoordsToIndex({coords: index for index, coords in enumerate(accessible_coords)})
+        self.setNumTiles(num_tiles)
+        self.setDistances(array('H', [self.UNREACHABLE]) * (num_tiles * num_tiles))
+        self.setNextHops(array('b', [-1]) * (num_tiles * num_tiles))
+        self.calcTables(accessible_coords)
+
+    # Getters
+    def getCoordsToIndex(self) -> dict[tuple[int, int], int]:
+        return self.__coords_to_index
+    def getNumTiles(self) -> int:
+        return self.__num_tiles
+    def getDistances(self) -> array:
+        return self.__distances
+    def getNextHops(self) -> array:
+        return self.__next_hops
+
+    # Setters
+    def setCoordsToIndex(self, coords_to_index):
+        self.__coords_to_index = coords_to_index
+    def setNumTiles(self, num_tiles):
+        self.__num_tiles = num_tiles
+    def setDistances(self, distances):
+        self.__distances = distances
+    def setNextHops(self, next_hops):
+        self.__next_hops = next_hops
+
+    # Methods
+    def calcTables(self, accessible_coords: list[tuple[int, int]]) -> None:
+        """Fills distances and next_hops, with a breadth-first search from every accessible tile.
+
+        As the board is undirected, the search from a target tile gives the distance 
+        from every tile to it, and the next hop of a tile is the direction to its parent.
+        """
+        coords_to_index = self.getCoordsToIndex()
+        num_tiles = self.getNumTiles()
+        distances = self.getDistances()
+        next_hops = self.getNextHops()
+        # For each tile, list of (neighbour index, direction from neighbour to tile).
+        neighbours = [[] for _ in accessible_coords]
+        for index, coords in enumerate(accessible_coords):
+            for direction_index, direction in enumerate(self.DIRECTIONS):
+                dest_coords = getDestinationCoords(coords, direction)
+                if dest_coords in coords_to_index:
+                    neighbours[coords_to_index[dest_coords]].append((index, direction_index))
+
+        for target_index in range(num_tiles):
+            distances[target_index * num_tiles + target_index] = 0
+            frontier = [target_index]
+            distance = 0
+            while frontier:
+                distance += 1
+                new_frontier = []
+                for parent_index in frontier:
+                    for index, direction_index in neighbours[parent_index]:
+                        table_index = index * num_tiles + target_index
+                        if distances[table_index] == self.UNREACHABLE:
+                            distances[table_index] = distance
+                            next_hops[table_index] = direction_index
+                            new_frontier.append(index)
+                frontier = new_frontier
+
+    def getDistance(self,
+                    starting_coords: tuple[int, int],
+                    target_coords: tuple[int, int]) -> Optional[int]:
+        """Returns the distance between starting_coords and target_coords around walls.
+        
+        Returns None if either coords are not accessible tiles, or no path exists.
+        """
+        coords_to_index = self.getCoordsToIndex()
+        if starting_coords not in coords_to_index or target_coords not in coords_to_index:
+            return None
+        table_index = coords_to_index[starting_coords] * self.getNumTiles() + coords_to_index[target_coords]
+        distance = self.getDistances()[table_index]
+        if distance == self.UNREACHABLE:
+            return None
+        return distance
+
+    def getNextHop(self,
+                   starting_coords: tuple[int, int],
+                   target_coords: tuple[int, int]) -> Optional[str]:
+        """Returns the first movement direction of a shortest path from starting_coords 
+        to target_coords around walls.
+
+        Returns None if no such path exists, or the coords are equal.
+        """
+        coords_to_index = self.getCoordsToIndex()
+        if starting_coords not in coords_to_index or target_coords not in coords_to_index:
+            return None
+        table_index = coords_to_index[starting_coords] * self.getNumTiles() + coords_to_index[target_coords]
+        direction_index = self.getNextHops()[table_index]
+        if direction_index == -1:
+            return None
+        return self.DIRECTIONS[direction_index]
+
+    def getRoute(self,
+                 starting_coords: tuple[int, int],
+                 target_coords: tuple[int, int]) -> list[str] | str:
+        """Returns a shortest path from starting_coords to target_coords around walls,
+        by following next hops.
+
+        Returns 'path not found' if no path exists (as with Pathfinder.findPath()).
+        """
+        if self.getDistance(starting_coords, target_coords) == None:
+            return 'path not found'
+        path = []
+        coords = starting_coords
+        while coords != target_coords:
+            direction = self.getNextHop(coords, target_coords)
+            path.append(direction)
+            coords = getDestinationCoords(coords, direction)
+        return path
+
+    def isRouteClear(self,
+                     coords_to_tile: dict[tuple[int, int], Tile],
+                     obstruction_entity_types: tuple[type] | type,
+                     starting_coords: tuple[int, int],
+                     path: list[str]) -> bool:
+        """Returns whether none of the tiles along path (excluding the starting and final tiles)
+        is occupied by an entity in obstruction_entity_types.
+
+        If so, path is also a shortest path when those entities are treated as obstructions.
+        """
+        coords = starting_coords
+        for direction in path[:-1]:
+            coords = getDestinationCoords(coords, direction)
+            if isinstance(coords_to_tile[coords].getOccupiedBy(), obstruction_entity_types):
+                return False
+        return True
+
+
+class IncrementalDistanceField:
+    """Class that maintains the distance from every tile to a source tile (e.g. the character),
+    and repairs it incrementally as the board changes between turns.
+
+    Uses the incremental search of D* Lite (Lifelong Planning A* without a heuristic, as 
+    distances are needed for every tile): each tile has a distance and an rhs value 
+    (one-step lookahead distance), and only tiles where these are inconsistent are expanded.
+    When a tile becomes obstructed/unobstructed through Board.setOccupant(), only the tiles 
+    whose distance actually changes are re-expanded, instead of searching the whole board again.
+    When the source moves, the distance of most tiles changes, so distances are rebuilt with 
+    a single breadth-first search instead (repairing them costs more than the search).
+
+    To be instantiated once per level. update() is to be run before distances are used each turn.
+
+    Attributes:
+        coords_to_tile (TileMap): Board of the current level.
+        obstruction_entity_types (tuple[type]): Entity types treated as obstructions.
+        source_coords (tuple[int, int]): Coords that distances are measured to.
+        distances (dict[tuple[int, int], int]): Distance of each tile that can reach source_coords. 
+            Tiles which cannot reach source_coords are not included.
+        rhs (dict[tuple[int, int], int]): One-step lookahead distance of each tile
+            (min distance of neighbours + 1). Missing tiles have an infinite rhs.
+        queue (list[tuple[int, tuple[int, int]]]): Heap of inconsistent tiles as (key, coords).
+            May contain outdated entries.
+        queued_keys (dict[tuple[int, int], int]): Current key of each inconsistent tile.
+        changed_coords (set[tuple[int, int]]): Coords whose obstruction has changed since last update.
+        num_expanded (int): Total number of tiles expanded.
+    """
+
+    # Attributes
+    __coords_to_tile = None
+    __obstruction_entity_types = None
+    __source_coords = None
+    __distances = None
+    __rhs = None
+    __queue = None
+    __queued_keys = None
+    __changed_coords = None
+    __num_expanded = None
+
+    # Constructor
+    def __init__(self,
+                 coords_to_tile: TileMap,
+                 obstruction_entity_types: tuple[type],
+                 source_coords: tuple[int, int]):
+        self.setCoordsToTile(coords_to_tile)
+        self.setObstructionEntityTypes(obstruction_entity_types)
+        self.setSourceCoords(source_coords)
+        self.setDistances(dict())
+        self.setRhs({source_coords: 0})
+        self.setQueue([])
+        self.setQueuedKeys(dict())
+        self.setChangedCoords(set())
+        self.setNumExpanded(0)
+        # Observes the board's occupancy, so that obstruction changes are known without rescanning the board.
+        coords_to_tile.getBoard().addOccupancyObserver(self.handleOccupancyChange)
+        self.rebuildDistances()
+
+    # Getters
+    def getCoordsToTile(self) -> TileMap:
+        return self.__coords_to_tile
+    def getObstructionEntityTypes(self) -> tuple[type]:
+        return self.__obstruction_entity_types
+    def getSourceCoords(self) -> tuple[int, int]:
+        return self.__source_coords
+    def getDistances(self) -> dict[tuple[int, int], int]:
+        return self.__distances
+    def getRhs(self) -> dict[tuple[int, int], int]:
+        return self.__rhs
+    def getQueue(self) -> list[tuple[int, tuple[int, int]]]:
+        return self.__queue
+    def getQueuedKeys(self) -> dict[tuple[int, int], int]:
+        return self.__queued_keys
+    def getChangedCoords(self) -> set[tuple[int, int]]:
+        return self.__changed_coords
+    def getNumExpanded(self) -> int:
+        return self.__num_expanded
+
+    # Setters
+    def setCoordsToTile(self, coords_to_tile):
+        self.__coords_to_tile = coords_to_tile
+    def setObstructionEntityTypes(self, obstruction_entity_types):
+        self.__obstruction_entity_types = obstruction_entity_types
+    def setSourceCoords(self, source_coords):
+        self.__source_coords = source_coords
+    def setDistances(self, distances):
+        self.__distances = distances
+    def setRhs(self, rhs):
+        self.__rhs = rhs
+    def setQueue(self, queue):
+        self.__queue = queue
+    def setQueuedKeys(self, queued_keys):
+        self.__queued_keys = queued_keys
+    def setChangedCoords(self, changed_coords):
+        self.__changed_coords = changed_coords
+    def setNumExpanded(self, num_expanded):
+        self.__num_expanded = num_expanded
+
+    # Methods
+    def update(self, source_coords: tuple[int, int]) -> None:
+        """Updates distances after the source has moved to source_coords, 
+        and after any tile obstruction changes since the last update.
+
+        If the source has moved, distances are rebuilt (see rebuildDistances()), else they are repaired.
+        """
+        affected_coords = self.getChangedCoords()
+        if source_coords != self.getSourceCoords():
+            self.setSourceCoords(source_coords)
+            self.setChangedCoords(set())
+            self.rebuildDistances()
+            return
+        if not affected_coords:
+            return
+        # An obstruction change affects the tile itself and the neighbours that path through it.
+        for coords in affected_coords:
+            self.updateRhs(coords)
+            for neighbour_coords in self.getNeighbours(coords):
+                self.updateRhs(neighbour_coords)
+        self.setChangedCoords(set())
+        self.computeDistances()
+
+    def handleOccupancyChange(self,
+                              coords: tuple[int, int],
+                              previous_occupied_by,
+                              occupied_by) -> None:
+        """Occupancy observer of the board (see Board.addOccupancyObserver()).
+        
+        Records coords if the tile became obstructed or unobstructed.
+        """
+        obstruction_entity_types = self.getObstructionEntityTypes()
+        if (isinstance(previous_occupied_by, obstruction_entity_types) != 
+                isinstance(occupied_by, obstruction_entity_types)):
+            self.getChangedCoords().add(coords)
+
+    def detach(self) -> None:
+        """Removes the field's occupancy observer from the board.
+
+        To be run when the field is replaced, as the board may be kept (e.g. by LevelCache) after the field is discarded.
+        """
+        self.getCoordsToTile().getBoard().removeOccupancyObserver(self.handleOccupancyChange)
+
+    def isObstructed(self, coords: tuple[int, int]) -> bool:
+        """Returns whether the tile at coords cannot be passed through.
+        
+        The source tile is never obstructed.
+        """
+        if coords == self.getSourceCoords():
+            return False
+        board = self.getCoordsToTile().getBoard()
+        index = board.getTileIndex(coords)
+        return (board.isAccessible(index) == False or 
+                isinstance(board.getOccupant(index), self.getObstructionEntityTypes()))
+
+    def getNeighbours(self, coords: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns the coords adjacent to coords that are on the board."""
+        coords_to_tile = self.getCoordsToTile()
+        neighbours = []
+        for direction in ['right', 'left', 'up', 'down']:
+            dest_coords = getDestinationCoords(coords, direction)
+            if dest_coords in coords_to_tile:
+                neighbours.append(dest_coords)
+        return neighbours
+
+    def updateRhs(self, coords: tuple[int, int]) -> None:
+        """Recalculates the rhs value of coords, and updates its position in the queue."""
+        rhs = self.getRhs()
+        distances = self.getDistances()
+        if coords == self.getSourceCoords():
+            new_rhs = 0
+        elif self.isObstructed(coords):
+            new_rhs = inf
+        else:
+            new_rhs = min([distances.get(neighbour_coords, inf) + 1 
+                           for neighbour_coords in self.getNeighbours(coords)], default=inf)
+        if new_rhs == inf:
+            rhs.pop(coords, None)
+        else:
+            rhs[coords] = new_rhs
+        self.updateQueue(coords)
+
+    def updateQueue(self, coords: tuple[int, int]) -> None:
+        """Adds coords to the queue if its distance and rhs are inconsistent, else removes it."""
+        distance = self.getDistances().get(coords, inf)
+        rhs = self.getRhs().get(coords, inf)
+        queued_keys = self.getQueuedKeys()
+        if distance != rhs:
+            key = min(distance, rhs)
+            if queued_keys.get(coords) != key:
+                queued_keys[coords] = key
+                heappush(self.getQueue(), (key, coords))
+        else:
+            queued_keys.pop(coords, None)
+
+    def rebuildDistances(self) -> None:
+        """Recalculates the distance of every tile with a breadth-first search from source_coords,
+        leaving every tile consistent (the rhs of each tile is its distance, and the queue is empty).
+        """
+        source_coords = self.getSourceCoords()
+        distances = {source_coords: 0}
+        frontier = [source_coords]
+        distance = 0
+        while frontier:
+            distance += 1
+            new_frontier = []
+            for coords in frontier:
+                for neighbour_coords in self.getNeighbours(coords):
+                    if neighbour_coords not in distances and not self.isObstructed(neighbour_coords):
+                        distances[neighbour_coords] = distance
+                        new_frontier.append(neighbour_coords)
+            frontier = new_frontier
+        self.setNumExpanded(self.getNumExpanded() + len(distances))
+        self.setDistances(distances)
+        self.setRhs(dict(distances))
+        self.setQueue([])
+        self.setQueuedKeys(dict())
+
+    def computeDistances(self) -> None:
+        """Expands inconsistent tiles in order of key, until every tile is consistent."""
+        distances = self.getDistances()
+        rhs = self.getRhs()
+        queue = self.getQueue()
+        queued_keys = self.getQueuedKeys()
+        while queue:
+            key, coords = heappop(queue)
+            # Skips outdated queue entries.
+            if queued_keys.get(coords) != key:
+                continue
+            del queued_keys[coords]
+            self.setNumExpanded(self.getNumExpanded() + 1)
+            if distances.get(coords, inf) > rhs.get(coords, inf):
+                # Overconsistent: distance decreased, and is now final.
+                distances[coords] = rhs[coords]
+            else:
+                # Underconsistent: distance increased, so is reset and recalculated.
+                distances.pop(coords, None)
+                self.updateRhs(coords)
+            for neighbour_coords in self.getNeighbours(coords):
+                self.updateRhs(neighbour_coords)
+
+
+class CooperativePathfinder:
+    """Class that plans the movement of several enemies in a single turn, using a 
+    space-time reservation table (windowed cooperative A*).
+
+    To be instantiated once per turn, then planMove() called for each moving enemy
+    (and reserveStationary() for each enemy that does not move), in the order that
+    enemies act. Each planned path is reserved in the reservation table, so that
+    enemies planned afterwards route around the enemies planned before them,
+    or wait, instead of piling into the same corridors.
+
+    The heuristic is the distance to target_coords over the static obstructions, taken from 
+    an IncrementalDistanceField which is shared by every enemy in the turn (and repaired
+    between turns).
+    Before searching, a planned route is taken from next_hop_table, or else from a weighted search 
+    of pathfinder (which caches paths), whenever the route is clear.
+
+    Attributes:
+        coords_to_tile (dict[tuple[int, int], Tile]): Board of the current level.
+        target_distance_field (IncrementalDistanceField): Distances to the coords that 
+            all enemies are moving towards (target_coords), ignoring dynamic obstructions.
+        dynamic_obstruction_types (tuple[type]): Entity types that move during a turn
+            (e.g. Enemy). Tiles they occupy are only obstructed for the next move.
+        window (int): Number of turns ahead that each path is planned and reserved for.
+        next_hop_table (Optional[NextHopTable]): Next-hop table of the board. If given, 
+            the route it gives is used without searching whenever nothing blocks it.
+        pathfinder (Optional[Pathfinder]): Pathfinder of the board. If given, the weighted path it finds 
+            around dynamic obstructions is used whenever the next-hop table's route is blocked, and it is clear.
+        reservations (set[tuple[int, int, int]]): Reserved (xcoord, ycoord, time) entries.
+        num_expanded (int): Total number of search nodes expanded this turn.
+    """
+
+    DYNAMIC_TILE_PENALTY = 12 # Additional cost of entering a tile occupied by a dynamic obstruction.
+
+    # Attributes
+    __coords_to_tile = None
+    __target_distance_field = None
+    __dynamic_obstruction_types = None
+    __window = None
+    __next_hop_table = None
+    __pathfinder = None
+    __reservations = None
+    __num_expanded = None
+
+    # Constructor
+    def __init__(self,
+                 coords_to_tile: dict[tuple[int, int], Tile],
+                 target_distance_field: IncrementalDistanceField,
+                 dynamic_obstruction_types: tuple[type],
+                 window: int = 6,
+                 next_hop_table: Optional[NextHopTable] = None,
+                 pathfinder: Optional[Pathfinder] = None):
+        self.setCoordsToTile(coords_to_tile)
+        self.setTargetDistanceField(target_distance_field)
+        self.setDynamicObstructionTypes(dynamic_obstruction_types)
+        self.setWindow(window)
+        self.setNextHopTable(next_hop_table)
+        self.setPathfinder(pathfinder)
+        self.setReservations(set())
+        self.setNumExpanded(0)
+
+    # Getters
+    def getCoordsToTile(self) -> dict[tuple[int, int], Tile]:
+        return self.__coords_to_tile
+    def getTargetDistanceField(self) -> IncrementalDistanceField:
+        return self.__target_distance_field
+    def getDynamicObstructionTypes(self) -> tuple[type]:
+        return self.__dynamic_obstruction_types
+    def getWindow(self) -> int:
+        return self.__window
+    def getNextHopTable(self) -> Optional[NextHopTable]:
+        return self.__next_hop_table
+    def getPathfinder(self) -> Optional[Pathfinder]:
+        return self.__pathfinder
+    def getReservations(self) -> set[tuple[int, int, int]]:
+        return self.__reservations
+    def getNumExpanded(self) -> int:
+        return self.__num_expanded
+
+    # Setters
+    def setCoordsToTile(self, coords_to_tile):
+        self.__coords_to_tile = coords_to_tile
+    def setTargetDistanceField(self, target_distance_field):
+        self.__target_distance_field = target_distance_field
+    def setDynamicObstructionTypes(self, dynamic_obstruction_types):
+        self.__dynamic_obstruction_types = dynamic_obstruction_types
+    def setWindow(self, window):
+        self.__window = window
+    def setNextHopTable(self, next_hop_table):
+        self.__next_hop_table = next_hop_table
+    def setPathfinder(self, pathfinder):
+        self.__pathfinder = pathfinder
+    def setReservations(self, reservations):
+        self.__reservations = reservations
+    def setNumExpanded(self, num_expanded):
+        self.__num_expanded = num_expanded
+
+    # Methods
+    def getTargetCoords(self) -> tuple[int, int]:
+        """Returns the coords that all enemies are moving towards."""
+        return self.getTargetDistanceField().getSourceCoords()
+
+    def planMove(self, starting_coords: tuple[int, int]) -> Optional[str]:
+        """Plans the path of a single enemy from starting_coords, and reserves it.
+
+        The route from next_hop_table is used if it is clear (see findTableRoute()), else the 
+        weighted path from pathfinder if it is clear (see findWeightedRoute()), else a windowed search 
+        is made (see findWindowedPath()).
+        Returns the first movement direction of the planned path.
+        Returns None if the enemy should not move this turn (it has to wait, 
+        or no path to target_coords exists).
+        """
+        path = self.findTableRoute(starting_coords)
+        if path != None:
+            METRICS.increment('plan_move.table_routes')
+        else:
+            path = self.findWeightedRoute(starting_coords)
+            if path != None:
+                METRICS.increment('plan_move.weighted_routes')
+            else:
+                path = self.findWindowedPath(starting_coords)
+                METRICS.increment('plan_move.windowed_searches')
+        if path == 'path not found':
+            self.reserveStationary(starting_coords)
+            return None
+        self.reservePath(starting_coords, path)
+        if path == [] or path[0] == 'wait':
+            return None
+        return path[0]
+
+    def findTableRoute(self, starting_coords: tuple[int, int]) -> Optional[list[str]]:
+        """Attempts to get the path from starting_coords to target_coords from next_hop_table.
+
+        The route is only used if it is clear (see isRouteClear()).
+        As the route is a shortest path around walls, it is then also an optimal path 
+        for findWindowedPath().
+        Returns the route (truncated to the window), or None if it cannot be used.
+        """
+        next_hop_table = self.getNextHopTable()
+        if next_hop_table == None:
+            return None
+        route = next_hop_table.getRoute(starting_coords, self.getTargetCoords())
+        if route == 'path not found':
+            return None
+        route = route[:self.getWindow()]
+        if not self.isRouteClear(starting_coords, route):
+            return None
+        return route
+
+    def findWeightedRoute(self, starting_coords: tuple[int, int]) -> Optional[list[str]]:
+        """Attempts to get a path from starting_coords towards target_coords from a weighted search 
+        of pathfinder (see Pathfinder.findWeightedPath()), where tiles occupied by dynamic 
+        obstructions can be passed through at an additional cost of DYNAMIC_TILE_PENALTY.
+
+        The search is made to the waypoint of starting_coords (see findWaypoint()) rather than 
+        target_coords, so that it stays within about a window of starting_coords.
+        The path is only used if it is clear (see isRouteClear()): it then goes around 
+        the dynamic obstructions, without waiting for them to move.
+        Returns the path (truncated to the window), or None if it cannot be used.
+        """
+        pathfinder = self.getPathfinder()
+        if pathfinder == None or starting_coords not in self.getTargetDistanceField().getDistances():
+            return None
+        obstruction_entity_types = self.getTargetDistanceField().getObstructionEntityTypes()
+        route = pathfinder.findWeightedPath(self.getCoordsToTile(), obstruction_entity_types, 
+                                            self.getDynamicObstructionTypes(), starting_coords, 
+                                            self.findWaypoint(starting_coords), self.DYNAMIC_TILE_PENALTY)
+        if route == 'path not found':
+            return None
+        route = route[:self.getWindow()]
+        if not self.isRouteClear(starting_coords, route):
+            return None
+        return route
+
+    def findWaypoint(self, starting_coords: tuple[int, int]) -> tuple[int, int]:
+        """Returns the coords a window of steps from starting_coords along a shortest path to target_coords
+        (ignoring dynamic obstructions), by descending the target distances. 
+        Returns target_coords if it is closer.
+        """
+        target_distance_field = self.getTargetDistanceField()
+        target_distances = target_distance_field.getDistances()
+        coords = starting_coords
+        for _ in range(self.getWindow()):
+            distance = target_distances[coords]
+            if distance == 0:
+                break
+            for neighbour_coords in target_distance_field.getNeighbours(coords):
+                if target_distances.get(neighbour_coords) == distance - 1:
+                    coords = neighbour_coords
+                    break
+        return coords
+
+    def isRouteClear(self, 
+                     starting_coords: tuple[int, int], 
+                     route: list[str]) -> bool:
+        """Returns whether none of the tiles of route (before target_coords) are obstructed, 
+        occupied by a dynamic obstruction, or reserved at the time they would be entered.
+        """
+        target_coords = self.getTargetCoords()
+        coords_to_tile = self.getCoordsToTile()
+        target_distances = self.getTargetDistanceField().getDistances()
+        reservations = self.getReservations()
+        coords = starting_coords
+        for time, direction in enumerate(route, start=1):
+            coords = getDestinationCoords(coords, direction)
+            if coords == target_coords:
+                break
+            if (coords not in target_distances or (coords[0], coords[1], time) in reservations or 
+                    isinstance(coords_to_tile[coords].getOccupiedBy(), self.getDynamicObstructionTypes())):
+                return False
+        return True
+
+    def findWindowedPath(self, starting_coords: tuple[int, int]) -> list[str] | str:
+        """Space-time A* search from starting_coords towards target_coords.
+
+        Each step is either a movement direction or 'wait'. A step to (coords, time) 
+        is not allowed if those coords are reserved at that time, or if it is the 
+        first step and the coords are occupied by a dynamic obstruction.
+        The search ends once target_coords is reached, or once a path is 
+        window steps long (as the target distances are exact distances ignoring 
+        dynamic obstructions, that partial path still leads towards the target).
+
+        Returns the list of steps, or 'path not found' if target_coords is unreachable.
+        """
+        target_coords = self.getTargetCoords()
+        target_distances = self.getTargetDistanceField().getDistances()
+        if starting_coords not in target_distances:
+            return 'path not found'
+        coords_to_tile = self.getCoordsToTile()
+        reservations = self.getReservations()
+        dynamic_obstruction_types = self.getDynamicObstructionTypes()
+        window = self.getWindow()
+
+        # Heap entries: (estimated total cost, -time, insertion order, coords).
+        # Time doubles as cost travelled, as every step costs 1. Ties are broken 
+        # in favour of the longest path, so that the search follows optimal paths depth-first.
+        num_pushed = 0
+        open_heap = [(target_distances[starting_coords], 0, num_pushed, starting_coords)]
+        came_from = {(starting_coords, 0): None} # (coords, time) -> (previous state, step)
+        while open_heap:
+            _, negative_time, _, coords = heappop(open_heap)
+            time = -negative_time
+            self.setNumExpanded(self.getNumExpanded() + 1)
+            if coords == target_coords or time == window:
+                return self.reconstructPath(came_from, (coords, time))
+            for step in ['right', 'left', 'up', 'down', 'wait']:
+                if step == 'wait':
+                    dest_coords = coords
+                else:
+                    dest_coords = getDestinationCoords(coords, step)
+                dest_state = (dest_coords, time + 1)
+                if dest_coords not in target_distances or dest_state in came_from:
+                    continue
+                if (dest_coords[0], dest_coords[1], time + 1) in reservations:
+                    continue
+                # Tiles occupied by other moving entities are only obstructed for the next move.
+                if (time == 0 and dest_coords != starting_coords and dest_coords != target_coords and
+                        isinstance(coords_to_tile[dest_coords].getOccupiedBy(), dynamic_obstruction_types)):
+                    continue
+                came_from[dest_state] = ((coords, time), step)
+                num_pushed += 1
+                heappush(open_heap, (time + 1 + target_distances[dest_coords], -(time + 1), 
+                                     num_pushed, dest_coords))
+        return 'path not found'
+    
+    def reconstructPath(self,
+                        came_from: dict[tuple[tuple[int, int], int], Optional[tuple]],
+                        final_state: tuple[tuple[int, int], int]) -> list[str]:
+        """Returns the list of steps leading to final_state, using came_from."""
+        path = []
+        state = final_state
+        while came_from[state] != None:
+            state, step = came_from[state]
+            path.append(step)
+        path.reverse()
+        return path
+
+    def reservePath(self, 
+                    starting_coords: tuple[int, int], 
+                    path: list[str]) -> None:
+        """Reserves the coords of each step of path at the time they are occupied.
+
+        The target coords are never reserved, as the enemy will not enter them.
+        The last reserved coords remain reserved until the end of the window.
+        """
+        reservations = self.getReservations()
+        coords = starting_coords
+        time = 0
+        for step in path:
+            if step != 'wait':
+                dest_coords = getDestinationCoords(coords, step)
+                if dest_coords == self.getTargetCoords():
+                    break
+                coords = dest_coords
+            time += 1
+            reservations.add((coords[0], coords[1], time))
+        for remaining_time in range(time + 1, self.getWindow() + 1):
+            reservations.add((coords[0], coords[1], remaining_time))
+
+    def reserveStationary(self, coords: tuple[int, int]) -> None:
+        """Reserves coords for the whole window, for an enemy that is not moving this turn."""
+        self.reservePath(coords, [])
@@ -0,0 +1,210 @@
+import os
+import time
+import struct
+import shutil
+import pygame
+from typing import Any, Optional
+from world_save import WorldSave
+from turn_journal import TurnJournal
+
+class SaveSlots:
+    """Class containing methods to manage the save slots in SAVE_DIR.
+
+    Each slot has a save file (see WorldSave) and a turn journal directory (see TurnJournal).
+    The index file holds a small fixed-size header for each slot (followed by a fixed-size thumbnail
+    for each slot), so that slots can be listed by reading only the headers, without reading any save.
+
+    Index layout (little-endian):
+        Index header: magic (4 bytes, b'WSIX'), version (u16), number of slots (u16).
+        Slot header, for each slot: is used (bool), current level name (32 bytes, utf-8, zero padded),
+            character level (u16), turn number (u32), timestamp (f64, seconds since the epoch),
+            offset of thumbnail in the index file (u32, 0 if there is no thumbnail).
+        Thumbnail, for each slot: THUMBNAIL_SIZE RGB pixels.
+
+    If the index does not exist, it is created, and the single save file of previous versions
+    (WorldSave.SAVE_PATH, or WorldSave.LEGACY_SAVE_PATH) is migrated into slot 0 (see createIndex()).
+
+    Slot headers are returned as dicts with keys:
+        'level_name', 'character_level', 'turn_number', 'timestamp', 'thumbnail_offset'.
+    """
+
+    SAVE_DIR = 'gameinfostorage/saves'
+    NUM_SLOTS = 6
+    INDEX_MAGIC = b'WSIX'
+    INDEX_VERSION = 1
+    INDEX_HEADER_FORMAT = '<4sHH'
+    SLOT_HEADER_FORMAT = '<?32sHIdI'
+    THUMBNAIL_SIZE = (96, 96)
+
+    # Methods
+    def readHeaders(self) -> list[Optional[dict[str, Any]]]:
+        """Returns the header of each slot (None if the slot is unused), reading only the slot headers.
+
+        Raises ValueError if the index file is not an index file (and OSError if it cannot be read).
+        """
+        if not self.hasIndex():
+            self.createIndex()
+        index_header_size = struct.calcsize(self.INDEX_HEADER_FORMAT)
+        slot_header_size = struct.calcsize(self.SLOT_HEADER_FORMAT)
+        with open(self.getIndexPath(), 'rb') as file:
+            data = file.read(index_header_size + self.NUM_SLOTS * slot_header_size)
+        if len(data) < index_header_size + self.NUM_SLOTS * slot_header_size:
+            raise ValueError(f"Index file ({self.getIndexPath()}) is too short.")
+        magic, version, num_slots = struct.unpack_from(self.INDEX_HEADER_FORMAT, data, 0)
+        if magic != self.INDEX_MAGIC or version != self.INDEX_VERSION or num_slots != self.NUM_SLOTS:
+            raise ValueError(f"File ({self.getIndexPath()}) is not a save index file.")
+        headers = []
+        for slot in range(self.NUM_SLOTS):
+            is_used, level_name, character_level, turn_number, timestamp, thumbnail_offset = \
+                struct.unpack_from(self.SLOT_HEADER_FORMAT, data, index_header_size + slot * slot_header_size)
+            if is_used:
+                headers.append({'level_name': level_name.rstrip(b'\0').decode(errors='ignore'),
+                                'character_level': character_level, 'turn_number': turn_number,
+                                'timestamp': timestamp, 'thumbnail_offset': thumbnail_offset})
+            else:
+                headers.append(None)
+        return headers
+
+    def readThumbnail(self, header: dict[str, Any]) -> Optional[pygame.Surface]:
+        """Returns the thumbnail of the slot with header, or None if it has no thumbnail (or it is cut short).
+        Reads only the thumbnail.
+        """
+        if header['thumbnail_offset'] == 0:
+            return None
+        thumbnail_bytes = self.THUMBNAIL_SIZE[0] * self.THUMBNAIL_SIZE[1] * 3
+        with open(self.getIndexPath(), 'rb') as file:
+            file.seek(header['thumbnail_offset'])
+            data = file.read(thumbnail_bytes)
+        if len(data) < thumbnail_bytes:
+            return None
+        return pygame.image.frombytes(data, self.THUMBNAIL_SIZE, 'RGB')
+
+    def writeSlot(self, slot: int, save_info: dict[str, Any]) -> None:
+        """Writes save_info (see WorldSave) to the slot's save file, then updates the slot's header.
+
+        save_info may have the key 'thumbnail': RGB bytes of a THUMBNAIL_SIZE image of the world.
+        """
+        if not self.hasIndex():
+            self.createIndex()
+        WorldSave().writeSave(save_info, self.getSlotPath(slot))
+        self.writeSlotHeader(slot, save_info)
+
+    def writeSlotHeader(self, 
+                        slot: int, 
+                        save_info: dict[str, Any], 
+                        index_path: Optional[str] = None) -> None:
+        """Writes the slot's header (and thumbnail, if save_info has one) in place in the index file
+        (or the index file at index_path).
+        """
+        thumbnail = save_info.get('thumbnail')
+        thumbnail_offset = 0
+        if index_path == None:
+            index_path = self.getIndexPath()
+        with open(index_path, 'r+b') as file:
+            if thumbnail != None:
+                thumbnail_offset = self.getThumbnailOffset(slot)
+                file.seek(thumbnail_offset)
+                file.write(thumbnail)
+            slot_header_size = struct.calcsize(self.SLOT_HEADER_FORMAT)
+            file.seek(struct.calcsize(self.INDEX_HEADER_FORMAT) + slot * slot_header_size)
+            file.write(struct.pack(self.SLOT_HEADER_FORMAT, True, save_info['level_name'].encode()[:32],
+                                   save_info['stats'][6], save_info['turn_number'], time.time(), 
+                                   thumbnail_offset))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def hasIndex(self) -> bool:
+        """Returns True/False for whether the index file exists."""
+        return os.path.exists(self.getIndexPath())
+
+    def createIndex(self) -> bool:
+        """Creates the index file with every slot unused, migrating the save file of previous versions
+        (if any) into slot 0.
+
+        The index is built in a temporary file, which only replaces the index file once the migration 
+        has finished, so a crash while creating it leaves no index (and creation is retried).
+        If the previous save cannot be migrated (it is corrupted or cannot be read), it is left in place
+        and slot 0 is left unused. Returns False if so, else True.
+        """
+        os.makedirs(self.SAVE_DIR, exist_ok=True)
+        temp_path = self.getIndexPath() + '.tmp'
+        self.writeEmptyIndex(temp_path)
+        is_migrated = True
+        try:
+            save_info = self.readPreviousSave()
+        except (ValueError, OSError): # The previous save is left in place, and slot 0 unused.
+            save_info = None
+            is_migrated = False
+        if save_info != None:
+            WorldSave().writeSave(save_info, self.getSlotPath(0))
+            self.writeSlotHeader(0, save_info, temp_path)
+            previous_journal_dir = TurnJournal().getJournalDir() # Turn journal of the previous single save.
+            if os.path.isdir(previous_journal_dir):
+                shutil.rmtree(self.getJournalDir(0), ignore_errors=True)
+                os.replace(previous_journal_dir, self.getJournalDir(0))
+        os.replace(temp_path, self.getIndexPath())
+        return is_migrated
+
+    def readPreviousSave(self) -> Optional[dict[str, Any]]:
+        """Returns the save info of the save file of previous versions: WorldSave.SAVE_PATH, 
+        else WorldSave.LEGACY_SAVE_PATH (if not empty). Returns None if there is neither.
+
+        Raises ValueError if the save file is corrupted (and OSError if it cannot be read).
+        """
+        world_save = WorldSave()
+        if os.path.exists(WorldSave.SAVE_PATH):
+            return world_save.readSave(WorldSave.SAVE_PATH)
+        if os.path.exists(WorldSave.LEGACY_SAVE_PATH) and os.path.getsize(WorldSave.LEGACY_SAVE_PATH) > 0:
+            with open(WorldSave.LEGACY_SAVE_PATH, 'r') as file:
+                return world_save.readLegacySave(file.readlines())
+        return None
+
+    def rebuildIndex(self) -> None:
+        """Replaces the index file (e.g. if it is corrupted) with one rebuilt from the slots' save files:
+        each slot whose save file can be read is used (without a thumbnail), and every other slot is unused.
+        """
+        os.makedirs(self.SAVE_DIR, exist_ok=True)
+        temp_path = self.getIndexPath() + '.tmp'
+        self.writeEmptyIndex(temp_path)
+        world_save = WorldSave()
+        for slot in range(self.NUM_SLOTS):
+            if not os.path.exists(self.getSlotPath(slot)):
+                continue
+            try:
+                save_info = world_save.readSave(self.getSlotPath(slot))
+            except ValueError: # Corrupted save, so the slot is left unused.
+                continue
+            self.writeSlotHeader(slot, save_info, temp_path)
+        os.replace(temp_path, self.getIndexPath())
+
+    def writeEmptyIndex(self, path: str) -> None:
+        """Writes an index file with every slot unused to path."""
+        thumbnail_bytes = self.THUMBNAIL_SIZE[0] * self.THUMBNAIL_SIZE[1] * 3
+        with open(path, 'wb') as file:
+            file.write(struct.pack(self.INDEX_HEADER_FORMAT, self.INDEX_MAGIC, self.INDEX_VERSION, 
+                                   self.NUM_SLOTS))
+            file.write(bytes(self.NUM_SLOTS * (struct.calcsize(self.SLOT_HEADER_FORMAT) + thumbnail_bytes)))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def findNewGameSlot(self, headers: list[Optional[dict[str, Any]]]) -> int:
+        """Returns the slot for a new game: the first unused slot, else the least recently saved slot."""
+        for slot, header in enumerate(headers):
+            if header == None:
+                return slot
+        return min(range(self.NUM_SLOTS), key=lambda slot: headers[slot]['timestamp'])
+
+    def getIndexPath(self) -> str:
+        return os.path.join(self.SAVE_DIR, 'index.bin')
+
+    def getSlotPath(self, slot: int) -> str:
+        return os.path.join(self.SAVE_DIR, f"slot_{slot}.wsav")
+
+    def getJournalDir(self, slot: int) -> str:
+        return os.path.join(self.SAVE_DIR, f"journal_{slot}")
+
+    def getThumbnailOffset(self, slot: int) -> int:
+        """Returns the offset of the slot's thumbnail in the index file."""
+        thumbnail_bytes = self.THUMBNAIL_SIZE[0] * self.THUMBNAIL_SIZE[1] * 3
+        slot_headers_size = self.NUM_SLOTS * struct.calcsize(self.SLOT_HEADER_FORMAT)
+        return struct.calcsize(self.INDEX_HEADER_FORMAT) + slot_headers_size + slot * thumbnail_bytes
@@ -0,0 +1,116 @@
+import queue
+import threading
+from typing import Any, Optional
+from save_slots import SaveSlots
+from game_event import GameEvent
+
+class SaveWriter:
+    """Class that writes saves on a background writer thread, so that saving
+    does not do file I/O on the frame that requested it.
+
+    Save info (see WorldSave) is written to a save slot (see SaveSlots). It is a snapshot taken when the save is requested, which is not
+    changed afterwards, so it can be packed and written while the game continues.
+    At most max_pending_saves saves wait to be written: if the queue is full, the oldest waiting
+    save is replaced, as it would be overwritten by the newer one anyway.
+    The outcome of each save is reported as a game event, collected with collectReportedEvents().
+
+    Attributes:
+        save_queue (queue.Queue): Bounded queue of (save slot, save info) waiting to be written.
+            None tells the writer thread to stop.
+        reported_events (queue.Queue): Game events (MESSAGE) reporting completed/failed saves.
+        thread (Optional[threading.Thread]): Writer thread. Started by the first save request.
+        written_turn_number (Optional[int]): Turn number of the last save written (see TurnJournal). 
+            None if no save has been written.
+    """
+
+    # Attributes
+    __save_queue = None
+    __reported_events = None
+    __thread = None
+    __written_turn_number = None
+
+    # Constructor
+    def __init__(self, max_pending_saves: int = 2):
+        self.setSaveQueue(queue.Queue(max_pending_saves))
+        self.setReportedEvents(queue.Queue())
+        self.setThread(None)
+        self.setWrittenTurnNumber(None)
+
+    # Getters
+    def getSaveQueue(self) -> queue.Queue:
+        return self.__save_queue
+    def getReportedEvents(self) -> queue.Queue:
+        return self.__reported_events
+    def getThread(self) -> Optional[threading.Thread]:
+        return self.__thread
+    def getWrittenTurnNumber(self) -> Optional[int]:
+        return self.__written_turn_number
+
+    # Setters
+    def setSaveQueue(self, save_queue):
+        self.__save_queue = save_queue
+    def setReportedEvents(self, reported_events):
+        self.__reported_events = reported_events
+    def setThread(self, thread):
+        self.__thread = thread
+    def setWrittenTurnNumber(self, written_turn_number):
+        self.__written_turn_number = written_turn_number
+
+    # Methods
+    def requestSave(self, save_slot: int, save_info: dict[str, Any]) -> None:
+        """Queues save_info to be written to save_slot. Never blocks."""
+        save_queue = self.getSaveQueue()
+        while True:
+            try:
+                save_queue.put_nowait((save_slot, save_info))
+                break
+            except queue.Full:
+                # Replaces the oldest waiting save.
+                try:
+                    save_queue.get_nowait()
+                    save_queue.task_done()
+                except queue.Empty:
+                    pass
+        if self.getThread() == None:
+            thread = threading.Thread(target=self.run, name='SaveWriter', daemon=True)
+            self.setThread(thread)
+            thread.start()
+
+    def run(self) -> None:
+        """Main function of the writer thread. Writes queued saves until None is queued."""
+        save_queue = self.getSaveQueue()
+        save_slots = SaveSlots()
+        while True:
+            queued_save = save_queue.get()
+            if queued_save == None:
+                save_queue.task_done()
+                return
+            save_slot, save_info = queued_save
+            try:
+                save_slots.writeSlot(save_slot, save_info)
+                self.setWrittenTurnNumber(save_info['turn_number'])
+                self.getReportedEvents().put(GameEvent(GameEvent.MESSAGE, "Game saved."))
+            except (OSError, ValueError) as error:
+                self.getReportedEvents().put(GameEvent(GameEvent.MESSAGE, f"Game could not be saved: {error}"))
+            finally:
+                save_queue.task_done()
+
+    def collectReportedEvents(self) -> list[GameEvent]:
+        """Returns (and removes) the game events reported since the last call. Never blocks."""
+        events = []
+        reported_events = self.getReportedEvents()
+        while not reported_events.empty():
+            events.append(reported_events.get_nowait())
+        return events
+
+    def waitUntilWritten(self) -> None:
+        """Blocks until every queued save has been written (e.g. before the game quits)."""
+        if self.getThread() != None:
+            self.getSaveQueue().join()
+
+    def stop(self) -> None:
+        """Writes the queued saves, then stops the writer thread."""
+        if self.getThread() != None:
+            self.getSaveQueue().put(None)
+            self.getThread().join()
+            self.setThread(None)
@@ -7,6 +7,8 @@ from attack import Attack
 from random import randint
 from math import sqrt, ceil, floor
 from sprites.entity import Entity
+from component_store import ComponentStore
+from game_event import GameEvent
 
 class ActiveEntity(Entity, ABC):
     """Abstract class that represents 'active' (moving/battling) entities
@@ -29,8 +31,15 @@ class ActiveEntity(Entity, ABC):
         weapon (Weapon): Currently held weapon
         is_alive (bool): Whether entity's is alive: health above 0 or not
         healthbar (Healthbar): Healthbar of entity
+        speed (int): How often the entity acts, relative to TurnScheduler.DEFAULT_SPEED (100).
+        is_surf_outdated (bool): Whether a field shown on surf (health, max_health or weapon) has changed
+            since surf was last updated. Set by change observers (see Entity), so that surf is only
+            redrawn by refreshSurf() when needed.
     """
 
+    COMPONENTS = frozenset({ComponentStore.POSITION, ComponentStore.HEALTH, ComponentStore.BLOCKER})
+    IS_CHARACTER = False # Whether the entity is the character controlled by the player.
+
     # Attributes
     __entity_image = None 
     __name = None
@@ -41,6 +50,8 @@ class ActiveEntity(Entity, ABC):
     __weapon = None
     __is_alive = None
     __healthbar = None
+    __speed = None
+    __is_surf_outdated = None
 
     # Constructor
     def __init__(self, 
@@ -65,9 +76,12 @@ class ActiveEntity(Entity, ABC):
         self.setWeapon(weapon)
         self.setIsAlive(is_alive)
         self.setHealthbar(healthbar)
-        # Updates the display of entity surface.
+        self.setSpeed(100)
+        # Updates the display of entity surface, and redraws it whenever a field shown on it changes.
         self.updateHealthbar()
         self.updateSurf()
+        for field in ('health', 'max_health', 'weapon'):
+            self.addChangeObserver(field, self.handleAppearanceChange)
 
     # Getters
     def getEntityImage(self) -> pygame.Surface:
@@ -88,6 +102,10 @@ class ActiveEntity(Entity, ABC):
         return self.__is_alive
     def getHealthbar(self) -> Healthbar:
         return self.__healthbar
+    def getSpeed(self) -> int:
+        return self.__speed
+    def getIsSurfOutdated(self) -> bool:
+        return self.__is_surf_outdated
 
     # Setters
     def setHealth(self, health):
@@ -95,6 +113,7 @@ class ActiveEntity(Entity, ABC):
         
         If health == 0, sets is_alive to False.
         """
+        previous_health = self.__health
         if health < 0:
             self.__health = 0
             self.setIsAlive(False)
@@ -102,23 +121,36 @@ class ActiveEntity(Entity, ABC):
             self.__health = self.getMaxHealth()
         else:
             self.__health = health
+        self.notifyChange('health', previous_health, self.__health)
 
     def setEntityImage(self, entity_image):
         self.__entity_image = entity_image
     def setName(self, name):
         self.__name = name
     def setStrength(self, strength):
+        previous_strength = self.__strength
         self.__strength = strength
+        self.notifyChange('strength', previous_strength, strength)
     def setDefence(self, defence):
+        previous_defence = self.__defence
         self.__defence = defence
+        self.notifyChange('defence', previous_defence, defence)
     def setMaxHealth(self, max_health):
+        previous_max_health = self.__max_health
         self.__max_health = max_health
+        self.notifyChange('max_health', previous_max_health, max_health)
     def setWeapon(self, weapon):
+        previous_weapon = self.__weapon
         self.__weapon = weapon
+        self.notifyChange('weapon', previous_weapon, weapon)
     def setIsAlive(self, is_alive):
         self.__is_alive = is_alive
     def setHealthbar(self, healthbar):
         self.__healthbar = healthbar
+    def setSpeed(self, speed):
+        self.__speed = speed
+    def setIsSurfOutdated(self, is_surf_outdated):
+        self.__is_surf_outdated = is_surf_outdated
         
     # Methods
     def updateSurf(self) -> None:
@@ -130,8 +162,18 @@ class ActiveEntity(Entity, ABC):
         surf.blit(self.getHealthbar().getSurf(), (0, 48))
         surf.blit(self.getWeapon().getSurf(), (32, 0))
         self.setSurf(surf)
+        self.setIsSurfOutdated(False)
         return
 
+    def refreshSurf(self) -> None:
+        """Updates surf only if a field shown on it has changed since it was last updated."""
+        if self.getIsSurfOutdated():
+            self.updateSurf()
+
+    def handleAppearanceChange(self, previous_value, value) -> None:
+        """Change observer of health, max_health and weapon. Marks surf as outdated."""
+        self.setIsSurfOutdated(True)
+
     def updateHealthbar(self):
         """Updates healthbar attributes, and its surface."""
         healthbar = self.getHealthbar()
@@ -139,13 +181,13 @@ class ActiveEntity(Entity, ABC):
         healthbar.setEntityHealth(self.getHealth())
         healthbar.updateSurf()
 
-    def useAttack(self, attack: Attack, target) -> list[str]:
+    def useAttack(self, attack: Attack, target) -> list[GameEvent]:
         """Runs an attack.
 
-        Returns a list of two/three strings representing:
-            - The user/name/target of the attack.
-            - The result of the attack.
-            - (Optional) that the target fainted.
+        Returns a list of two/three game events representing:
+            - The user/name/target of the attack (ATTACK).
+            - The result of the attack (DAMAGE or MISS).
+            - (Optional) that the target fainted (FAINT).
         NOTE: This method does not check if the target is in range.
         Args:
             attack (Attack): The attack being used.
@@ -155,15 +197,16 @@ class ActiveEntity(Entity, ABC):
         accuracy = attack.getAccuracy()
         acc_roll = randint(1, 100)
         events = []
-        events.append(f'{self.getName()} used {attack.getName()} on {target.getName()}.')
+        events.append(GameEvent(GameEvent.ATTACK, self.getName(), attack.getName(), target.getName(), 
+                                self.IS_CHARACTER))
         if acc_roll <= accuracy:
             raw_damage = self.calcRawDamage(power)
             damage_taken = target.takeDamage(raw_damage)
-            events.append(f'{target.getName()} took {damage_taken} damage!')
+            events.append(GameEvent(GameEvent.DAMAGE, target.getName(), damage_taken))
             if not target.getIsAlive():
-                events.append(f'{target.getName()} fainted!')
+                events.append(GameEvent(GameEvent.FAINT, target.getName()))
         else:
-            events.append('The attack missed!')
+            events.append(GameEvent(GameEvent.MISS))
         return events
 
     def calcRawDamage(self, power: int) -> int:
@@ -176,7 +219,10 @@ class ActiveEntity(Entity, ABC):
         
         If dead, kill()'s self. 
         Returns the damage taken."""
-        defence = self.getDefence()
-        damage_taken = ceil((0.995)**defence * damage)
+        damage_taken = self.calcDamageTaken(damage)
         self.setHealth(self.getHealth() - damage_taken)
-        return damage_taken
\ No newline at end of file
+        return damage_taken
+
+    def calcDamageTaken(self, damage: int) -> int:
+        """Returns the damage that would be taken from damage, after defence."""
+        return ceil((0.995)**self.getDefence() * damage)
\ No newline at end of file
@@ -1,50 +1,470 @@
 import pygame
-from sprites.tile import Tile
+from array import array
+from component_store import ComponentStore
+from sprites.tile import TileMap
+from pathfinder import NextHopTable
+from typing import Optional, Callable, Iterator
+from collections import OrderedDict
+from camera import Camera
+from metrics import METRICS
 
 class Board(pygame.sprite.Sprite):
-    """Class that represents the game board sprite. 
+    """Class that represents the game board sprite.
 
     NOTE: Board coordinates start from top-left (0,0).
     They increase going down and going right.
 
+    Boards may be any size. Rather than one surface for the whole board, the board is split
+    into square chunks of CHUNK_SIZE x CHUNK_SIZE tiles, and a chunk's surface is only drawn
+    once it is inside the camera's viewport. Only the most recently drawn chunk surfaces are kept.
+
+    Tiles are stored compactly in flat grids with one cell per coords (index ycoord*width + xcoord),
+    rather than as an object per tile: a cell's tile type (index into TILE_TYPES, or NO_TILE if there is
+    no tile at its coords), accessibility, damage and occupant. Tile objects are views of one cell,
+    created by the coords_to_tile mapping (see TileMap) when they are looked up.
+
     Attributes:
-        surf (pygame.Surface): Surface representing board. Size: 768 x 768
-        coords_to_tile (dict[tuple[int, int], Tile]): Dictionary that relates coordinate tuples to Tiles 
+        width (int): Width of the board, in tiles.
+        height (int): Height of the board, in tiles.
+        chunk_surfs (OrderedDict[tuple[int, int], pygame.Surface]): Surfaces of drawn chunks,
+            by chunk coords, from least to most recently used.
+            Size: (CHUNK_SIZE*64) x (CHUNK_SIZE*64)
+        max_cached_chunks (int): Maximum number of chunk surfaces kept.
+        coords_to_tile (TileMap): Read-only mapping that relates coordinate tuples to Tiles
             {(xcoord, ycoord): Tile})
+        tile_types (bytearray): Tile type of each cell.
+        tile_accessible (bytearray): Whether the tile of each cell can be entered by an entity (1 or 0).
+        tile_damage (array): Damage an entity takes upon entering the tile of each cell.
+        tile_occupants (list[Optional[Entity]]): Entity occupying the tile of each cell.
+        num_tiles (int): Number of cells that have a tile.
+        component_store (ComponentStore): Occupants of the tiles, by their components, 
+            stored with the index of their cell.
+        inaccessible_coords (Optional[frozenset[tuple[int, int]]]): Coords of the inaccessible tiles.
+            None until needed, and whenever accessibility changes.
+        hazard_indices (set[int]): Indices of the cells whose tile has nonzero damage (hazards).
+            Kept up to date as tiles are added and their damage is set.
+        timed_hazards (dict[int, tuple[int, ...]]): Damage cycle of each timed hazard by cell index:
+            its damage on each turn of the cycle (see advanceTimedHazards()).
+        tile_observers (dict[int, list[Callable]]): Occupancy observers of single tiles, by cell index
+            (see Tile.addOccupancyObserver()).
+        occupancy_observers (list[Callable[[tuple[int, int], Optional[Entity], Optional[Entity]], None]]):
+            Functions called with (coords, previous occupant, new occupant) whenever any tile's occupant is set.
+        next_hop_table (Optional[NextHopTable]): All-pairs next-hop table based on the board's walls.
+            Built once the board's tiles have been added.
+        region_versions (array): Version of each region (square of REGION_SIZE x REGION_SIZE tiles, 
+            in board order), incremented whenever the occupancy or accessibility of a tile in it changes.
     """
 
+    CHUNK_SIZE = 8
+    REGION_SIZE = 4
+    # (name, colour, accessible, damage) of each tile type.
+    TILE_TYPES = (('grass', (123, 245, 10), True, 0),
+                  ('wall', (77, 77, 77), False, 0),
+                  ('lava', (209, 23, 23), True, 10))
+    NO_TILE = 255
+
     # Attributes
-    __surf = None
+    __width = None
+    __height = None
+    __chunk_surfs = None
+    __max_cached_chunks = None
     __coords_to_tile = None
+    __tile_types = None
+    __tile_accessible = None
+    __tile_damage = None
+    __tile_occupants = None
+    __num_tiles = None
+    __component_store = None
+    __inaccessible_coords = None
+    __hazard_indices = None
+    __timed_hazards = None
+    __tile_observers = None
+    __occupancy_observers = None
+    __next_hop_table = None
+    __region_versions = None
+    # Surfaces shared between all tiles of the same type.
+    __tile_type_surfs = dict()
 
     # Constructor
-    def __init__(self):
+    def __init__(self, max_cached_chunks: int = 16):
         super().__init__()
-        self.setSurf(pygame.Surface((768, 768)))
-        self.setCoordsToTile(dict())
+        self.setChunkSurfs(OrderedDict())
+        self.setMaxCachedChunks(max_cached_chunks)
+        self.setCoordsToTile(TileMap(self))
+        self.initialiseGrids(0, 0)
+        self.setTileObservers(dict())
+        self.setOccupancyObservers([])
+        self.setNextHopTable(None)
 
     # Getters
-    def getSurf(self) -> pygame.Surface:
-        return self.__surf
-    def getCoordsToTile(self) -> dict[tuple[int, int], Tile]:
+    def getWidth(self) -> int:
+        return self.__width
+    def getHeight(self) -> int:
+        return self.__height
+    def getChunkSurfs(self) -> OrderedDict:
+        return self.__chunk_surfs
+    def getMaxCachedChunks(self) -> int:
+        return self.__max_cached_chunks
+    def getCoordsToTile(self) -> TileMap:
         return self.__coords_to_tile
+    def getTileTypes(self) -> bytearray:
+        return self.__tile_types
+    def getTileAccessible(self) -> bytearray:
+        return self.__tile_accessible
+    def getTileDamage(self) -> array:
+        return self.__tile_damage
+    def getTileOccupants(self) -> list:
+        return self.__tile_occupants
+    def getNumTiles(self) -> int:
+        return self.__num_tiles
+    def getComponentStore(self) -> ComponentStore:
+        return self.__component_store
+    def getInaccessibleCoords(self) -> Optional[frozenset[tuple[int, int]]]:
+        return self.__inaccessible_coords
+    def getHazardIndices(self) -> set[int]:
+        return self.__hazard_indices
+    def getTimedHazards(self) -> dict[int, tuple[int, ...]]:
+        return self.__timed_hazards
+    def getTileObservers(self) -> dict[int, list[Callable]]:
+        return self.__tile_observers
+    def getOccupancyObservers(self) -> list[Callable]:
+        return self.__occupancy_observers
+    def getNextHopTable(self) -> Optional[NextHopTable]:
+        return self.__next_hop_table
+    def getRegionVersions(self) -> array:
+        return self.__region_versions
 
     # Setters
-    def setSurf(self, surf):
-        self.__surf = surf
+    def setWidth(self, width):
+        self.__width = width
+    def setHeight(self, height):
+        self.__height = height
+    def setChunkSurfs(self, chunk_surfs):
+        self.__chunk_surfs = chunk_surfs
+    def setMaxCachedChunks(self, max_cached_chunks):
+        self.__max_cached_chunks = max_cached_chunks
     def setCoordsToTile(self, coords_to_tile):
         self.__coords_to_tile = coords_to_tile
+    def setTileTypes(self, tile_types):
+        self.__tile_types = tile_types
+    def setTileAccessible(self, tile_accessible):
+        self.__tile_accessible = tile_accessible
+    def setTileDamage(self, tile_damage):
+        self.__tile_damage = tile_damage
+    def setTileOccupants(self, tile_occupants):
+        self.__tile_occupants = tile_occupants
+    def setNumTiles(self, num_tiles):
+        self.__num_tiles = num_tiles
+    def setComponentStore(self, component_store):
+        self.__component_store = component_store
+    def setInaccessibleCoords(self, inaccessible_coords):
+        self.__inaccessible_coords = inaccessible_coords
+    def setHazardIndices(self, hazard_indices):
+        self.__hazard_indices = hazard_indices
+    def setTimedHazards(self, timed_hazards):
+        self.__timed_hazards = timed_hazards
+    def setTileObservers(self, tile_observers):
+        self.__tile_observers = tile_observers
+    def setOccupancyObservers(self, occupancy_observers):
+        self.__occupancy_observers = occupancy_observers
+    def setNextHopTable(self, next_hop_table):
+        self.__next_hop_table = next_hop_table
+    def setRegionVersions(self, region_versions):
+        self.__region_versions = region_versions
 
     # Methods
-    def drawBoardSurface(self) -> None:
-        """Draws tile surfaces onto board surface."""
-        coords_to_tile = self.getCoordsToTile()
-        board_surf = self.getSurf()
-        # Iterating through all coordinates, and drawing tiles.
-        for xcoord, ycoord in coords_to_tile.keys():
-            tile = coords_to_tile[(xcoord, ycoord)]
-            board_surf.blit(tile.getSurf(), (xcoord*64, ycoord*64, 64, 64))
-            
-        self.setSurf(board_surf)
+    def initialiseGrids(self, width: int, height: int) -> None:
+        """Sets the board's size, and makes every cell of its grids empty (no tile).
+
+        To be run before the board's tiles are added.
+        """
+        num_cells = width * height
+        self.setWidth(width)
+        self.setHeight(height)
+        self.setTileTypes(bytearray([self.NO_TILE]) * num_cells)
+        self.setTileAccessible(bytearray(num_cells))
+        self.setTileDamage(array('i', bytes(num_cells * array('i').itemsize)))
+        self.setTileOccupants([None] * num_cells)
+        self.setNumTiles(0)
+        self.setComponentStore(ComponentStore())
+        self.setInaccessibleCoords(None)
+        self.setHazardIndices(set())
+        self.setTimedHazards(dict())
+        num_regions = -(-width // self.REGION_SIZE) * -(-height // self.REGION_SIZE)
+        self.setRegionVersions(array('L', bytes(num_regions * array('L').itemsize)))
+
+    def addTile(self, coords: tuple[int, int], tile_type: int, occupied_by) -> None:
+        """Adds a tile of tile_type (index into TILE_TYPES) at coords, occupied by occupied_by.
+
+        Occupancy observers are not notified.
+        """
+        index = coords[1] * self.getWidth() + coords[0]
+        if self.getTileTypes()[index] == self.NO_TILE:
+            self.setNumTiles(self.getNumTiles() + 1)
+        _, _, accessible, damage = self.TILE_TYPES[tile_type]
+        self.getTileTypes()[index] = tile_type
+        self.getTileAccessible()[index] = accessible
+        self.setDamageAt(index, damage)
+        if self.getTileOccupants()[index] != None:
+            self.getComponentStore().remove(index, self.getTileOccupants()[index])
+        self.getTileOccupants()[index] = occupied_by
+        if occupied_by != None:
+            self.getComponentStore().add(index, occupied_by)
+        self.setInaccessibleCoords(None)
+        self.incrementRegionVersion(index)
+
+    def getTileIndex(self, coords: tuple[int, int]) -> Optional[int]:
+        """Returns the index of the cell at coords, or None if there is no tile at coords."""
+        xcoord, ycoord = coords
+        width = self.__width
+        if 0 <= xcoord < width and 0 <= ycoord < self.__height:
+            index = ycoord * width + xcoord
+            if self.__tile_types[index] != self.NO_TILE:
+                return index
+        return None
+
+    def getIndexCoords(self, index: int) -> tuple[int, int]:
+        """Returns the coords of the cell at index."""
+        return (index % self.__width, index // self.__width)
+
+    def getTileIndices(self) -> Iterator[int]:
+        """Returns an iterator over the index of each cell that has a tile, in board order."""
+        tile_types = self.__tile_types
+        if self.__num_tiles == len(tile_types): # Every cell has a tile, e.g. a rectangular level.
+            return iter(range(len(tile_types)))
+        return (index for index, tile_type in enumerate(tile_types) if tile_type != self.NO_TILE)
+
+    def getTileName(self, index: int) -> str:
+        return self.TILE_TYPES[self.__tile_types[index]][0]
+
+    def getTileSurf(self, index: int) -> pygame.Surface:
+        """Returns the surface of the tile at index. Tiles of the same type share one surface."""
+        tile_type = self.__tile_types[index]
+        tile_type_surfs = Board.__tile_type_surfs
+        if tile_type not in tile_type_surfs:
+            surf = pygame.Surface((64, 64))
+            pygame.draw.rect(surf, (128, 128, 128), (0,0, 64, 64))
+            pygame.draw.rect(surf, self.TILE_TYPES[tile_type][1], (1, 1, 62, 62))
+            tile_type_surfs[tile_type] = surf
+        return tile_type_surfs[tile_type]
+
+    def isAccessible(self, index: int) -> bool:
+        return self.__tile_accessible[index] == 1
+
+    def setAccessibleAt(self, index: int, accessible: bool) -> None:
+        """Sets whether the tile at index can be entered by an entity."""
+        self.__tile_accessible[index] = bool(accessible)
+        self.__inaccessible_coords = None
+        self.incrementRegionVersion(index)
+
+    def getDamageAt(self, index: int) -> int:
+        return self.__tile_damage[index]
+
+    def setDamageAt(self, index: int, damage: int) -> None:
+        """Sets the damage of the tile at index, and updates the hazard index."""
+        self.__tile_damage[index] = damage
+        if damage != 0:
+            self.__hazard_indices.add(index)
+        else:
+            self.__hazard_indices.discard(index)
+
+    def setTimedHazard(self, coords: tuple[int, int], damage_cycle: tuple[int, ...]) -> None:
+        """Makes the tile at coords a timed hazard, whose damage on each turn cycles through damage_cycle.
+        An empty damage_cycle makes it an ordinary tile again (keeping its current damage).
+        """
+        index = self.getTileIndex(coords)
+        if len(damage_cycle) != 0:
+            self.getTimedHazards()[index] = tuple(damage_cycle)
+        else:
+            self.getTimedHazards().pop(index, None)
+
+    def advanceTimedHazards(self, turn_number: int) -> None:
+        """Sets the damage of each timed hazard for turn_number. Only the timed hazards are visited."""
+        for index, damage_cycle in self.getTimedHazards().items():
+            self.setDamageAt(index, damage_cycle[turn_number % len(damage_cycle)])
+
+    def getOccupiedHazardIndices(self, query: str | tuple[type] | type) -> list[int]:
+        """Returns the indices of the hazards occupied by an entity matching query
+        (a component, or entity types, see ComponentStore), in board order.
+
+        Only the smaller of the hazards and the matching entities is visited.
+        """
+        hazard_indices = self.getHazardIndices()
+        component_store = self.getComponentStore()
+        if len(hazard_indices) <= component_store.count(query):
+            tile_occupants = self.getTileOccupants()
+            matching_archetypes = component_store.getArchetypes(query)
+            occupied_hazard_indices = [index for index in hazard_indices 
+                                       if type(tile_occupants[index]) in matching_archetypes]
+        else:
+            occupied_hazard_indices = [index for index in component_store.getCells(query) if index in hazard_indices]
+        return sorted(occupied_hazard_indices)
+
+    def getOccupant(self, index: int):
+        return self.__tile_occupants[index]
+
+    def getOccupantAtPos(self, board_pos: tuple[int, int]):
+        """Returns the entity occupying the tile at board_pos (a pixel position on the board, 
+        see Camera.screenToBoardPos()), or None if there is no tile or it is unoccupied.
+        """
+        index = self.getTileIndex((board_pos[0] // 64, board_pos[1] // 64))
+        if index == None:
+            return None
+        return self.__tile_occupants[index]
+
+    def getOccupantsInRange(self, centre_coords: tuple[int, int], radius: int) -> Iterator[tuple[tuple[int, int], object]]:
+        """Yields (coords, occupant) of each occupied tile within taxicab distance radius of centre_coords.
+
+        Only the cells in range (a diamond, clipped to the board) are visited, row by row.
+        """
+        centre_xcoord, centre_ycoord = centre_coords
+        width, tile_occupants = self.__width, self.__tile_occupants
+        for ycoord in range(max(0, centre_ycoord - radius), min(self.__height - 1, centre_ycoord + radius) + 1):
+            row_radius = radius - abs(ycoord - centre_ycoord)
+            min_xcoord = max(0, centre_xcoord - row_radius)
+            row_start = ycoord * width + min_xcoord
+            row_end = ycoord * width + min(width - 1, centre_xcoord + row_radius) + 1
+            for xcoord, occupant in enumerate(tile_occupants[row_start:row_end], min_xcoord):
+                if occupant != None:
+                    yield (xcoord, ycoord), occupant
+
+    def setOccupant(self, index: int, occupied_by) -> None:
+        """Sets the occupant of the tile at index, and notifies the occupancy observers of the change."""
+        previous_occupied_by = self.__tile_occupants[index]
+        self.__tile_occupants[index] = occupied_by
+        if previous_occupied_by != None:
+            self.__component_store.remove(index, previous_occupied_by)
+        if occupied_by != None:
+            self.__component_store.add(index, occupied_by)
+        self.incrementRegionVersion(index)
+        for observer in self.__tile_observers.get(index, ()):
+            observer(previous_occupied_by, occupied_by)
+        if self.__occupancy_observers:
+            coords = self.getIndexCoords(index)
+            for observer in self.__occupancy_observers:
+                observer(coords, previous_occupied_by, occupied_by)
+
+    def incrementRegionVersion(self, index: int) -> None:
+        """Increments the version of the region containing the cell at index."""
+        width, region_size = self.__width, self.REGION_SIZE
+        regions_per_row = -(-width // region_size)
+        region_index = (index // width // region_size) * regions_per_row + (index % width) // region_size
+        self.__region_versions[region_index] += 1
+
+    def getRegionVersionsInRect(self,
+                                min_coords: tuple[int, int],
+                                max_coords: tuple[int, int]) -> tuple[int, ...]:
+        """Returns the versions of the regions overlapping the rectangle of coords from min_coords
+        to max_coords (inclusive, clipped to the board), in board order.
+
+        These are unchanged only if no tile in the rectangle has changed occupancy or accessibility.
+        """
+        region_size, region_versions = self.REGION_SIZE, self.__region_versions
+        regions_per_row = -(-self.__width // region_size)
+        min_region_x = max(0, min_coords[0]) // region_size
+        max_region_x = min(self.__width - 1, max_coords[0]) // region_size
+        versions = []
+        for region_y in range(max(0, min_coords[1]) // region_size, 
+                              min(self.__height - 1, max_coords[1]) // region_size + 1):
+            row_start = region_y * regions_per_row
+            versions.extend(region_versions[row_start + min_region_x:row_start + max_region_x + 1])
+        return tuple(versions)
+
+    def getObstructedCoords(self, obstruction: str | tuple[type] | type) -> set[tuple[int, int]]:
+        """Returns the coords of all obstructed tiles.
+
+        A tile is obstructed if it is not accessible, or contains an entity matching obstruction
+        (a component, or entity types, see ComponentStore). Only the matching entities are visited,
+        and the inaccessible tiles are kept between calls.
+        """
+        METRICS.increment('obstructed_coords.rebuilds')
+        inaccessible_coords = self.getInaccessibleCoords()
+        if inaccessible_coords == None:
+            tile_accessible = self.getTileAccessible()
+            inaccessible_coords = frozenset(self.getIndexCoords(index) for index in self.getTileIndices()
+                                            if not tile_accessible[index])
+            self.setInaccessibleCoords(inaccessible_coords)
+        obstructed_coords = set(inaccessible_coords)
+        width = self.getWidth()
+        for index in self.getComponentStore().getCells(obstruction):
+            obstructed_coords.add((index % width, index // width))
+        return obstructed_coords
+
+    def addTileObserver(self, index: int, observer: Callable) -> None:
+        """Adds a function to be called with (previous occupant, new occupant) whenever the occupant
+        of the tile at index is set.
+        """
+        self.getTileObservers().setdefault(index, []).append(observer)
+
+    def removeTileObserver(self, index: int, observer: Callable) -> None:
+        """Removes a function added by addTileObserver()."""
+        tile_observers = self.getTileObservers()
+        tile_observers[index].remove(observer)
+        if not tile_observers[index]:
+            del tile_observers[index]
+
+    def addOccupancyObserver(self,
+                             observer: Callable[[tuple[int, int], Optional[object], Optional[object]], None]) -> None:
+        """Adds a function to be called with (coords, previous occupant, new occupant)
+        whenever the occupant of any tile is set.
+        """
+        self.getOccupancyObservers().append(observer)
+
+    def removeOccupancyObserver(self,
+                                observer: Callable[[tuple[int, int], Optional[object], Optional[object]], None]) -> None:
+        """Removes a function added by addOccupancyObserver()."""
+        self.getOccupancyObservers().remove(observer)
+
+    def initialiseChunks(self) -> None:
+        """Clears all chunk surfaces.
+
+        To be run once the board's tiles have been added.
+        """
+        self.getChunkSurfs().clear()
+        return
+
+    def getChunkSurf(self, chunk_coords: tuple[int, int]) -> pygame.Surface:
+        """Returns the surface of the chunk at chunk_coords, drawing it if it isn't kept.
+
+        If more than max_cached_chunks surfaces are kept, the least recently used is removed.
+        """
+        chunk_surfs = self.getChunkSurfs()
+        if chunk_coords in chunk_surfs:
+            chunk_surfs.move_to_end(chunk_coords)
+            return chunk_surfs[chunk_coords]
+        # Drawing the tiles inside the chunk.
+        chunk_surf = pygame.Surface((self.CHUNK_SIZE*64, self.CHUNK_SIZE*64))
+        for xcoord in range(chunk_coords[0]*self.CHUNK_SIZE, (chunk_coords[0]+1)*self.CHUNK_SIZE):
+            for ycoord in range(chunk_coords[1]*self.CHUNK_SIZE, (chunk_coords[1]+1)*self.CHUNK_SIZE):
+                index = self.getTileIndex((xcoord, ycoord))
+                if index != None:
+                    chunk_surf.blit(self.getTileSurf(index), ((xcoord % self.CHUNK_SIZE)*64,
+                                                              (ycoord % self.CHUNK_SIZE)*64, 64, 64))
+        chunk_surfs[chunk_coords] = chunk_surf
+        if len(chunk_surfs) > self.getMaxCachedChunks():
+            chunk_surfs.popitem(last=False)
+        return chunk_surf
+
+    def drawVisible(self, surf: pygame.Surface, camera: Camera) -> None:
+        """Blits the chunks inside camera's viewport onto surf (a screen-sized surface)."""
+        min_xcoord, min_ycoord, max_xcoord, max_ycoord = camera.getVisibleCoordsRange()
+        chunk_pixel_size = self.CHUNK_SIZE*64
+        for chunk_x in range(min_xcoord // self.CHUNK_SIZE, max_xcoord // self.CHUNK_SIZE + 1):
+            for chunk_y in range(min_ycoord // self.CHUNK_SIZE, max_ycoord // self.CHUNK_SIZE + 1):
+                chunk_rect = pygame.Rect(chunk_x*chunk_pixel_size, chunk_y*chunk_pixel_size,
+                                         chunk_pixel_size, chunk_pixel_size)
+                surf.blit(self.getChunkSurf((chunk_x, chunk_y)), camera.boardToScreenRect(chunk_rect))
         return
-        
\ No newline at end of file
+
+    def buildNextHopTable(self) -> None:
+        """Precomputes the next-hop table for the board's current walls.
+
+        As the table's size is the square of the number of accessible tiles, it is not built
+        for boards with more than NextHopTable.MAX_TILES accessible tiles (next_hop_table stays None).
+        """
+        tile_accessible = self.getTileAccessible()
+        num_accessible_tiles = sum(1 for index in self.getTileIndices() if tile_accessible[index])
+        if num_accessible_tiles <= NextHopTable.MAX_TILES:
+            self.setNextHopTable(NextHopTable(self.getCoordsToTile()))
+        else:
+            self.setNextHopTable(None)
@@ -6,12 +6,10 @@ from sprites.healthbar import Healthbar
 from sprites.weapon import Weapon
 from attack import Attack
 from typing import Any, Optional
-from sprites.tile import Tile
-from sprites.npc import Npc
-from sprites.portal import Portal
-from sprites.entity import Entity
+from sprites.tile import Tile, TileMap
+from component_store import ComponentStore
+from game_event import GameEvent
 from movement_helper_funcs import getObstructedCoords, checkTileEnterable, getDestinationCoords
-from sprites.quest_item import QuestItem
 
 class Character(ActiveEntity):
     """Class representing a character entity.
@@ -43,6 +41,8 @@ class Character(ActiveEntity):
         health_regen (int): How much health regenerates each turn.
         quest_item_names (set[str]): Set of owned quest items' names
     """
+
+    IS_CHARACTER = True
     
     # Attributes
     __level = None
@@ -94,9 +94,13 @@ class Character(ActiveEntity):
     
     # Setters
     def setLevel(self, level):
+        previous_level = self.__level
         self.__level = level
+        self.notifyChange('level', previous_level, level)
     def setExp(self, exp):
+        previous_exp = self.__exp
         self.__exp = exp
+        self.notifyChange('exp', previous_exp, exp)
     def setSelectedAttack(self, selected_attack):
         self.__selected_attack = selected_attack
     def setEnemiesInRange(self, enemies_in_range):
@@ -109,64 +113,39 @@ class Character(ActiveEntity):
     def moveOrInteract(self,
                        direction: str, 
                        coords_to_tile: dict[tuple[int, int], Tile],
-                       num_enemies: int) -> Optional[str] | False:
+                       num_enemies: int) -> Optional[GameEvent] | False:
         """Attempts to move/interact in the specified direction.
 
-        If the tile cannot be entered:
+        If the tile cannot be entered (e.g. it has a BLOCKER entity, such as an Enemy):
             Return False.
-        If the tile contains an Npc:
-            Returns the Npc's message.
-        If the tile contains a Portal:
-            If num_enemies == 0, set the portal's is_activated to True. 
-                Return a success message.
-            Else, return an error message.
+        If the tile contains an INTERACTABLE entity (e.g. Npc, Portal, QuestItem):
+            Returns the event caused by interacting with it (see its interact()), e.g.
+            the Npc's message, or whether the Portal was entered (only if num_enemies == 0).
         If the tile is completely unoccupied:
             Move to the tile. Returns None
         """
         current_coords = (self.getXcoord(), self.getYcoord())
         destination_coords = getDestinationCoords(current_coords, direction)
         # Checking whether the destination coordinates is either obstructed 
-        # by a wall, by an enemy, or is not on the board.
-        obstructed_coords = getObstructedCoords(coords_to_tile, (ActiveEntity))
+        # by a wall, by a blocker (e.g. an enemy), or is not on the board.
+        obstructed_coords = getObstructedCoords(coords_to_tile, ComponentStore.BLOCKER)
         is_enterable = checkTileEnterable(coords_to_tile, obstructed_coords, destination_coords)
         if not is_enterable:
             return False
-        # Handling the destination tile being occupied by different entities.
+        # If occupied by an interactable entity, interacts with it.
         occupying_entity = coords_to_tile[destination_coords].getOccupiedBy()
-        # If occupied by Npc, return its message.
-        if isinstance(occupying_entity, Npc):
-            message = f"{occupying_entity.getName()} says: '{occupying_entity.getDialogue()}'"
-            return message
-        # If occupied by Portal, attempt to enter the portal
-        elif isinstance(occupying_entity, Portal):
-            event = occupying_entity.handleEnterAttempt(num_enemies, self.getQuestItemNames())
-            return event
-        # If occupied by a Quest Item, obtain the quest item.
-        elif isinstance(occupying_entity, QuestItem):
-            # If already owned, return error message.
-            if occupying_entity.getName() in self.getQuestItemNames():
-                event = (f"You already have a {occupying_entity.getName()}. "
-                          "Leave some for other adventurers.")
-            else:
-                # Adds to owned quest items.
-                event = f"You picked up the {occupying_entity.getName()}"
-                self.getQuestItemNames().add(occupying_entity.getName()) 
-                # Removes quest item from board.
-                coords_to_tile[destination_coords].setOccupiedBy(None)
-                occupying_entity.kill()
-            return event
+        if occupying_entity != None and occupying_entity.hasComponent(ComponentStore.INTERACTABLE):
+            return occupying_entity.interact(self, num_enemies, coords_to_tile)
         # Tile is unobstructed and has no entities.
-        else:
-            # Sets own coordinates/screen position.
-            self.setXcoord(destination_coords[0])
-            self.setYcoord(destination_coords[1])
-            self.updateRect()
-            # Changes coords_to_tile to reflect movement.
-            coords_to_tile[current_coords].setOccupiedBy(None)
-            coords_to_tile[destination_coords].setOccupiedBy(self)
-            return None
-
-    def attack(self, enemy) -> Optional[list[str]] | False:
+        # Sets own coordinates/screen position.
+        self.setXcoord(destination_coords[0])
+        self.setYcoord(destination_coords[1])
+        # Changes coords_to_tile to reflect movement.
+        coords_to_tile[current_coords].setOccupiedBy(None)
+        coords_to_tile[destination_coords].setOccupiedBy(self)
+        return None
+
+    def attack(self, enemy) -> Optional[list[GameEvent]] | False:
         """If enemy is in range, attacks them.
         
         Returns a list of events if the enemy was in range.
@@ -179,24 +158,27 @@ class Character(ActiveEntity):
             return False
 
     def calcEnemiesInRange(self, 
-                           coords_to_tile: dict[tuple[int, int], Tile],
+                           coords_to_tile: TileMap,
                            enemy_group: pygame.sprite.Group):
-        """Sets enemies_in_range to a list of all enemies in range of selected attack."""
+        """Sets enemies_in_range to a list of all enemies in range of selected attack.
+        
+        Only the tiles within the attack's range are visited (see Board.getOccupantsInRange()).
+        """
         enemies_in_range = []
         self_coords = (self.getXcoord(), self.getYcoord())
         selected_attack = self.getSelectedAttack()
-        obstructed_coords = getObstructedCoords(coords_to_tile, Entity)
-        for enemy in enemy_group:
-            enemy_coords = (enemy.getXcoord(), enemy.getYcoord())
-            if selected_attack.isInRange(self_coords, enemy_coords, obstructed_coords):
-                enemies_in_range.append(enemy)
+        obstructed_coords = getObstructedCoords(coords_to_tile, ComponentStore.POSITION)
+        board = coords_to_tile.getBoard()
+        for enemy_coords, occupant in board.getOccupantsInRange(self_coords, selected_attack.getRange()):
+            if enemy_group.has(occupant) and selected_attack.isInRange(self_coords, enemy_coords, obstructed_coords):
+                enemies_in_range.append(occupant)
         self.setEnemiesInRange(enemies_in_range)
 
     def gainExp(self, exp: int) -> list[Optional[str]]:
         """Increases exp, and levels up if possible.
 
         Runs updateStats() for each level up.
-        Returns a list of strings representing game events for level ups.
+        Returns a list of game events for level ups (LEVEL_UP).
         """
         original_level = self.getLevel()
         self.setExp(self.getExp() + exp)
@@ -206,8 +188,7 @@ class Character(ActiveEntity):
         while self.getExp() >= required_exp:
             self.setLevel(self.getLevel() + 1)
             hp_incr, str_incr, def_incr = self.updateStats() 
-            events.append(f"Level up! +{hp_incr} Health! +{str_incr} Strength! "
-                          f"+{def_incr} Defence!")
+            events.append(GameEvent(GameEvent.LEVEL_UP, hp_incr, str_incr, def_incr))
             self.setExp(self.getExp() - required_exp) # Subtract used exp.
             required_exp = self.calcRequiredExp() # Recalculate exp for next level.
         return events
@@ -9,9 +9,11 @@ from sprites.tile import Tile
 from sprites.portal import Portal
 from sprites.npc import Npc
 from typing import Optional, Union
-from pathfinder import Pathfinder
+from pathfinder import Pathfinder, CooperativePathfinder, NextHopTable
 from attack import Attack
 from sprites.entity import Entity
+from component_store import ComponentStore
+from game_event import GameEvent
 from movement_helper_funcs import getObstructedCoords, checkTileEnterable, getDestinationCoords
 from sprites.quest_item import QuestItem
 
@@ -19,6 +21,8 @@ class Enemy(ActiveEntity):
     """Class representing an enemy entity.
 
     Attributes:
+        id (str): Id of enemy, in enemy_id.txt.
+
         (Inherited)
         surf (pygame.Surface): Pygame surface for the enemy, onto which 
                                to blit the enemy image, weapon and healthbar.
@@ -43,6 +47,7 @@ class Enemy(ActiveEntity):
     """
 
     # Attributes
+    __id = None
     __movement_pattern = None
     __exp_yield = None
 
@@ -51,7 +56,7 @@ class Enemy(ActiveEntity):
         attribute_list = FileIdInterpreter().interpretFileInfo('gameinfostorage/enemy_id.txt', enemy_id) 
         
         # Unpacking attribute_list, and creating additional enemy attributes
-        image_name, name, strength, defence, health, weapon_id, movement_pattern, exp_yield = attribute_list 
+        image_name, name, strength, defence, health, weapon_id, movement_pattern, exp_yield = attribute_list[:8]
         strength, defence, health, exp_yield = [int(i) for i in (strength, defence, health, exp_yield)]
         weapon = Weapon(weapon_id, xcoord, ycoord)
         healthbar = Healthbar(health, health)
@@ -59,16 +64,23 @@ class Enemy(ActiveEntity):
         # Initialising enemy object. Note that health variable is used for both max_health and health.
         super().__init__(pygame.image.load(GAME_ASSETS[image_name]).convert_alpha(), # enemy image
                          name, strength, defence, health, health, weapon, True, xcoord, ycoord, healthbar)
+        self.setId(enemy_id)
         self.setMovementPattern(movement_pattern)
         self.setExpYield(exp_yield)
+        if len(attribute_list) > 8: # Speed is optional.
+            self.setSpeed(int(attribute_list[8]))
 
     # Getters
+    def getId(self):
+        return self.__id
     def getMovementPattern(self):
         return self.__movement_pattern
     def getExpYield(self):
         return self.__exp_yield
 
     # Setters
+    def setId(self, id):
+        self.__id = id
     def setMovementPattern(self, movement_pattern):
         self.__movement_pattern = movement_pattern
     def setExpYield(self, exp_yield):
@@ -77,11 +89,17 @@ class Enemy(ActiveEntity):
     # Methods
     def action(self,
                character,
-               coords_to_tile: dict[tuple[int, int], Tile]) -> list[Optional[str]]:
+               coords_to_tile: dict[tuple[int, int], Tile],
+               cooperative_pathfinder: Optional[CooperativePathfinder] = None,
+               pathfinder: Optional[Pathfinder] = None) -> list[GameEvent]:
         """Runs a single turn's action for the enemy.
 
         Attempts to attack character. If all its attacks are out of range,
         then moves towards character.
+        If cooperative_pathfinder is given, movement is planned with it (taking into account
+        the paths of enemies that acted before this one), and the tile of an enemy 
+        that does not move is reserved in it.
+        Otherwise, movement uses moveToCharacter(), with pathfinder (and its board's next-hop table) if given.
         Returns a list of game events done by the enemy.
         """
         self_coords = (self.getXcoord(), self.getYcoord())
@@ -89,16 +107,25 @@ class Enemy(ActiveEntity):
         attacks = self.getShuffledAttacks() # randomised order attacks
         # Checks whether any attack is in range.
         # If so, perform the attack, and return its results.
-        obstructed_coords = getObstructedCoords(coords_to_tile, Entity)
+        obstructed_coords = getObstructedCoords(coords_to_tile, ComponentStore.POSITION)
         for attack in attacks:
             if attack.isInRange(self_coords, character_coords, obstructed_coords):
                 events = self.useAttack(attack, character)
+                if cooperative_pathfinder != None:
+                    cooperative_pathfinder.reserveStationary(self_coords)
                 return events
         # If no attack was in range, enemy does movement.
         if self.getMovementPattern() == 'direct':
-            self.moveToCharacter(coords_to_tile, character_coords)
+            if cooperative_pathfinder != None:
+                self.moveCooperatively(coords_to_tile, cooperative_pathfinder)
+            else:
+                next_hop_table = None
+                if pathfinder != None and pathfinder.getBoard() != None:
+                    next_hop_table = pathfinder.getBoard().getNextHopTable()
+                self.moveToCharacter(coords_to_tile, character_coords, next_hop_table, pathfinder=pathfinder)
         elif self.getMovementPattern() == 'still':
-            pass
+            if cooperative_pathfinder != None:
+                cooperative_pathfinder.reserveStationary(self_coords)
         return []
 
     def getShuffledAttacks(self) -> list[Attack]:
@@ -110,31 +137,54 @@ class Enemy(ActiveEntity):
 
     def moveToCharacter(self, 
                         coords_to_tile: dict[tuple[int, int], Tile],
-                        character_coords: tuple[int, int]) -> None:
+                        character_coords: tuple[int, int],
+                        next_hop_table: Optional[NextHopTable] = None,
+                        enemy_tile_penalty: int = 12,
+                        pathfinder: Optional[Pathfinder] = None) -> None:
         """Main movement method to be called: moves enemy towards character.
 
-        First attempts to find a path between enemy and character that doesn't pass through other enemies.
-        If impossible, then attempts to find a path between enemy and character that can pass through other enemies.
-        NOTE: The reasoning for this implementation is so that even if an enemy's path to the character is blocked by 
-        other enemies, it will still keep moving to the character, based on an optimal situation without other enemies.
+        If next_hop_table is given, and no entity blocks the route it gives to the character,
+        moves along that route without searching.
+        Otherwise, finds the cheapest path between enemy and character with a single weighted search,
+        where tiles occupied by other enemies can be passed through, at an additional cost of enemy_tile_penalty.
 
-        Moves according to the first path found (using moveInDirection()).
-        Else if no path was found in either of these attempts, raises an Exception.
+        Moves according to the path found (using move()). If no path was found, does not move.
+        If pathfinder is given (e.g. one that caches paths), it is used for the search.
         """
         from sprites.character import Character
 
-        pathfinder = Pathfinder()
+        if pathfinder == None:
+            pathfinder = Pathfinder()
         self_coords = (self.getXcoord(), self.getYcoord())
-        # Finds path which doesn't pass through other enemies
-        path = pathfinder.findPath(coords_to_tile, Entity, self_coords, character_coords)
-        # If no such path, finds a path which can pass through other enemies
-        if path == 'path not found':
-            path = pathfinder.findPath(coords_to_tile, (Character,Npc,Portal,QuestItem), self_coords, character_coords)
+        # Uses the precomputed route around walls, if no entities block it.
+        if next_hop_table != None:
+            route = next_hop_table.getRoute(self_coords, character_coords)
+            if route == 'path not found':
+                return
+            if next_hop_table.isRouteClear(coords_to_tile, Entity, self_coords, route):
+                self.move(route[0], coords_to_tile)
+                return
+        # Finds the cheapest path, preferring to go around other enemies.
+        path = pathfinder.findWeightedPath(coords_to_tile, (Character,Npc,Portal,QuestItem), Enemy,
+                                           self_coords, character_coords, enemy_tile_penalty)
         if path == 'path not found':
             pass
         else: 
             self.move(path[0], coords_to_tile)
     
+    def moveCooperatively(self,
+                          coords_to_tile: dict[tuple[int, int], Tile],
+                          cooperative_pathfinder: CooperativePathfinder) -> None:
+        """Moves enemy towards character, along the path planned by cooperative_pathfinder.
+
+        The planned path avoids the tiles reserved by enemies that have already acted this turn.
+        If the enemy must wait for other enemies to move out of the way, it does not move.
+        """
+        self_coords = (self.getXcoord(), self.getYcoord())
+        direction = cooperative_pathfinder.planMove(self_coords)
+        if direction != None:
+            self.move(direction, coords_to_tile)
+
     def move(self, 
              direction: str, 
              coords_to_tile: dict[tuple[int, int], Tile]) -> None:
@@ -142,12 +192,11 @@ class Enemy(ActiveEntity):
         current_coords = (self.getXcoord(), self.getYcoord())
         destination_coords = getDestinationCoords(current_coords, direction)
         # Checking whether the destination coordinates can be entered.
-        obstructed_coords = getObstructedCoords(coords_to_tile, Entity)
+        obstructed_coords = getObstructedCoords(coords_to_tile, ComponentStore.POSITION)
         is_enterable = checkTileEnterable(coords_to_tile, obstructed_coords, destination_coords)
         if is_enterable:
             self.setXcoord(destination_coords[0])
             self.setYcoord(destination_coords[1])
-            self.updateRect()
             # Changes coords_to_tile to reflect movement.
             coords_to_tile[current_coords].setOccupiedBy(None)
             coords_to_tile[destination_coords].setOccupiedBy(self)
@@ -1,21 +1,35 @@
 import pygame
 from pygame.locals import SRCALPHA
+from typing import Any, Callable
+from component_store import ComponentStore
 
 class Entity(pygame.sprite.Sprite):
     """Class representing a board entity.
 
+    COMPONENTS are the components (see ComponentStore) that every entity of the class has,
+    which systems query instead of checking the entity's type.
+
+    Setters of fields that are displayed notify the field's change observers, so that views
+    subscribe to the fields they render and only redraw when they change, rather than every frame.
+    The rect is kept at the entity's position by observing xcoord and ycoord.
+
     Attributes:
         surf (pygame.Surface): Size: 64 x 64, transparent.
         rect (pygame.Rect): Rectangle representing entity's position.
         xcoord (int): Board xcoord of entity.
         ycoord (int): Board ycoord of entity.
+        change_observers (dict[str, list[Callable[[Any, Any], None]]]): Functions called with 
+            (previous value, new value) whenever the field they observe changes, by field name.
     """
 
+    COMPONENTS = frozenset({ComponentStore.POSITION})
+
     # Attributes
     __surf = None
     __rect = None
     __xcoord = None
     __ycoord = None
+    __change_observers = None
 
     # Constructor
     def __init__(self, 
@@ -23,10 +37,13 @@ class Entity(pygame.sprite.Sprite):
                  xcoord: int, 
                  ycoord: int):
         super().__init__()
+        self.setChangeObservers(dict())
         self.setSurf(surf)
         self.setXcoord(xcoord)
         self.setYcoord(ycoord)
         self.updateRect()
+        self.addChangeObserver('xcoord', self.handlePositionChange)
+        self.addChangeObserver('ycoord', self.handlePositionChange)
 
     # Getters
     def getSurf(self):
@@ -37,6 +54,8 @@ class Entity(pygame.sprite.Sprite):
         return self.__xcoord
     def getYcoord(self):
         return self.__ycoord
+    def getChangeObservers(self) -> dict[str, list[Callable[[Any, Any], None]]]:
+        return self.__change_observers
 
     # Setters
     def setSurf(self, surf):
@@ -44,11 +63,39 @@ class Entity(pygame.sprite.Sprite):
     def setRect(self, rect):
         self.__rect = rect
     def setXcoord(self, xcoord):
+        previous_xcoord = self.__xcoord
         self.__xcoord = xcoord
+        self.notifyChange('xcoord', previous_xcoord, xcoord)
     def setYcoord(self, ycoord):
+        previous_ycoord = self.__ycoord
         self.__ycoord = ycoord
+        self.notifyChange('ycoord', previous_ycoord, ycoord)
+    def setChangeObservers(self, change_observers):
+        self.__change_observers = change_observers
 
     # Methods
+    def hasComponent(self, component: str) -> bool:
+        """Returns whether the entity has component."""
+        return component in self.COMPONENTS
+
+    def addChangeObserver(self, field: str, observer: Callable[[Any, Any], None]) -> None:
+        """Adds a function to be called with (previous value, new value) whenever field changes."""
+        self.getChangeObservers().setdefault(field, []).append(observer)
+
+    def removeChangeObserver(self, field: str, observer: Callable[[Any, Any], None]) -> None:
+        """Removes a function added by addChangeObserver()."""
+        self.getChangeObservers()[field].remove(observer)
+
+    def notifyChange(self, field: str, previous_value, value) -> None:
+        """Notifies the change observers of field, if its value changed. To be run by setters."""
+        if previous_value != value:
+            for observer in self.getChangeObservers().get(field, ()):
+                observer(previous_value, value)
+
+    def handlePositionChange(self, previous_coord: int, coord: int) -> None:
+        """Change observer of xcoord and ycoord. Moves rect to the new position."""
+        self.updateRect()
+
     def updateRect(self) -> None:
         """Updates rect to match with xcoord, ycoord"""
         self.setRect(pygame.Rect(self.getXcoord()*64, self.getYcoord()*64, 64, 64))
\ No newline at end of file
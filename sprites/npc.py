@@ -3,11 +3,14 @@ from pygame.locals import *
 from assets import GAME_ASSETS
 from file_id_interpreter import FileIdInterpreter
 from sprites.entity import Entity
+from component_store import ComponentStore
+from game_event import GameEvent
 
 class Npc(Entity):
     """Class representing an Npc entity.
     
     Attributes:
+        id (str): Id of npc, in npc_id.txt.
         name (str): Name of npc.
         dialogue (str): Dialogue npc says when interacted with.
 
@@ -18,7 +21,10 @@ class Npc(Entity):
         ycoord (int): Board ycoord of npc.
     """
 
+    COMPONENTS = frozenset({ComponentStore.POSITION, ComponentStore.INTERACTABLE})
+
     # Attributes
+    __id = None
     __name = None
     __dialogue = None
 
@@ -30,17 +36,27 @@ class Npc(Entity):
         # Setting npc object's attributes.
         super().__init__(pygame.image.load(GAME_ASSETS[image_name]).convert_alpha(), 
                          xcoord, ycoord)
+        self.setId(npc_id)
         self.setName(name)
         self.setDialogue(dialogue)
 
     # Getters
+    def getId(self):
+        return self.__id
     def getName(self):
         return self.__name
     def getDialogue(self):
         return self.__dialogue
 
     # Setters
+    def setId(self, id):
+        self.__id = id
     def setName(self, name):
         self.__name = name
     def setDialogue(self, dialogue):
-        self.__dialogue = dialogue
\ No newline at end of file
+        self.__dialogue = dialogue
+
+    # Methods
+    def interact(self, character, num_enemies: int, coords_to_tile) -> GameEvent:
+        """Handles character moving into the npc. Returns the npc's message (DIALOGUE)."""
+        return GameEvent(GameEvent.DIALOGUE, self.getName(), self.getDialogue())
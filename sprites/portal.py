@@ -3,6 +3,8 @@ from pygame.locals import *
 from assets import GAME_ASSETS
 from file_id_interpreter import FileIdInterpreter
 from sprites.entity import Entity
+from component_store import ComponentStore
+from game_event import GameEvent
 from typing import Optional
 from sprites.quest_item import QuestItem
 
@@ -10,6 +12,7 @@ class Portal(Entity):
     """Class representing a portal entity.
 
     Attributes:
+        id (str): Id of portal, in portal_id.txt.
         destination (str): Represents the level portal leads to.
         is_activated (bool): Whether the portal has been activated by Character.
         requirement (Optional[str]): The required quest item to enter portal.
@@ -21,7 +24,10 @@ class Portal(Entity):
         ycoord (int): Board ycoord of portal.
     """
 
+    COMPONENTS = frozenset({ComponentStore.POSITION, ComponentStore.INTERACTABLE})
+
     # Attributes
+    __id = None
     __destination = None
     __is_activated = None
     __requirement = None
@@ -34,6 +40,7 @@ class Portal(Entity):
         # Setting portal object's attributes
         super().__init__(pygame.image.load(GAME_ASSETS[image_name]).convert_alpha(),
                          xcoord, ycoord)
+        self.setId(portal_id)
         self.setDestination(destination)
         self.setIsActivated(False)
         if requirement != 'None':
@@ -42,6 +49,8 @@ class Portal(Entity):
             self.setRequirement(None)
 
     # Getters
+    def getId(self):
+        return self.__id
     def getDestination(self):
         return self.__destination
     def getIsActivated(self):
@@ -50,6 +59,8 @@ class Portal(Entity):
         return self.__requirement
 
     # Setters
+    def setId(self, id):
+        self.__id = id
     def setDestination(self, destination):
         self.__destination = destination
     def setIsActivated(self, is_activated):
@@ -58,23 +69,27 @@ class Portal(Entity):
         self.__requirement = requirement
 
     # Methods
+    def interact(self, character, num_enemies: int, coords_to_tile) -> GameEvent:
+        """Handles character moving into the portal, as an attempt to enter it (see handleEnterAttempt())."""
+        return self.handleEnterAttempt(num_enemies, character.getQuestItemNames())
+
     def handleEnterAttempt(self, 
                            num_enemies: int, 
-                           character_quest_items: set[str]) -> str:
+                           character_quest_items: set[str]) -> GameEvent:
         """Handles character's attempt to enter portal.
 
         If attempt was successful, sets isActivated to True.
-        Returns a string representing the game event caused by entering
-        the portal.
+        Returns the game event caused by entering the portal
+        (PORTAL_ENEMIES_REMAINING, PORTAL_REQUIREMENT or PORTAL_ENTERED).
         """
         # Checking that number of enemies is 0.
         if num_enemies != 0:
-            return "You try to enter a portal, but there are still enemies remaining."
+            return GameEvent(GameEvent.PORTAL_ENEMIES_REMAINING)
         # Checking that the quest item requirement is satisfied.
         requirement = self.getRequirement()
         if requirement != None:
             if requirement not in character_quest_items:
-                return f"You need the {requirement} to enter this portal."
+                return GameEvent(GameEvent.PORTAL_REQUIREMENT, requirement)
         # If both conditions satisfied, activates portal.
         self.setIsActivated(True)
-        return "You entered a portal! You are teleported."
\ No newline at end of file
+        return GameEvent(GameEvent.PORTAL_ENTERED)
\ No newline at end of file
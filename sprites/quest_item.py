@@ -3,11 +3,14 @@ from pygame.locals import *
 from assets import GAME_ASSETS
 from file_id_interpreter import FileIdInterpreter
 from sprites.entity import Entity
+from component_store import ComponentStore
+from game_event import GameEvent
 
 class QuestItem(Entity):
     """Class representing a quest item entity.
 
     Attributes:
+        id (str): Id of quest item, in quest_item_id.txt.
         name (str): Name of quest item
 
         (Inherited)
@@ -17,7 +20,10 @@ class QuestItem(Entity):
         ycoord (int): Board ycoord of quest item.
     """
 
+    COMPONENTS = frozenset({ComponentStore.POSITION, ComponentStore.INTERACTABLE})
+
     # Attributes
+    __id = None
     __name = None
 
     # Constructor
@@ -28,12 +34,34 @@ class QuestItem(Entity):
         # Setting quest item's object's attributes
         super().__init__(pygame.image.load(GAME_ASSETS[image_name]).convert_alpha(),
                          xcoord, ycoord)
+        self.setId(quest_item_id)
         self.setName(name)
     
     # Getters
+    def getId(self):
+        return self.__id
     def getName(self):
         return self.__name
 
     # Setters
+    def setId(self, id):
+        self.__id = id
     def setName(self, name):
-        self.__name = name
\ No newline at end of file
+        self.__name = name
+
+    # Methods
+    def interact(self, character, num_enemies: int, coords_to_tile) -> GameEvent:
+        """Handles character moving into the quest item.
+
+        If character doesn't own a quest item of the same name, it picks the quest item up,
+        which is removed from the board. Returns the event caused (ITEM_ALREADY_OWNED or ITEM_PICKED_UP).
+        """
+        # If already owned, return error message.
+        if self.getName() in character.getQuestItemNames():
+            return GameEvent(GameEvent.ITEM_ALREADY_OWNED, self.getName())
+        # Adds to owned quest items.
+        character.getQuestItemNames().add(self.getName())
+        # Removes quest item from board.
+        coords_to_tile[(self.getXcoord(), self.getYcoord())].setOccupiedBy(None)
+        self.kill()
+        return GameEvent(GameEvent.ITEM_PICKED_UP, self.getName())
@@ -1,4 +1,5 @@
 import pygame
+from typing import Optional
 from sprites.character import Character
 
 class DataDisplay(pygame.sprite.Sprite):
@@ -10,38 +11,108 @@ class DataDisplay(pygame.sprite.Sprite):
         - Health / max health.
         - Level name.
         - Number of remaiining enemies.
+        - Turn order: the names of the entities taking the next NUM_TURN_ORDER actions (see TurnScheduler).
+
+    The display observes the character's displayed stats (see Entity.addChangeObserver()),
+    and is marked as outdated when one of them, the level name, the number of enemies or the turn order changes,
+    so that its text is only rendered again by refreshSurf() when needed.
 
     Attributes:
         surf (pygame.Surface): Surface to which data is displayed.
             Size: 432 x 200
+        character (Optional[Character]): Character whose stats are displayed.
+        level_name (str): Name of the current level.
+        num_remaining_enemies (int): Number of enemies left in the current level.
+        turn_order (list[str]): Names of the entities taking the next actions, in order.
+        is_outdated (bool): Whether displayed data has changed since surf was last updated.
     """
 
+    OBSERVED_FIELDS = ('level', 'exp', 'health', 'max_health', 'strength', 'defence')
+    NUM_TURN_ORDER = 5
+
     # Attributes
     __surf = None
+    __character = None
+    __level_name = None
+    __num_remaining_enemies = None
+    __turn_order = None
+    __is_outdated = None
 
     # Constructor
     def __init__(self):
         self.setSurf(pygame.Surface((432, 200)))
+        self.setCharacter(None)
+        self.__level_name = ''
+        self.__num_remaining_enemies = 0
+        self.__turn_order = []
+        self.setIsOutdated(True)
 
     # Getters
     def getSurf(self) -> pygame.Surface:
         return self.__surf
+    def getCharacter(self) -> Optional[Character]:
+        return self.__character
+    def getLevelName(self) -> str:
+        return self.__level_name
+    def getNumRemainingEnemies(self) -> int:
+        return self.__num_remaining_enemies
+    def getTurnOrder(self) -> list[str]:
+        return self.__turn_order
+    def getIsOutdated(self) -> bool:
+        return self.__is_outdated
 
     # Setters
     def setSurf(self, surf):
         self.__surf = surf
+    def setCharacter(self, character):
+        self.__character = character
+    def setLevelName(self, level_name):
+        if level_name != self.__level_name:
+            self.__level_name = level_name
+            self.setIsOutdated(True)
+    def setNumRemainingEnemies(self, num_remaining_enemies):
+        if num_remaining_enemies != self.__num_remaining_enemies:
+            self.__num_remaining_enemies = num_remaining_enemies
+            self.setIsOutdated(True)
+    def setTurnOrder(self, turn_order):
+        if turn_order != self.__turn_order:
+            self.__turn_order = turn_order
+            self.setIsOutdated(True)
+    def setIsOutdated(self, is_outdated):
+        self.__is_outdated = is_outdated
 
     # Methods
-    def updateSurf(self,
-                   character: Character,
-                   level_name: int,
-                   num_remaining_enemies: int) -> None:
-        """Updates surface with new data.
+    def observeCharacter(self, character: Character) -> None:
+        """Displays the stats of character, observing its displayed stats
+        (instead of those of the previously observed character).
+        """
+        previous_character = self.getCharacter()
+        if previous_character != None:
+            for field in self.OBSERVED_FIELDS:
+                previous_character.removeChangeObserver(field, self.handleCharacterChange)
+        self.setCharacter(character)
+        for field in self.OBSERVED_FIELDS:
+            character.addChangeObserver(field, self.handleCharacterChange)
+        self.setIsOutdated(True)
 
-        To be run at at the conclusion of a turn. TODO likely can split into separate methods.
+    def handleCharacterChange(self, previous_value, value) -> None:
+        """Change observer of the character's displayed stats. Marks the display as outdated.
+        Only sets a flag, as stats may change on the turn thread.
         """
+        self.setIsOutdated(True)
+
+    def refreshSurf(self) -> None:
+        """Updates surface only if displayed data has changed since it was last updated."""
+        if self.getIsOutdated() and self.getCharacter() != None:
+            self.updateSurf()
+
+    def updateSurf(self) -> None:
+        """Updates surface with the data of the observed character, level name, number of enemies and turn order."""
+        self.setIsOutdated(False)
+        level_name = self.getLevelName()
+        num_remaining_enemies = self.getNumRemainingEnemies()
         # Getting character information
-        level, exp, req_exp, health, max_health, strength, defence = self.getCharacterStats(character)
+        level, exp, req_exp, health, max_health, strength, defence = self.getCharacterStats(self.getCharacter())
 
         # Rendering text surfaces
         big_font = pygame.font.Font(None, 48)
@@ -53,6 +124,9 @@ class DataDisplay(pygame.sprite.Sprite):
         strength_text_surf = small_font.render(f"STR: {strength}", True, (0,0,0))
         defence_text_surf = small_font.render(f"DEF: {defence}", True, (0,0,0))
         numenemy_text_surf = small_font.render(f"Enemies left: {num_remaining_enemies}", True, (0,0,0))
+        turn_order_text_surfs = [small_font.render("NEXT TO ACT:", True, (0,0,0))]
+        for name in self.getTurnOrder():
+            turn_order_text_surfs.append(small_font.render(name, True, (0,0,0)))
 
         # Repositioning text surfaces' rects
         lvlname_text_rect = lvlname_text_surf.get_rect()
@@ -80,6 +154,9 @@ class DataDisplay(pygame.sprite.Sprite):
         surf.blit(numenemy_text_surf, numenemy_text_rect)
         surf.blit(strength_text_surf, strength_text_rect)
         surf.blit(defence_text_surf, defence_text_rect)
+        # Turn order, in a column to the right of the character information.
+        for pos, turn_order_text_surf in enumerate(turn_order_text_surfs):
+            surf.blit(turn_order_text_surf, (232, 80 + pos * 20))
         return
     
     def getCharacterStats(self, character: Character
@@ -5,41 +5,51 @@ from sprites.button import Button
 from math import ceil
 from button_output_getter import ButtonOutputGetter
 from multiline_text_converter import multiLineSurface
+from game_event import GameEvent
+from combat_log import CombatLog
 
 class GameEventDisplay(pygame.sprite.Sprite):
     """Sidebar component that represents the display to which game events are sent.
 
+    Events are logged in combat_log for the whole session, and displayed EVENTS_PER_PAGE at a time.
+    Pages start at the first event of the latest turn (page_anchor), so the latest turn's events
+    are shown from its first page, and earlier turns' events are on the pages before it.
+    The text of an event is only formatted when its page is displayed.
+
     Attributes:
         surf (pygame.Surface): Surface to which all events are displayed. Size: 432 x 324
-        event_list (list[Optional[str]]): List of events. 
-        total_pages (int): Number of pages. Defaults to 1 if event_list is empty.
-        current_page (int): Current page. 0-indexed, defaults to 0 when event_list is updated.
+        combat_log (CombatLog): Log of the session's events.
+        page_anchor (int): Sequence number (see CombatLog) of the first event of the latest turn.
+        current_page (int): Current page, relative to the page starting at page_anchor
+            (negative for pages of earlier turns). Set to 0 when a turn's events are added.
         page_nav_buttons (pygame.sprite.Group): Group containing 'Prev page' and 'Next page' buttons.
     """
 
+    EVENTS_PER_PAGE = 4
+
     # Attributes
     __surf = None
-    __event_list = None
-    __total_pages = None
+    __combat_log = None
+    __page_anchor = None
     __current_page = None
     __page_nav_buttons = None
 
     # Constructor
-    def __init__(self):
+    def __init__(self, combat_log: Optional[CombatLog] = None):
         super().__init__()
         self.setSurf(pygame.Surface((432, 324)))
-        self.setEventList([])
-        self.setTotalPages(1)
+        self.setCombatLog(combat_log if combat_log != None else CombatLog())
+        self.setPageAnchor(self.getCombatLog().getNumLogged())
         self.setCurrentPage(0)
         self.createPageNavButtons()
 
     # Getters
     def getSurf(self) -> pygame.Surface:
         return self.__surf
-    def getEventList(self) -> Optional[list[str]]:
-        return self.__event_list
-    def getTotalPages(self) -> int:
-        return self.__total_pages
+    def getCombatLog(self) -> CombatLog:
+        return self.__combat_log
+    def getPageAnchor(self) -> int:
+        return self.__page_anchor
     def getCurrentPage(self) -> int:
         return self.__current_page
     def getPageNavButtons(self) -> pygame.sprite.Group:
@@ -48,10 +58,10 @@ class GameEventDisplay(pygame.sprite.Sprite):
     # Setters
     def setSurf(self, surf):
         self.__surf = surf
-    def setEventList(self, event_list):
-        self.__event_list = event_list
-    def setTotalPages(self, total_pages):
-        self.__total_pages = total_pages
+    def setCombatLog(self, combat_log):
+        self.__combat_log = combat_log
+    def setPageAnchor(self, page_anchor):
+        self.__page_anchor = page_anchor
     def setCurrentPage(self, current_page):
         self.__current_page = current_page
     def setPageNavButtons(self, page_nav_buttons):
@@ -70,7 +80,7 @@ class GameEventDisplay(pygame.sprite.Sprite):
 
         # Create font objects for each displayed event, and blit to surf.
         for pos, event in enumerate(displayed_events): 
-            text_surf = multiLineSurface(f"> {event}", font, 
+            text_surf = multiLineSurface(f"> {event.format()}", font, 
                                          pygame.Rect(0, 0, 400, 60), 
                                          (255, 255, 255), (0,0,0))
             text_rect = text_surf.get_rect()
@@ -92,37 +102,53 @@ class GameEventDisplay(pygame.sprite.Sprite):
                                                          pygame_events, relative_mouse_pos)
         if button_outputs:
             button_output = button_outputs[0]
+            first_page = self.calcFirstPage()
+            total_pages = self.calcTotalPages()
             match button_output:
                 case 'prev page':
-                    current_page = (self.getCurrentPage() - 1) % self.getTotalPages()
+                    current_page = (self.getCurrentPage() - first_page - 1) % total_pages + first_page
                 case 'next page':
-                    current_page = (self.getCurrentPage() + 1) % self.getTotalPages()
+                    current_page = (self.getCurrentPage() - first_page + 1) % total_pages + first_page
                 case _:
                     raise ValueError(f"Button output '{button_output}' is unknown")
             self.setCurrentPage(current_page)
         return
 
-    def updateEvents(self, events: list[str]) -> None:
-        """Updates the list of events that are to be displayed on surface.
+    def updateEvents(self, events: list[GameEvent], turn_number: int) -> None:
+        """Logs the events of turn turn_number, and displays them from their first page.
 
         To be run at the end of a turn.
         """
-        self.setEventList(events)
+        combat_log = self.getCombatLog()
+        self.setPageAnchor(combat_log.getNumLogged())
+        combat_log.extend(events, turn_number)
         self.setCurrentPage(0)
-        self.setTotalPages(max(ceil(len(events) / 4), 1))
         return
     
-    def getDisplayedEvents(self) -> list[str]:
-        """Returns the list of events to be displayed, depending on current_page."""
-        current_page = self.getCurrentPage()
-        event_list = self.getEventList()
-        num_events = len(event_list) # total number of events
-        
-        # Compute the list indexes of events that are to be displayed
-        event_indexes = [i for i in range((current_page) * 4, (current_page+1) * 4) if i < num_events]
+    def addEvents(self, events: list[GameEvent], turn_number: int) -> None:
+        """Logs events after the latest turn's events, without changing current_page.
+
+        To be run for events that happen outside of turns (e.g. a save completing).
+        """
+        self.getCombatLog().extend(events, turn_number)
+        return
+
+    def calcFirstPage(self) -> int:
+        """Returns the page (relative to page_anchor) of the oldest event retained in combat_log."""
+        oldest_sequence = self.getCombatLog().getOldestSequence()
+        return -ceil((self.getPageAnchor() - oldest_sequence) / self.EVENTS_PER_PAGE)
 
-        displayed_events = [event_list[i] for i in event_indexes]
-        return displayed_events
+    def calcTotalPages(self) -> int:
+        """Returns the number of pages. The latest turn has at least 1 page, even if it has no events."""
+        num_latest_events = self.getCombatLog().getNumLogged() - self.getPageAnchor()
+        return max(ceil(num_latest_events / self.EVENTS_PER_PAGE), 1) - self.calcFirstPage()
+
+    def getDisplayedEvents(self) -> list[GameEvent]:
+        """Returns the list of events to be displayed, depending on current_page."""
+        # Pages of events no longer retained in combat_log show its oldest page instead.
+        current_page = max(self.getCurrentPage(), self.calcFirstPage())
+        start = self.getPageAnchor() + current_page * self.EVENTS_PER_PAGE
+        return [event for _, event in self.getCombatLog().getEntries(start, start + self.EVENTS_PER_PAGE)]
 
     def drawTemplate(self) -> None:
         """
@@ -136,7 +162,9 @@ class GameEventDisplay(pygame.sprite.Sprite):
         title_text_rect.center = (216, 30)
 
         # Create page number font object
-        page_number_surf = font.render(f"{self.getCurrentPage() + 1} / {self.getTotalPages()}", True, (255, 255, 255))
+        first_page = self.calcFirstPage()
+        current_page = max(self.getCurrentPage(), first_page)
+        page_number_surf = font.render(f"{current_page - first_page + 1} / {self.calcTotalPages()}", True, (255, 255, 255))
         page_number_rect = page_number_surf.get_rect()
         page_number_rect.center = (216, 300)
 
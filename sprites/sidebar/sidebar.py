@@ -73,6 +73,7 @@ class Sidebar(pygame.sprite.Sprite):
         """
         surf = self.getSurf()
         surf.fill((255, 255, 255))
+        self.getDataDisplay().refreshSurf()
         surf.blit(self.getDataDisplay().getSurf(), (0, 0))
         if game_world_state == 'main':
             surf.blit(self.getAttackButtons().getSurf(), (0, 200))
@@ -1,62 +1,163 @@
 import pygame
-from typing import Optional
+from collections.abc import Mapping
+from typing import Optional, Callable, Iterator
 from sprites.entity import Entity
+from component_store import ComponentStore
 
-class Tile(pygame.sprite.Sprite):
+class Tile:
     """
-    Class representing a tile sprite.
-    
+    Class representing a tile of a board.
+
+    The state of every tile is stored in the compact grids of its Board (see Board),
+    so a Tile is only a lightweight handle to one cell of those grids. Tiles are created
+    when they are looked up in the board's TileMap, and two Tiles of the same cell are equal.
+
     Attributes:
-        name (str): Name of tile.
-        surf (pygame.Surface): Size: 64 x 64.
-        accessible (bool): Whether tile can be entered by an entity.
-        occupied_by (Optional[Entity]]): The entity currently occupying the tile.
-        damage (int): How much damage an entity takes upon entering tile.
+        board (Board): Board that the tile is on.
+        index (int): Index of the tile's cell in the board's grids (ycoord*width + xcoord).
     """
     # Attributes
-    __name = None
-    __surf = None
-    __accessible = None
-    __occupied_by = None
-    __damage = None
+    __slots__ = ('__board', '__index')
 
     # Constructor
-    def __init__(self,
-                 name: str,
-                 colour: tuple[int, int, int], 
-                 accessible: bool,
-                 occupied_by: Optional[Entity],
-                 damage: int = 0):
-        super().__init__()
-        surf = pygame.Surface((64, 64))
-        pygame.draw.rect(surf, (128, 128, 128), (0,0, 64, 64))
-        pygame.draw.rect(surf, colour, (1, 1, 62, 62)) 
-        self.setName(name)
-        self.setSurf(surf)
-        self.setAccessible(accessible)
-        self.setOccupiedBy(occupied_by)
-        self.setDamage(damage)
+    def __init__(self, board, index: int):
+        # Assigned directly, as a Tile is created for every lookup.
+        self.__board = board
+        self.__index = index
 
     # Getters
-    def getName(self):
-        return self.__name
-    def getSurf(self):
-        return self.__surf
-    def getAccessible(self):
-        return self.__accessible
-    def getOccupiedBy(self):
-        return self.__occupied_by
-    def getDamage(self):
-        return self.__damage
+    def getBoard(self):
+        return self.__board
+    def getIndex(self) -> int:
+        return self.__index
+    def getName(self) -> str:
+        return self.__board.getTileName(self.__index)
+    def getSurf(self) -> pygame.Surface:
+        """Size: 64 x 64. Shared between all tiles of the same type."""
+        return self.__board.getTileSurf(self.__index)
+    def getAccessible(self) -> bool:
+        """Whether tile can be entered by an entity."""
+        return self.__board.isAccessible(self.__index)
+    def getOccupiedBy(self) -> Optional[Entity]:
+        """The entity currently occupying the tile."""
+        return self.__board.getOccupant(self.__index)
+    def getDamage(self) -> int:
+        """How much damage an entity takes upon entering tile."""
+        return self.__board.getDamageAt(self.__index)
 
     # Setters
-    def setName(self, name):
-        self.__name = name
-    def setSurf(self, surf):
-        self.__surf = surf
+    def setBoard(self, board):
+        self.__board = board
+    def setIndex(self, index):
+        self.__index = index
     def setAccessible(self, accessible):
-        self.__accessible = accessible
+        self.__board.setAccessibleAt(self.__index, accessible)
     def setOccupiedBy(self, occupied_by):
-        self.__occupied_by = occupied_by
+        """Sets occupied_by, and notifies all occupancy observers of the change."""
+        self.__board.setOccupant(self.__index, occupied_by)
     def setDamage(self, damage):
-        self.__damage = damage
\ No newline at end of file
+        self.__board.setDamageAt(self.__index, damage)
+
+    # Methods
+    def addOccupancyObserver(self,
+                             observer: Callable[[Optional[Entity], Optional[Entity]], None]) -> None:
+        """Adds a function to be called with (previous occupant, new occupant) whenever occupied_by is set."""
+        self.__board.addTileObserver(self.__index, observer)
+
+    def removeOccupancyObserver(self,
+                                observer: Callable[[Optional[Entity], Optional[Entity]], None]) -> None:
+        """Removes a function added by addOccupancyObserver()."""
+        self.__board.removeTileObserver(self.__index, observer)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Tile) and self.__board is other.getBoard() and self.__index == other.getIndex()
+
+    def __hash__(self) -> int:
+        return hash((id(self.__board), self.__index))
+
+
+class TileMap(Mapping):
+    """Class representing the tiles of a board as a read-only mapping of coords to Tile
+    ({(xcoord, ycoord): Tile}), in board order (by row, then by column).
+
+    Returned by Board.getCoordsToTile(), so that code written against a dict of tiles keeps working.
+    Lookups go straight to the board's grids; items() and values() create a Tile per tile,
+    so hot paths should prefer the board's queries (e.g. getObstructedCoords(), occupiedItems()).
+
+    Attributes:
+        board (Board): Board whose tiles are mapped.
+    """
+
+    # Attributes
+    __board = None
+
+    # Constructor
+    def __init__(self, board):
+        self.setBoard(board)
+
+    # Getters
+    def getBoard(self):
+        return self.__board
+
+    # Setters
+    def setBoard(self, board):
+        self.__board = board
+
+    # Methods
+    def __getitem__(self, coords: tuple[int, int]) -> Tile:
+        index = self.__board.getTileIndex(coords)
+        if index == None:
+            raise KeyError(coords)
+        return Tile(self.__board, index)
+
+    def get(self, coords: tuple[int, int], default: Optional[Tile] = None) -> Optional[Tile]:
+        index = self.__board.getTileIndex(coords)
+        if index == None:
+            return default
+        return Tile(self.__board, index)
+
+    def __contains__(self, coords) -> bool:
+        return self.__board.getTileIndex(coords) != None
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        width = self.__board.getWidth()
+        for index in self.__board.getTileIndices():
+            yield (index % width, index // width)
+
+    def __len__(self) -> int:
+        return self.__board.getNumTiles()
+
+    def items(self) -> Iterator[tuple[tuple[int, int], Tile]]:
+        board = self.__board
+        width = board.getWidth()
+        for index in board.getTileIndices():
+            yield (index % width, index // width), Tile(board, index)
+
+    def values(self) -> Iterator[Tile]:
+        board = self.__board
+        for index in board.getTileIndices():
+            yield Tile(board, index)
+
+    def occupiedItems(self, 
+                      query: str | tuple[type] | type = ComponentStore.POSITION
+                      ) -> Iterator[tuple[tuple[int, int], Tile]]:
+        """Yields (coords, Tile) of each tile occupied by an entity matching query 
+        (a component, or entity types, see ComponentStore), in board order, without scanning the board.
+        """
+        board = self.__board
+        for index in sorted(board.getComponentStore().getCells(query)):
+            yield board.getIndexCoords(index), Tile(board, index)
+
+    def occupiedHazardItems(self, 
+                            query: str | tuple[type] | type = ComponentStore.POSITION
+                            ) -> Iterator[tuple[tuple[int, int], Tile]]:
+        """Yields (coords, Tile) of each hazard (tile with nonzero damage) occupied by an entity matching query,
+        in board order, using the board's hazard index (see Board.getOccupiedHazardIndices()).
+        """
+        board = self.__board
+        for index in board.getOccupiedHazardIndices(query):
+            yield board.getIndexCoords(index), Tile(board, index)
+
+    def getObstructedCoords(self, obstruction: str | tuple[type] | type) -> set[tuple[int, int]]:
+        """See Board.getObstructedCoords()."""
+        return self.__board.getObstructedCoords(obstruction)
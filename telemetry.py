@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Any, Optional, TextIO
+from game_event import GameEvent
+
+class Telemetry:
+    """Class that records gameplay telemetry for balance analytics (turns per level, damage dealt and taken
+    per attack, deaths per tile type), and writes it to rotating JSONL files on a background flush thread.
+
+    Recording a turn only appends the turn's game events (see GameEvent) to an in-memory buffer, so it adds
+    negligible overhead to the turn and never blocks. The flush thread wakes every flush_interval seconds,
+    interprets the buffered turns into records, and appends them (one JSON object per line) to telemetry.jsonl
+    in telemetry_dir. Once that file reaches MAX_FILE_BYTES, it is rotated to telemetry.1.jsonl
+    (and telemetry.1.jsonl to telemetry.2.jsonl, ...), keeping at most MAX_FILES files.
+    The buffer holds at most MAX_BUFFERED turns: if the flush thread falls behind, the oldest turns are dropped.
+
+    Records (each with keys 'type', 'timestamp', 'turn_number' and 'level_name'):
+        'turn': A turn was taken.
+        'attack': An attack was used. Keys 'attacker', 'attack', 'target', 'hit', 'damage' (0 if missed)
+            and 'by_character' (whether the character attacked, i.e. damage was dealt rather than taken,
+            as recorded on the ATTACK event).
+        'tile_damage': An entity took damage from a tile. Keys 'target', 'tile' and 'damage'.
+        'death': An entity fainted. Keys 'entity', 'cause' ('attack' or 'tile'),
+            and 'attack' or 'tile' (what caused the death).
+
+    Attributes:
+        telemetry_dir (str): Directory of the telemetry files.
+        flush_interval (float): Seconds between flushes of buffer.
+        buffer (deque): Turns waiting to be written: (timestamp, turn number, level name, events, character name).
+        thread (Optional[threading.Thread]): Flush thread. Started by the first recorded turn.
+        stop_event (threading.Event): Set to stop the flush thread.
+        file (Optional[TextIO]): Current telemetry file, opened for appending by the flush thread.
+    """
+
+    TELEMETRY_DIR = 'gameinfostorage/telemetry'
+    FILE_NAME = 'telemetry'
+    MAX_FILE_BYTES = 1 << 20
+    MAX_FILES = 5
+    MAX_BUFFERED = 10000
+
+    # Attributes
+    __telemetry_dir = None
+    __flush_interval = None
+    __buffer = None
+    __thread = None
+    __stop_event = None
+    __file = None
+
+    # Constructor
+    def __init__(self, telemetry_dir: str = TELEMETRY_DIR, flush_interval: float = 2.0):
+        self.setTelemetryDir(telemetry_dir)
+        self.setFlushInterval(flush_interval)
+        self.setBuffer(deque(maxlen=self.MAX_BUFFERED))
+        self.setThread(None)
+        self.setStopEvent(threading.Event())
+        self.setFile(None)
+
+    # Getters
+    def getTelemetryDir(self) -> str:
+        return self.__telemetry_dir
+    def getFlushInterval(self) -> float:
+        return self.__flush_interval
+    def getBuffer(self) -> deque:
+        return self.__buffer
+    def getThread(self) -> Optional[threading.Thread]:
+        return self.__thread
+    def getStopEvent(self) -> threading.Event:
+        return self.__stop_event
+    def getFile(self) -> Optional[TextIO]:
+        return self.__file
+
+    # Setters
+    def setTelemetryDir(self, telemetry_dir):
+        self.__telemetry_dir = telemetry_dir
+    def setFlushInterval(self, flush_interval):
+        self.__flush_interval = flush_interval
+    def setBuffer(self, buffer):
+        self.__buffer = buffer
+    def setThread(self, thread):
+        self.__thread = thread
+    def setStopEvent(self, stop_event):
+        self.__stop_event = stop_event
+    def setFile(self, file):
+        self.__file = file
+
+    # Methods
+    def recordTurn(self,
+                   turn_number: int,
+                   level_name: str,
+                   events: list[GameEvent]) -> None:
+        """Buffers a turn taken on level level_name, with the game events caused in it. Never blocks.
+
+        Can be run from any thread.
+        """
+        self.getBuffer().append((time.time(), turn_number, level_name, tuple(events)))
+        if self.getThread() == None:
+            thread = threading.Thread(target=self.run, name='Telemetry', daemon=True)
+            self.setThread(thread)
+            thread.start()
+
+    def run(self) -> None:
+        """Main function of the flush thread. Flushes buffer every flush_interval seconds until stopped,
+        then flushes the remaining turns.
+        """
+        stop_event = self.getStopEvent()
+        while not stop_event.wait(self.getFlushInterval()):
+            self.flush()
+        self.flush()
+        if self.getFile() != None:
+            self.getFile().close()
+            self.setFile(None)
+
+    def flush(self) -> None:
+        """Writes the buffered turns' records to the current telemetry file, rotating it when full.
+        Telemetry is dropped (rather than raising) if it cannot be written.
+        """
+        buffer = self.getBuffer()
+        try:
+            while buffer:
+                for record in self.interpretTurn(*buffer.popleft()):
+                    self.writeRecord(record)
+            if self.getFile() != None:
+                self.getFile().flush()
+        except OSError:
+            buffer.clear()
+
+    def interpretTurn(self,
+                      timestamp: float,
+                      turn_number: int,
+                      level_name: str,
+                      events: tuple[GameEvent, ...]) -> list[dict[str, Any]]:
+        """Returns the records of a buffered turn (see class docstring)."""
+        base = {'timestamp': timestamp, 'turn_number': turn_number, 'level_name': level_name}
+        records = [{'type': 'turn', **base}]
+        attack_record = None # Record of the latest attack, completed by the event following it.
+        cause = None # Record of the latest damage, which caused a following FAINT event.
+        for event in events:
+            match event.getKind():
+                case GameEvent.ATTACK:
+                    attack_record = {'type': 'attack', **base, **event.toDict(), 'hit': False, 'damage': 0}
+                    records.append(attack_record)
+                    cause = None
+                case GameEvent.DAMAGE if attack_record != None:
+                    attack_record['hit'] = True
+                    attack_record['damage'] = event.getField('damage')
+                    cause = {'cause': 'attack', 'attack': attack_record['attack']}
+                case GameEvent.TILE_DAMAGE:
+                    records.append({'type': 'tile_damage', **base, **event.toDict()})
+                    cause = {'cause': 'tile', 'tile': event.getField('tile')}
+                case GameEvent.FAINT if cause != None:
+                    records.append({'type': 'death', **base, 'entity': event.getField('target'), **cause})
+                    cause = None
+        return records
+
+    def writeRecord(self, record: dict[str, Any]) -> None:
+        """Appends record to the current telemetry file (opening it if needed), rotating it if it is full."""
+        if self.getFile() == None:
+            os.makedirs(self.getTelemetryDir(), exist_ok=True)
+            self.setFile(open(self.getFilePath(0), 'a'))
+        file = self.getFile()
+        file.write(json.dumps(record) + '\n')
+        if file.tell() >= self.MAX_FILE_BYTES:
+            self.rotateFiles()
+
+    def rotateFiles(self) -> None:
+        """Closes the current telemetry file, and shifts each file to the next index,
+        removing the file at MAX_FILES - 1. The next record starts a new current file.
+        """
+        self.getFile().close()
+        self.setFile(None)
+        oldest_path = self.getFilePath(self.MAX_FILES - 1)
+        if os.path.exists(oldest_path):
+            os.remove(oldest_path)
+        for index in range(self.MAX_FILES - 2, -1, -1):
+            if os.path.exists(self.getFilePath(index)):
+                os.replace(self.getFilePath(index), self.getFilePath(index + 1))
+
+    def getFilePath(self, index: int) -> str:
+        """Returns the path of the telemetry file with index (0 for the current file)."""
+        if index == 0:
+            return os.path.join(self.getTelemetryDir(), f"{self.FILE_NAME}.jsonl")
+        return os.path.join(self.getTelemetryDir(), f"{self.FILE_NAME}.{index}.jsonl")
+
+    def stop(self) -> None:
+        """Flushes the buffered turns, then stops the flush thread."""
+        if self.getThread() != None:
+            self.getStopEvent().set()
+            self.getThread().join()
+            self.setThread(None)
+            self.setStopEvent(threading.Event())
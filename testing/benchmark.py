@@ -0,0 +1,298 @@
+"""
+Headless benchmark suite for the game's hot paths: pathfinding, line of sight (range checks),
+level loading and frame rendering.
+
+To use (from the repository root):
+    python -m testing.benchmark                   Runs the benchmarks, and compares them with the baseline.
+    python -m testing.benchmark --save-baseline   Runs the benchmarks, and stores them as the baseline.
+Options: --baseline PATH, --repeat N, --tolerance FRACTION (see BenchmarkSuite).
+
+Runs with the SDL dummy video/audio drivers, so no window is opened.
+Baselines are specific to the machine they were measured on, so are not committed.
+Exits with status 1 if any benchmark regressed.
+"""
+
+# Imports
+import os
+import sys
+import json
+import random
+import argparse
+from time import perf_counter
+from statistics import median
+from typing import Callable, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+class BenchmarkSuite:
+    """Class that times the game's hot paths, and compares the timings with a stored baseline.
+
+    Each benchmark runs a fixed workload (seeded, so it is the same on every run) repeat times,
+    and its result is the median time of a run. A benchmark regressed if its median is more than
+    tolerance (a fraction) slower than the baseline's.
+
+    Benchmarks:
+        'find_path': Pathfinder.findPath() from the character's spawn to each enemy, on every level.
+        'find_weighted_path': Pathfinder.findWeightedPath() for the same paths.
+        'get_between_coords': Attack.getBetweenCoords() for LOS_PAIRS_PER_LEVEL pairs of tiles on every level.
+        'is_in_range': Attack.isInRange() for the same pairs.
+        'level_load[<level name>]': LevelInitialiser.getLevelContents(), for every level in world_gen.txt.
+        'update_display': One GameWorld.updateDisplay() frame, on FRAME_LEVEL.
+
+    Attributes:
+        repeat (int): Number of runs of each benchmark.
+        tolerance (float): Fraction by which a benchmark may be slower than the baseline before it regressed.
+        level_names (list[str]): Names of every level in world_gen.txt.
+        level_contents (dict[str, tuple]): Contents of each level (see LevelInitialiser.getLevelContents()).
+        results (dict[str, float]): Median seconds of a run of each benchmark run.
+    """
+
+    DEFAULT_BASELINE_PATH = os.path.join(ROOT_DIR, 'testing', 'benchmark_baseline.json')
+    LOS_PAIRS_PER_LEVEL = 200
+    LOS_ATTACK_ID = 'SS' # Sharpshot, which has the longest range of the character attacks.
+    FRAME_LEVEL = 'Music Centre 1' # Not Dining Hall, which saves the game when entered.
+    ENEMY_TILE_PENALTY = 12 # Default of Enemy.moveToCharacter().
+    SEED = 0
+
+    # Attributes
+    __repeat = None
+    __tolerance = None
+    __level_names = None
+    __level_contents = None
+    __results = None
+
+    # Constructor
+    def __init__(self, repeat: int = 5, tolerance: float = 0.2):
+        self.setRepeat(repeat)
+        self.setTolerance(tolerance)
+        self.setLevelNames([])
+        self.setLevelContents(dict())
+        self.setResults(dict())
+
+    # Getters
+    def getRepeat(self) -> int:
+        return self.__repeat
+    def getTolerance(self) -> float:
+        return self.__tolerance
+    def getLevelNames(self) -> list[str]:
+        return self.__level_names
+    def getLevelContents(self) -> dict[str, tuple]:
+        return self.__level_contents
+    def getResults(self) -> dict[str, float]:
+        return self.__results
+
+    # Setters
+    def setRepeat(self, repeat):
+        self.__repeat = repeat
+    def setTolerance(self, tolerance):
+        self.__tolerance = tolerance
+    def setLevelNames(self, level_names):
+        self.__level_names = level_names
+    def setLevelContents(self, level_contents):
+        self.__level_contents = level_contents
+    def setResults(self, results):
+        self.__results = results
+
+    # Methods
+    def setUp(self) -> None:
+        """Initialises pygame headlessly, loads the assets, and loads every level once."""
+        from assets import load_assets
+        from level_initialiser import LevelInitialiser
+        os.chdir(ROOT_DIR) # Assets and game info are found relative to the working directory.
+        pygame.init()
+        pygame.display.set_mode((1200, 768))
+        load_assets()
+        with open('gameinfostorage/world_gen.txt') as file:
+            self.setLevelNames([line[2:].strip() for line in file if line.startswith('!!')])
+        for level_name in self.getLevelNames():
+            self.getLevelContents()[level_name] = LevelInitialiser().getLevelContents(level_name,
+                                                                                     self.createCharacter())
+
+    def createCharacter(self):
+        """Returns a new character, as created by WorldInit."""
+        from assets import GAME_ASSETS
+        from sprites.character import Character
+        return Character(pygame.image.load(GAME_ASSETS['character']), 'Player', 'Sw', 10, 10, 100, 100, 1, 0, 2)
+
+    def time(self, name: str, run: Callable[[], None]) -> float:
+        """Runs run repeat times, and stores (and returns) the median seconds of a run as the result of name."""
+        run_times = []
+        for _ in range(self.getRepeat()):
+            start = perf_counter()
+            run()
+            run_times.append(perf_counter() - start)
+        self.getResults()[name] = median(run_times)
+        return self.getResults()[name]
+
+    def runAll(self) -> dict[str, float]:
+        """Runs every benchmark. Returns the results."""
+        self.setUp()
+        self.benchmarkPathfinding()
+        self.benchmarkLineOfSight()
+        self.benchmarkLevelLoading()
+        self.benchmarkUpdateDisplay()
+        return self.getResults()
+
+    def getPathQueries(self) -> list[tuple]:
+        """Returns (coords_to_tile, starting coords, target coords) from the character's spawn
+        to each enemy of every level.
+        """
+        from sprites.character import Character
+        queries = []
+        for level_name in self.getLevelNames():
+            board, enemy_group = self.getLevelContents()[level_name][:2]
+            coords_to_tile = board.getCoordsToTile()
+            character_coords = next((coords for coords, _ in coords_to_tile.occupiedItems(Character)), None)
+            if character_coords == None:
+                continue
+            for enemy in enemy_group:
+                queries.append((coords_to_tile, character_coords, (enemy.getXcoord(), enemy.getYcoord())))
+        return queries
+
+    def benchmarkPathfinding(self) -> None:
+        """Times 'find_path' and 'find_weighted_path', with the obstructions and penalty enemies use.
+        Each query uses a new Pathfinder, so no path is cached.
+        """
+        from pathfinder import Pathfinder
+        from sprites.character import Character
+        from sprites.npc import Npc
+        from sprites.portal import Portal
+        from sprites.quest_item import QuestItem
+        from sprites.enemy import Enemy
+        queries = self.getPathQueries()
+        obstruction_entity_types = (Character, Npc, Portal, QuestItem)
+
+        def runFindPath():
+            for coords_to_tile, starting_coords, target_coords in queries:
+                Pathfinder(coords_to_tile.getBoard()).findPath(coords_to_tile, obstruction_entity_types,
+                                                               starting_coords, target_coords)
+
+        def runFindWeightedPath():
+            for coords_to_tile, starting_coords, target_coords in queries:
+                Pathfinder(coords_to_tile.getBoard()).findWeightedPath(coords_to_tile, obstruction_entity_types,
+                                                                       Enemy, starting_coords, target_coords,
+                                                                       self.ENEMY_TILE_PENALTY)
+
+        self.time('find_path', runFindPath)
+        self.time('find_weighted_path', runFindWeightedPath)
+
+    def getLineOfSightQueries(self) -> list[tuple]:
+        """Returns (origin coords, target coords, obstructed coords) for LOS_PAIRS_PER_LEVEL seeded pairs of tiles
+        within the attack's range, on every level.
+        """
+        from component_store import ComponentStore
+        from movement_helper_funcs import getObstructedCoords
+        from attack import Attack
+        attack_range = Attack(self.LOS_ATTACK_ID).getRange()
+        rng = random.Random(self.SEED)
+        queries = []
+        for level_name in self.getLevelNames():
+            coords_to_tile = self.getLevelContents()[level_name][0].getCoordsToTile()
+            obstructed_coords = getObstructedCoords(coords_to_tile, ComponentStore.POSITION)
+            all_coords = list(coords_to_tile)
+            for _ in range(self.LOS_PAIRS_PER_LEVEL):
+                origin_coords = rng.choice(all_coords)
+                target_coords = (origin_coords[0] + rng.randint(-attack_range, attack_range),
+                                 origin_coords[1] + rng.randint(-attack_range, attack_range))
+                queries.append((origin_coords, target_coords, obstructed_coords))
+        return queries
+
+    def benchmarkLineOfSight(self) -> None:
+        """Times 'get_between_coords' and 'is_in_range'."""
+        from attack import Attack
+        attack = Attack(self.LOS_ATTACK_ID)
+        queries = self.getLineOfSightQueries()
+
+        def runGetBetweenCoords():
+            for origin_coords, target_coords, _ in queries:
+                attack.getBetweenCoords(origin_coords, target_coords)
+
+        def runIsInRange():
+            for origin_coords, target_coords, obstructed_coords in queries:
+                attack.isInRange(origin_coords, target_coords, obstructed_coords)
+
+        self.time('get_between_coords', runGetBetweenCoords)
+        self.time('is_in_range', runIsInRange)
+
+    def benchmarkLevelLoading(self) -> None:
+        """Times 'level_load[<level name>]' for every level."""
+        from level_initialiser import LevelInitialiser
+        for level_name in self.getLevelNames():
+            character = self.createCharacter()
+            self.time(f"level_load[{level_name}]",
+                      lambda: LevelInitialiser().getLevelContents(level_name, character))
+
+    def benchmarkUpdateDisplay(self) -> None:
+        """Times 'update_display': one frame of a GameWorld on FRAME_LEVEL, without a pending turn."""
+        from game_states.game_world import GameWorld
+        game_world = GameWorld(self.FRAME_LEVEL, self.createCharacter(), enemy_ai_budget_ms=None)
+        self.time('update_display', game_world.updateDisplay)
+
+    def compare(self, baseline: dict[str, float]) -> tuple[list[str], list[str]]:
+        """Compares the results with baseline ({name: median seconds}).
+
+        Returns (report lines, names of the benchmarks that regressed).
+        """
+        lines = [f"{'benchmark':<40} {'baseline ms':>12} {'current ms':>12} {'change':>8}"]
+        regressions = []
+        for name, result in self.getResults().items():
+            baseline_result = baseline.get(name)
+            if baseline_result == None or baseline_result == 0.0:
+                lines.append(f"{name:<40} {'-':>12} {result*1000:>12.3f} {'new':>8}")
+                continue
+            change = result / baseline_result - 1
+            status = ''
+            if change > self.getTolerance():
+                status = 'REGRESSION'
+                regressions.append(name)
+            elif change < -self.getTolerance():
+                status = 'improved'
+            lines.append(f"{name:<40} {baseline_result*1000:>12.3f} {result*1000:>12.3f} {change:>+8.1%} {status}")
+        return lines, regressions
+
+    def readBaseline(self, path: str) -> Optional[dict[str, float]]:
+        """Returns the baseline stored at path, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            return json.load(file)['results']
+
+    def writeBaseline(self, path: str) -> None:
+        """Stores the results as the baseline at path."""
+        with open(path, 'w') as file:
+            json.dump({'repeat': self.getRepeat(), 'results': self.getResults()}, file, indent=1)
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """Runs the benchmark suite. Returns the exit status (1 if any benchmark regressed)."""
+    parser = argparse.ArgumentParser(description="Headless benchmark suite for the game's hot paths.")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline")
+    parser.add_argument('--baseline', default=BenchmarkSuite.DEFAULT_BASELINE_PATH, help="path of the baseline")
+    parser.add_argument('--repeat', type=int, default=5, help="runs of each benchmark")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="slowdown (fraction) flagged as a regression")
+    arguments = parser.parse_args(arguments)
+
+    suite = BenchmarkSuite(arguments.repeat, arguments.tolerance)
+    suite.runAll()
+    baseline = suite.readBaseline(arguments.baseline)
+    if arguments.save_baseline or baseline == None:
+        suite.writeBaseline(arguments.baseline)
+        print(f"Baseline stored at {arguments.baseline}")
+    if baseline == None:
+        baseline = {}
+    lines, regressions = suite.compare(baseline)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {suite.getTolerance():.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,8 +16,8 @@ def testInRange():
     Set parameters for attack isInRange().
     """
     level_initialiser = LevelInitialiser()
-    attack = Attack('Co')
-    character = Character(pygame.image.load(GAME_ASSETS['blue_orb']), 'Bob', "WC")
+    attack = Attack('SS')
+    character = Character(pygame.image.load(GAME_ASSETS['character']), 'Bob', 'Sw', 10, 10, 100, 100, 1, 0, 2)
 
     # Initialising level and getting board information.
     contents = level_initialiser.getLevelContents('Music Centre 2', character)
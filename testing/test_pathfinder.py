@@ -15,7 +15,7 @@ def testPathfinder():
     """
     level_initialiser = LevelInitialiser()
     pathfinder = Pathfinder()
-    character = Character(pygame.image.load(GAME_ASSETS['blue_orb']), 'Bob', "WC")
+    character = Character(pygame.image.load(GAME_ASSETS['character']), 'Bob', 'Sw', 10, 10, 100, 100, 1, 0, 2)
 
     # Initialising level and getting board information.
     contents = level_initialiser.getLevelContents('Music Centre 1', character)
@@ -23,7 +23,7 @@ def testPathfinder():
     coords_to_tile = board.getCoordsToTile()
     # Finding path.
     path = pathfinder.findPath(coords_to_tile, 
-                        [Character, Portal, Npc],
+                        (Character, Portal, Npc),
                         (0,0),
                         (5,5))
     print(path)
@@ -0,0 +1,179 @@
+import os
+import struct
+import zlib
+from typing import Optional, BinaryIO
+
+class TurnJournal:
+    """Class that keeps an append-only journal (write-ahead log) of the character's turns,
+    so that progress since the last checkpoint (save) can be recovered after a crash.
+
+    Each turn is recorded as its number, the seed the global random module was seeded with
+    at its start, and the character's action. Replaying the records in order on the world loaded from
+    the checkpoint reproduces the turns (see GameWorld.replayTurns()).
+    Records are written to the OS after each turn (so they survive the game crashing),
+    and fsynced every SYNC_INTERVAL turns (so at most SYNC_INTERVAL turns are lost if the system crashes).
+
+    The journal is split into segment files in journal_dir, named by the turn number of the checkpoint
+    they follow (a segment with base turn b has the records of turns after b). A new segment is started
+    at each checkpoint, and segments are discarded once a later checkpoint has been written,
+    so replay is bounded by the checkpoint interval.
+
+    Record layout (little-endian): turn number (u32), seed (u32), action type (u8: 0 move, 1 attack),
+    target xcoord, target ycoord (2 x i16), direction or attack index (u8), crc32 of the preceding fields (u32).
+    A torn or corrupted record ends the journal.
+
+    Actions are tuples: ('move', direction) or ('attack', attack_index, (target_xcoord, target_ycoord)).
+
+    Attributes:
+        journal_dir (str): Directory of the segment files.
+        file (Optional[BinaryIO]): Current segment file, opened for appending. None until a segment is started.
+        num_unsynced (int): Number of records written to file since it was last fsynced.
+    """
+
+    RECORD_FORMAT = '<IIBhhB'
+    CRC_FORMAT = '<I'
+    SYNC_INTERVAL = 16
+    DIRECTIONS = ('up', 'down', 'left', 'right')
+    SEGMENT_EXTENSION = '.jnl'
+
+    # Attributes
+    __journal_dir = None
+    __file = None
+    __num_unsynced = None
+
+    # Constructor
+    def __init__(self, journal_dir: str = 'gameinfostorage/journal'):
+        self.setJournalDir(journal_dir)
+        self.setFile(None)
+        self.setNumUnsynced(0)
+
+    # Getters
+    def getJournalDir(self) -> str:
+        return self.__journal_dir
+    def getFile(self) -> Optional[BinaryIO]:
+        return self.__file
+    def getNumUnsynced(self) -> int:
+        return self.__num_unsynced
+
+    # Setters
+    def setJournalDir(self, journal_dir):
+        self.__journal_dir = journal_dir
+    def setFile(self, file):
+        self.__file = file
+    def setNumUnsynced(self, num_unsynced):
+        self.__num_unsynced = num_unsynced
+
+    # Methods
+    def appendTurn(self, turn_number: int, seed: int, action: tuple) -> None:
+        """Appends the record of a turn to the current segment.
+
+        The record is written to the OS immediately, and fsynced every SYNC_INTERVAL records.
+        """
+        file = self.getFile()
+        file.write(self.packRecord(turn_number, seed, action))
+        file.flush()
+        self.setNumUnsynced(self.getNumUnsynced() + 1)
+        if self.getNumUnsynced() >= self.SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self) -> None:
+        """Fsyncs the records written to the current segment."""
+        if self.getFile() != None and self.getNumUnsynced() > 0:
+            os.fsync(self.getFile().fileno())
+            self.setNumUnsynced(0)
+
+    def startSegment(self, base_turn_number: int) -> None:
+        """Starts a new segment, for the turns after a checkpoint at base_turn_number.
+
+        The previous segment is fsynced and closed (it is kept until discardBefore() discards it).
+        """
+        self.close()
+        os.makedirs(self.getJournalDir(), exist_ok=True)
+        self.setFile(open(self.getSegmentPath(base_turn_number), 'wb'))
+
+    def close(self) -> None:
+        """Fsyncs and closes the current segment, if any."""
+        if self.getFile() != None:
+            self.sync()
+            self.getFile().close()
+            self.setFile(None)
+
+    def discardBefore(self, checkpoint_turn_number: int) -> None:
+        """Deletes the segments whose records are all of turns up to checkpoint_turn_number.
+        To be run once the checkpoint at checkpoint_turn_number has been written.
+        """
+        base_turn_numbers = self.getSegmentBaseTurnNumbers()
+        # A segment's records end at the next segment's base turn.
+        for base_turn_number, next_base_turn_number in zip(base_turn_numbers, base_turn_numbers[1:]):
+            if next_base_turn_number <= checkpoint_turn_number:
+                os.remove(self.getSegmentPath(base_turn_number))
+
+    def clear(self) -> None:
+        """Closes the current segment and deletes every segment (e.g. when a new game is started)."""
+        self.close()
+        for base_turn_number in self.getSegmentBaseTurnNumbers():
+            os.remove(self.getSegmentPath(base_turn_number))
+
+    def readTurns(self, checkpoint_turn_number: int) -> list[tuple[int, int, tuple]]:
+        """Returns the records (turn number, seed, action) of the turns after checkpoint_turn_number,
+        in order, to be replayed on the world loaded from the checkpoint.
+
+        Stops at the first torn or corrupted record, or at a gap in the turn numbers.
+        """
+        turns = []
+        next_turn_number = checkpoint_turn_number + 1
+        record_size = struct.calcsize(self.RECORD_FORMAT) + struct.calcsize(self.CRC_FORMAT)
+        for base_turn_number in self.getSegmentBaseTurnNumbers():
+            with open(self.getSegmentPath(base_turn_number), 'rb') as file:
+                data = file.read()
+            for offset in range(0, len(data) - record_size + 1, record_size):
+                record = self.unpackRecord(data[offset:offset + record_size])
+                if record == None:
+                    return turns
+                if record[0] < next_turn_number:
+                    continue
+                if record[0] > next_turn_number:
+                    return turns
+                turns.append(record)
+                next_turn_number += 1
+            if len(data) % record_size != 0:
+                return turns # Torn final record.
+        return turns
+
+    def getSegmentBaseTurnNumbers(self) -> list[int]:
+        """Returns the base turn numbers of the segments in journal_dir, in ascending order."""
+        if not os.path.isdir(self.getJournalDir()):
+            return []
+        return sorted(int(file_name[:-len(self.SEGMENT_EXTENSION)]) for file_name in os.listdir(self.getJournalDir())
+                      if file_name.endswith(self.SEGMENT_EXTENSION))
+
+    def getSegmentPath(self, base_turn_number: int) -> str:
+        """Returns the path of the segment with base_turn_number."""
+        return os.path.join(self.getJournalDir(), f"{base_turn_number:010d}{self.SEGMENT_EXTENSION}")
+
+    def packRecord(self, turn_number: int, seed: int, action: tuple) -> bytes:
+        """Returns the record of a turn, including its crc32."""
+        match action:
+            case ('move', direction):
+                fields = struct.pack(self.RECORD_FORMAT, turn_number, seed, 0, 0, 0, self.DIRECTIONS.index(direction))
+            case ('attack', attack_index, (target_xcoord, target_ycoord)):
+                fields = struct.pack(self.RECORD_FORMAT, turn_number, seed, 1, target_xcoord, target_ycoord, attack_index)
+            case _:
+                raise ValueError(f"Action ({action}) cannot be journaled.")
+        return fields + struct.pack(self.CRC_FORMAT, zlib.crc32(fields))
+
+    def unpackRecord(self, record: bytes) -> Optional[tuple[int, int, tuple]]:
+        """Returns (turn number, seed, action) of the record, or None if it is corrupted."""
+        fields_size = struct.calcsize(self.RECORD_FORMAT)
+        checksum, = struct.unpack_from(self.CRC_FORMAT, record, fields_size)
+        if zlib.crc32(record[:fields_size]) != checksum:
+            return None
+        turn_number, seed, action_type, target_xcoord, target_ycoord, index = \
+            struct.unpack_from(self.RECORD_FORMAT, record, 0)
+        match action_type:
+            case 0 if index < len(self.DIRECTIONS):
+                return (turn_number, seed, ('move', self.DIRECTIONS[index]))
+            case 1:
+                return (turn_number, seed, ('attack', index, (target_xcoord, target_ycoord)))
+            case _:
+                return None
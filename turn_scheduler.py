@@ -0,0 +1,181 @@
+import heapq
+from random import Random
+from math import ceil
+from typing import Any, Optional
+from sprites.active_entity import ActiveEntity
+
+class TurnScheduler:
+    """Class that decides the order in which entities (the character and enemies) take actions.
+
+    Each entity has a time at which it next acts, kept in a heap, so getting the next entity
+    to act and rescheduling it are O(log n). After acting, an entity's next action is
+    ACTION_TIME * DEFAULT_SPEED / speed later, so faster entities act more often
+    (e.g. an enemy with twice the character's speed acts twice for each character action).
+    delayEntity() pushes back an entity's next action.
+
+    Entities that act at the same time act in order of initiative (lowest first): by default a 
+    random number drawn (from an RNG seeded by seed) when the entity is added, or 0 if seed is None. 
+    Further ties are broken by the order entities were added in, so the turn order is deterministic
+    under a seed. The state is saved with the game (saveState(), loadState()), so a loaded game
+    keeps the turn order of the saved one.
+
+    Attributes:
+        queue (list[tuple[int, float, int, ActiveEntity]]): Heap of (time, initiative, sequence, entity)
+            for each entity's next action. May contain outdated entries.
+        entity_to_entry (dict[ActiveEntity, tuple[int, float, int, ActiveEntity]]):
+            Current queue entry of each scheduled entity.
+        current_time (int): Time of the most recent action.
+        num_added (int): Number of entities added (used as the sequence of the next entity).
+        rng (Optional[Random]): Random number generator for initiative.
+    """
+
+    ACTION_TIME = 100
+    DEFAULT_SPEED = 100
+
+    # Attributes
+    __queue = None
+    __entity_to_entry = None
+    __current_time = None
+    __num_added = None
+    __rng = None
+
+    # Constructor
+    def __init__(self, seed: Optional[int] = None):
+        self.setQueue([])
+        self.setEntityToEntry(dict())
+        self.setCurrentTime(0)
+        self.setNumAdded(0)
+        if seed != None:
+            self.setRng(Random(seed))
+        else:
+            self.setRng(None)
+
+    # Getters
+    def getQueue(self) -> list[tuple[int, float, int, ActiveEntity]]:
+        return self.__queue
+    def getEntityToEntry(self) -> dict[ActiveEntity, tuple[int, float, int, ActiveEntity]]:
+        return self.__entity_to_entry
+    def getCurrentTime(self) -> int:
+        return self.__current_time
+    def getNumAdded(self) -> int:
+        return self.__num_added
+    def getRng(self) -> Optional[Random]:
+        return self.__rng
+
+    # Setters
+    def setQueue(self, queue):
+        self.__queue = queue
+    def setEntityToEntry(self, entity_to_entry):
+        self.__entity_to_entry = entity_to_entry
+    def setCurrentTime(self, current_time):
+        self.__current_time = current_time
+    def setNumAdded(self, num_added):
+        self.__num_added = num_added
+    def setRng(self, rng):
+        self.__rng = rng
+
+    # Methods
+    def addEntity(self, 
+                  entity: ActiveEntity, 
+                  delay: int = 0, 
+                  initiative: Optional[float] = None) -> None:
+        """Schedules the entity to act delay after current_time.
+
+        If initiative is None, it is drawn from rng (or 0 if seed is None).
+        The character is added with an initiative of -1, so that it acts before 
+        enemies scheduled at the same time.
+        """
+        if initiative == None:
+            if self.getRng() != None:
+                initiative = self.getRng().random()
+            else:
+                initiative = 0.0
+        self.pushEntry((self.getCurrentTime() + delay, initiative, self.getNumAdded(), entity))
+        self.setNumAdded(self.getNumAdded() + 1)
+
+    def removeEntity(self, entity: ActiveEntity) -> None:
+        """Stops scheduling the entity (e.g. when it dies). Its queue entry becomes outdated."""
+        self.getEntityToEntry().pop(entity, None)
+
+    def delayEntity(self, entity: ActiveEntity, delay: int) -> None:
+        """Pushes back the entity's next action by delay."""
+        time, initiative, sequence, entity = self.getEntityToEntry()[entity]
+        self.pushEntry((time + delay, initiative, sequence, entity))
+
+    def pushEntry(self, entry: tuple[int, float, int, ActiveEntity]) -> None:
+        """Adds entry to queue, replacing the entity's current entry."""
+        self.getEntityToEntry()[entry[3]] = entry
+        heapq.heappush(self.getQueue(), entry)
+
+    def peekNextEntity(self) -> Optional[ActiveEntity]:
+        """Returns the entity that acts next, or None if no entities are scheduled.
+
+        Discards outdated entries at the top of the queue.
+        """
+        queue = self.getQueue()
+        entity_to_entry = self.getEntityToEntry()
+        while queue:
+            entry = queue[0]
+            if entity_to_entry.get(entry[3]) == entry:
+                return entry[3]
+            heapq.heappop(queue)
+        return None
+
+    def completeAction(self, entity: ActiveEntity) -> None:
+        """Reschedules entity after it has acted, and advances current_time to the time of the action."""
+        time, initiative, sequence, entity = self.getEntityToEntry()[entity]
+        self.setCurrentTime(max(self.getCurrentTime(), time))
+        self.pushEntry((time + self.calcActionDelay(entity), initiative, sequence, entity))
+
+    def calcActionDelay(self, entity: ActiveEntity) -> int:
+        """Returns the time between the entity's actions, based on its speed."""
+        return ceil(self.ACTION_TIME * self.DEFAULT_SPEED / max(1, entity.getSpeed()))
+
+    def getTurnOrder(self, num_actions: int) -> list[ActiveEntity]:
+        """Returns the entities that will take the next num_actions actions, in order
+        (assuming no entities are added, removed or delayed). Does not change the queue.
+
+        Used for displaying the upcoming turn order in the sidebar (see DataDisplay).
+        """
+        upcoming_entries = list(self.getEntityToEntry().values())
+        heapq.heapify(upcoming_entries)
+        turn_order = []
+        while upcoming_entries and len(turn_order) < num_actions:
+            time, initiative, sequence, entity = upcoming_entries[0]
+            turn_order.append(entity)
+            heapq.heapreplace(upcoming_entries,
+                              (time + self.calcActionDelay(entity), initiative, sequence, entity))
+        return turn_order
+
+    def saveState(self, entities: list[ActiveEntity]) -> dict[str, Any]:
+        """Returns the state of the scheduler as JSON-serializable data, so that it can be saved
+        and restored by loadState() (with the same turn order).
+
+        Entities are referred to by their index in entities, which must contain every scheduled entity.
+        State: {'current_time': int, 'num_added': int, 'entries': [[time, initiative, sequence, entity index]]
+        (the current entry of each scheduled entity), 'rng_state': state of rng (see Random.getstate()) or None}.
+        """
+        entity_to_index = {entity: index for index, entity in enumerate(entities)}
+        entries = sorted([time, initiative, sequence, entity_to_index[entity]]
+                         for time, initiative, sequence, entity in self.getEntityToEntry().values())
+        rng_state = self.getRng().getstate() if self.getRng() != None else None
+        return {'current_time': self.getCurrentTime(), 'num_added': self.getNumAdded(),
+                'entries': entries, 'rng_state': rng_state}
+
+    def loadState(self, state: dict[str, Any], entities: list[ActiveEntity]) -> None:
+        """Restores the state returned by saveState(), replacing the current state.
+        entities must be in the same order as the entities the state was saved with.
+        """
+        self.setCurrentTime(state['current_time'])
+        self.setNumAdded(state['num_added'])
+        queue = [(time, initiative, sequence, entities[index]) for time, initiative, sequence, index in state['entries']]
+        heapq.heapify(queue)
+        self.setQueue(queue)
+        self.setEntityToEntry({entry[3]: entry for entry in queue})
+        if state['rng_state'] != None:
+            version, internal_state, gauss_next = state['rng_state']
+            rng = Random()
+            rng.setstate((version, tuple(internal_state), gauss_next))
+            self.setRng(rng)
+        else:
+            self.setRng(None)
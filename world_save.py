@@ -0,0 +1,160 @@
+import os
+import json
+import struct
+import zlib
+from typing import Any, Optional
+
+class WorldSave:
+    """Class containing methods to write and read the save file.
+
+    The save file is binary and versioned, and captures the complete world state:
+    the current level, the character's stats and quest items, the turn state of the current level
+    (e.g. its turn scheduler, see GameWorld.getTurnState()), and the state of every level
+    visited (in the form of LevelCache.serializeLevel(), so enemies, entities and quest items
+    are kept as they were left, with enemies in their turn order). It is read in one read,
+    and written to a temporary file which then replaces the save file, so a crash while saving
+    cannot corrupt the save.
+
+    Layout (integers little-endian, strings as a u16 byte length followed by utf-8 bytes):
+        Header: magic (4 bytes, b'WSAV'), version (u16), crc32 of body (u32).
+        Body (version 2):
+            turn number (u32),
+            length of turn state (u32), turn state (JSON, utf-8; empty if there is none),
+            current level name (str), weapon id (str),
+            strength, defence, health, max health, health regen, exp, level (7 x i32),
+            number of quest items (u16), followed by each quest item name (str),
+            number of levels (u16), followed by each level as:
+                level name (str), spawn xcoord, spawn ycoord (2 x i16),
+                length of serialized level (u32), serialized level (bytes).
+        Version 1 bodies have no turn number (it is read as 0).
+
+    The previous text save format (save_info.txt) is read by readLegacySave(),
+    so that it can be migrated. Saves are kept in save slots (see SaveSlots); SAVE_PATH is
+    the single save file of previous versions.
+
+    Save info is returned as a dict with keys:
+        'turn_number' (number of turns taken, see TurnJournal),
+        'turn_state' (Optional[dict]: see GameWorld.getTurnState(); None if the save has none),
+        'level_name', 'weapon_id', 'stats' (list of the 7 stats above), 'quest_items' (set[str]),
+        'levels' (dict[str, tuple[tuple[int, int], bytes]]: spawn coords and serialized level, by level name).
+    """
+
+    MAGIC = b'WSAV'
+    VERSION = 2
+    HEADER_FORMAT = '<4sHI'
+    STATS_FORMAT = '<7i'
+    SAVE_PATH = 'gameinfostorage/save.wsav'
+    LEGACY_SAVE_PATH = 'gameinfostorage/save_info.txt'
+
+    # Methods
+    def writeSave(self, save_info: dict[str, Any], path: str) -> None:
+        """Writes save_info to the save file at path, atomically."""
+        body = self.packBody(save_info)
+        data = struct.pack(self.HEADER_FORMAT, self.MAGIC, self.VERSION, zlib.crc32(body)) + body
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def readSave(self, path: str) -> dict[str, Any]:
+        """Reads and returns the save info in the save file at path.
+
+        Raises ValueError if the file is not a save file, is of an unknown version, or is corrupted
+        (and OSError if it cannot be read).
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < struct.calcsize(self.HEADER_FORMAT):
+            raise ValueError(f"Save file ({path}) is too short.")
+        magic, version, checksum = struct.unpack_from(self.HEADER_FORMAT, data, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"File ({path}) is not a save file.")
+        body = memoryview(data)[struct.calcsize(self.HEADER_FORMAT):]
+        if zlib.crc32(body) != checksum:
+            raise ValueError(f"Save file ({path}) is corrupted.")
+        try:
+            match version:
+                case 1:
+                    return self.unpackBody(body, 0)
+                case 2:
+                    turn_number, = struct.unpack_from('<I', body, 0)
+                    return self.unpackBody(body[4:], turn_number)
+        except struct.error as error: # The body is shorter than its layout.
+            raise ValueError(f"Save file ({path}) is corrupted.") from error
+        raise ValueError(f"Save file version ({version}) is unknown.")
+
+    def readLegacySave(self, file_lines: list[str]) -> dict[str, Any]:
+        """Returns the save info in the lines of a save file of the previous text format.
+
+        The previous format only has the current level name, character stats and quest items,
+        so 'levels' is empty.
+        Raises ValueError if the lines are not a save file of the previous format.
+        """
+        if len(file_lines) < 9:
+            raise ValueError(f"Save file has {len(file_lines)} lines, not at least 9.")
+        stats = [int(line.strip()) for line in file_lines[1:8]]
+        quest_items = {line.strip() for line in file_lines[9:] if line.strip() != ''}
+        return {'turn_number': 0, 'turn_state': None, 'level_name': file_lines[0].strip(),
+                'weapon_id': file_lines[8].strip(), 'stats': stats, 'quest_items': quest_items,
+                'levels': dict()}
+
+    def packBody(self, save_info: dict[str, Any]) -> bytes:
+        """Returns the body of the save file (version 2) for save_info."""
+        turn_state = b''
+        if save_info.get('turn_state') != None:
+            turn_state = json.dumps(save_info['turn_state'], separators=(',', ':')).encode()
+        parts = [struct.pack('<II', save_info['turn_number'], len(turn_state)), turn_state,
+                 self.packString(save_info['level_name']), self.packString(save_info['weapon_id']),
+                 struct.pack(self.STATS_FORMAT, *save_info['stats']),
+                 struct.pack('<H', len(save_info['quest_items']))]
+        for quest_item in sorted(save_info['quest_items']):
+            parts.append(self.packString(quest_item))
+        parts.append(struct.pack('<H', len(save_info['levels'])))
+        for level_name, (spawn_coords, level_data) in save_info['levels'].items():
+            parts.append(self.packString(level_name))
+            parts.append(struct.pack('<hhI', spawn_coords[0], spawn_coords[1], len(level_data)))
+            parts.append(level_data)
+        return b''.join(parts)
+
+    def unpackBody(self, body: memoryview, turn_number: int) -> dict[str, Any]:
+        """Returns the save info in the body of a save file, after the turn number (the version 1 layout)."""
+        turn_state_length, = struct.unpack_from('<I', body, 0)
+        turn_state = None
+        if turn_state_length > 0:
+            turn_state = json.loads(bytes(body[4:4 + turn_state_length]).decode())
+        level_name, offset = self.unpackString(body, 4 + turn_state_length)
+        weapon_id, offset = self.unpackString(body, offset)
+        stats = list(struct.unpack_from(self.STATS_FORMAT, body, offset))
+        offset += struct.calcsize(self.STATS_FORMAT)
+        num_quest_items, = struct.unpack_from('<H', body, offset)
+        offset += 2
+        quest_items = set()
+        for _ in range(num_quest_items):
+            quest_item, offset = self.unpackString(body, offset)
+            quest_items.add(quest_item)
+        num_levels, = struct.unpack_from('<H', body, offset)
+        offset += 2
+        levels = dict()
+        for _ in range(num_levels):
+            saved_level_name, offset = self.unpackString(body, offset)
+            spawn_xcoord, spawn_ycoord, data_length = struct.unpack_from('<hhI', body, offset)
+            offset += struct.calcsize('<hhI')
+            level_data = bytes(body[offset:offset + data_length])
+            levels[saved_level_name] = ((spawn_xcoord, spawn_ycoord), level_data)
+            offset += data_length
+        return {'turn_number': turn_number, 'turn_state': turn_state, 'level_name': level_name,
+                'weapon_id': weapon_id, 'stats': stats,
+                'quest_items': quest_items, 'levels': levels}
+
+    def packString(self, string: str) -> bytes:
+        """Returns string packed as its u16 byte length followed by its utf-8 bytes."""
+        encoded = string.encode()
+        return struct.pack('<H', len(encoded)) + encoded
+
+    def unpackString(self, data: memoryview, offset: int) -> tuple[str, int]:
+        """Returns the string packed at offset in data, and the offset after it."""
+        length, = struct.unpack_from('<H', data, offset)
+        offset += 2
+        return bytes(data[offset:offset + length]).decode(), offset + length